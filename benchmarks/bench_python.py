@@ -0,0 +1,57 @@
+"""
+Benchmark the release list backends against a synthetic downloads page.
+
+`pyenvtool/tests/data/synthetic_downloads.html` is not a capture of
+python.org: it surrounds a release list widget with a large header and a long
+release table of roughly the size of the real page, so the `stream` backend
+can stop well before the end of it. Run with
+`python benchmarks/bench_python.py`.
+"""
+
+import timeit
+from pathlib import Path
+
+import click
+import requests_mock
+
+from pyenvtool.python import PARSER_BACKENDS, PYTHON_DOWNLOADS
+
+PAGE_PATH = (
+    Path(__file__).parents[1]
+    / "pyenvtool"
+    / "tests"
+    / "data"
+    / "synthetic_downloads.html"
+)
+
+
+def bench_backend(page: str, backend: str, number: int, repeat: int) -> float:
+    """Best time in seconds for one fetch and parse of a page with a backend."""
+    with requests_mock.Mocker() as mock_requests:
+        mock_requests.get(PYTHON_DOWNLOADS, text=page)
+        times = timeit.repeat(PARSER_BACKENDS[backend], number=number, repeat=repeat)
+
+    return min(times) / number
+
+
+@click.command()
+@click.option("--number", type=click.IntRange(min=1), default=5, show_default=True)
+@click.option("--repeat", type=click.IntRange(min=1), default=3, show_default=True)
+@click.option(
+    "--page",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    default=PAGE_PATH,
+    help="Downloads page to parse, such as a saved copy of the real one.",
+)
+def main(number: int = 5, repeat: int = 3, page: Path = PAGE_PATH) -> None:
+    """Time each release list backend on a downloads page."""
+    text = page.read_text(encoding="utf-8")
+    click.echo(f"Page: {len(text.encode('utf-8')) / 1024:.0f} KiB")
+
+    for backend in PARSER_BACKENDS:
+        seconds = bench_backend(text, backend, number, repeat)
+        click.echo(f"{backend:>8}: {seconds * 1000:6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
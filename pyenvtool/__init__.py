@@ -11,28 +11,181 @@ __maintainer__ = __author__
 __status__ = "Production"
 
 import logging
-from typing import Dict, Iterable, Tuple
+import shutil
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
-from pyenvtool.cli import console_print
-from pyenvtool.pyenv import Op
-from pyenvtool.python import PyVer, VersionStatus
+from pyenvtool.cli import console_print, emit_event
+from pyenvtool.journal import Journal
+from pyenvtool.lock import coalesce
+from pyenvtool.metrics import record_cache, time_build, time_phase
+from pyenvtool.precompile import precompile_version
+from pyenvtool.pyenv import (
+    Op,
+    pyenv_available_versions,
+    pyenv_installed_versions,
+    pyenv_rehash,
+    pyenv_set_shims,
+    pyenv_update,
+    pyenv_version_dir,
+)
+from pyenvtool.python import (
+    IMPL_SUPPORTED_LINES,
+    ImplVer,
+    PyVer,
+    VersionStatus,
+    main_status,
+    parse_version,
+    python_supported_versions,
+)
+from pyenvtool.releases import python_release_cycle_versions
+from pyenvtool.staging import (
+    discard_staging_root,
+    finish_staged_install,
+    staged_install,
+    staging_root,
+    staging_supported,
+)
+from pyenvtool.trash import empty_trash, trash_version
+from pyenvtool.venvs import rebuild_venvs
 
 
-def calculate_changes(  # noqa: C901
+def discover_versions(
+    update: bool = True,
+    root: Optional[Path] = None,
+    scrape: bool = False,
+    dry_run: bool = False,
+) -> Tuple[Dict[PyVer, VersionStatus], Set[PyVer], Set[PyVer]]:
+    """
+    Determine the supported, available, and installed Python versions.
+
+    Support status is calculated from the release-cycle dataset unless
+    `scrape` is set, in which case it is scraped from python.org. The
+    supported and available versions are shared with any concurrent
+    invocation, so only one of them performs the discovery; a dry run performs
+    its own, so it writes nothing to the root's state directory.
+    """
+
+    def discover() -> Dict[str, Any]:
+        if update:
+            console_print("Updating pyenv...")
+            with time_phase("update"):
+                pyenv_update(root=root)
+
+        if scrape:
+            console_print("Scraping supported Python versions...")
+            with time_phase("scrape"):
+                supported_status = dict(python_supported_versions())
+        else:
+            with time_phase("release_cycle"):
+                supported_status = dict(python_release_cycle_versions(root=root))
+
+        with time_phase("listing"):
+            available_versions = pyenv_available_versions(root=root)
+
+        return {
+            "supported": {str(v): s.value for v, s in supported_status.items()},
+            "available": [
+                str(v)
+                for v in available_versions
+                if v.prerelease == "" and v.build == ""
+            ],
+        }
+
+    name = "discovery-scrape" if scrape else "discovery"
+    if update:
+        name += "-update"
+    if dry_run:
+        data, reused = discover(), False
+    else:
+        data, reused = coalesce(name, discover, root=root)
+    record_cache(name, reused)
+
+    supported_status = {
+        PyVer.parse(v): VersionStatus(s) for v, s in data["supported"].items()
+    }
+    available_versions = {parse_version(v) for v in data["available"]}
+    installed_versions = set(pyenv_installed_versions(root=root))
+
+    emit_event(
+        "supported",
+        root=root,
+        versions={
+            v.main_format(): s.value for v, s in sorted(supported_status.items())
+        },
+    )
+    emit_event(
+        "available",
+        root=root,
+        versions=[str(v) for v in sorted(available_versions)],
+    )
+    emit_event(
+        "installed",
+        root=root,
+        versions=[str(v) for v in sorted(installed_versions)],
+    )
+
+    return supported_status, available_versions, installed_versions
+
+
+def impl_supported_mains(
+    available_versions: Iterable[PyVer],
+    installed_versions: Iterable[PyVer],
+    lines: int = IMPL_SUPPORTED_LINES,
+) -> Set[PyVer]:
+    """
+    Find the main versions of installed alternative implementations to keep.
+
+    Only the newest `lines` release lines of each implementation are
+    supported, and only the newest main version of each line. The newest line
+    is always supported, so installs move on to it; older lines only while
+    one of their versions is installed.
+    """
+    available_versions = list(available_versions)
+    installed = [i for i in installed_versions if isinstance(i, ImplVer)]
+    mains: Set[PyVer] = set()
+
+    for impl in {i.impl for i in installed}:
+        newest: Dict[Tuple[Any, ...], ImplVer] = {}
+        for a in available_versions:
+            if isinstance(a, ImplVer) and a.impl == impl:
+                newest[a.line] = max(newest.get(a.line, a.main), a.main)
+
+        installed_lines = {i.line for i in installed if i.impl == impl}
+        for n, line in enumerate(sorted(newest, reverse=True)[:lines]):
+            if n == 0 or line in installed_lines:
+                mains.add(newest[line])
+
+    return mains
+
+
+def calculate_changes(  # noqa: C901, PLR0913
     supported_versions: Iterable[PyVer],
     available_versions: Iterable[PyVer],
     installed_versions: Iterable[PyVer],
     keep_bugfix: bool = False,
     remove_minor: bool = False,
+    protected_versions: Iterable[PyVer] = (),
 ) -> Iterable[Tuple[PyVer, Op]]:
-    """Calculate what changes need to be made."""
+    """
+    Calculate what changes need to be made.
+
+    Alternative implementations are only upgraded where one is installed, and
+    only their newest release lines are treated as supported (see
+    `impl_supported_mains`). Protected versions which would otherwise be
+    removed are kept instead.
+    """
     logger = logging.getLogger(__name__)
+    protected = set(protected_versions)
 
     available_versions = [
         a for a in available_versions if a.prerelease == "" and a.build == ""
     ]
 
+    installed_versions = list(installed_versions)
     main_sup = {s.main for s in supported_versions}
+    main_sup |= impl_supported_mains(available_versions, installed_versions)
     main_old = {i.main for i in installed_versions if i.main not in main_sup}
 
     for s in main_sup:
@@ -48,7 +201,7 @@ def calculate_changes(  # noqa: C901
 
             if latest not in installed:
                 logger.debug(
-                    f"Latest   {latest.major}.{latest.minor:02d} bugfix ({latest!s}) "
+                    f"Latest   {latest.main_format()} bugfix ({latest!s}) "
                     "needs to be installed.",
                 )
                 yield (latest, Op.INSTALL)
@@ -57,10 +210,10 @@ def calculate_changes(  # noqa: C901
             for v in installed:
                 if latest is not None and v != latest:
                     logger.debug(
-                        f"Outdated {v.major}.{v.minor:02d} bugfix "
+                        f"Outdated {v.main_format()} bugfix "
                         f"({v!s}) needs to be removed.",
                     )
-                    yield (v, Op.REMOVE)
+                    yield (v, Op.KEEP if v in protected else Op.REMOVE)
 
     for o in main_old:
         installed = sorted(
@@ -74,17 +227,36 @@ def calculate_changes(  # noqa: C901
             for v in installed:
                 if v == latest and remove_minor:
                     logger.debug(
-                        f"Unsupported {v.major}.{v.minor:02d} minor "
+                        f"Unsupported {v.main_format()} minor "
                         f"({v!s}) needs to be removed.",
                     )
-                    yield (v, Op.REMOVE)
+                    yield (v, Op.KEEP if v in protected else Op.REMOVE)
 
                 elif v != latest and not keep_bugfix:
                     logger.debug(
-                        f"Unsupported {v.major}.{v.minor:02d} bugfix "
+                        f"Unsupported {v.main_format()} bugfix "
                         f"({v!s}) needs to be removed.",
                     )
-                    yield (v, Op.REMOVE)
+                    yield (v, Op.KEEP if v in protected else Op.REMOVE)
+
+
+def _report_tags(
+    v: PyVer,
+    s: VersionStatus,
+    installed: Set[PyVer],
+    latest: PyVer,
+) -> str:
+    """Describe a single version in the version report."""
+    tags = []
+    if v in installed:
+        tags.append("installed")
+    if s is VersionStatus.UNSUPPORTED:
+        tags.append("[ver_u]unsupported[/ver_u]")
+    if v == latest:
+        tags.append("[ver_l]latest[/ver_l]")
+    elif s is not VersionStatus.UNSUPPORTED:
+        tags.append("[ver_b]out-of-date[/ver_b]")
+    return ", ".join(tags)
 
 
 def print_version_report(
@@ -95,45 +267,317 @@ def print_version_report(
     """Pretty-print a report of the supported, installed, and available versions."""
     console_print("Version Report:")
 
+    available_versions = list(available_versions)
+    installed_versions = list(installed_versions)
     supported_versions = set(supported_status.keys())
     main_versions = set(supported_versions) | {v.main for v in installed_versions}
 
     for m in sorted(main_versions):
-        s = supported_status.get(m, VersionStatus.UNSUPPORTED)
+        s = main_status(m, supported_status, available_versions)
+        name = m.main_format()
+        if not isinstance(m, ImplVer):
+            name = f"Python {name}"
 
-        console_print(
-            f"  [bold]Python {m.main_format()} "
-            f"([{s.value}]{s.value}[/{s.value}])[/bold]",
-        )
+        if s is VersionStatus.UNKNOWN:
+            console_print(f"  [bold]{name}[/bold]")
+        else:
+            console_print(
+                f"  [bold]{name} ([{s.value}]{s.value}[/{s.value}])[/bold]",
+            )
 
         installed = {v for v in installed_versions if v.main == m}
-        latest = max(v for v in available_versions if v.main == m)
-
-        for v in sorted(installed):
-            if s is VersionStatus.UNSUPPORTED:
-                if v == latest:
-                    console_print(
-                        f"    {v} (installed, [ver_u]unsupported[/ver_u],"
-                        f" [ver_l]latest[/ver_l])",
-                    )
-                else:
-                    console_print(
-                        f"    {v} (installed, [ver_u]unsupported[/ver_u])",
-                    )
+        candidates = [v for v in available_versions if v.main == m] or installed
+        if not candidates:
+            console_print()
+            continue
+        latest = max(candidates)
 
-                if latest not in installed:
-                    console_print(
-                        f"    {latest} ([ver_u]unsupported[/ver_u],"
-                        f" [ver_l]latest[/ver_l])",
-                    )
+        for v in sorted(installed | {latest}):
+            emit_event(
+                "report",
+                main=m.main_format(),
+                status=s.value,
+                version=str(v),
+                installed=v in installed,
+                latest=v == latest,
+            )
+            console_print(f"    {v} ({_report_tags(v, s, installed, latest)})")
+
+        console_print()
+
+
+def print_changes(
+    deltas: Iterable[Tuple[PyVer, Op]],
+    venv_held: Iterable[PyVer] = (),
+) -> None:
+    """
+    Pretty-print a list of changes.
+
+    Kept versions are shown as pinned, unless they are in `venv_held`, the
+    versions kept because virtual environments are based on them.
+    """
+    venv_held = set(venv_held)
+
+    for ver, op in sorted(deltas, reverse=True):
+        if op is not Op.KEEP:
+            emit_event("delta", version=str(ver), op=op.name)
+        else:
+            reason = "venv" if ver in venv_held else "pinned"
+            emit_event("delta", version=str(ver), op=op.name, reason=reason)
+
+        if op is Op.INSTALL:
+            console_print(f"  + Install [install]{ver.fixed_width}[/install]")
+        elif op is Op.REMOVE:
+            console_print(f"  - Remove  [remove]{ver.fixed_width}[/remove]")
+        elif op is Op.KEEP:
+            label = "has venvs" if ver in venv_held else "pinned"
+            console_print(f"  = Keep    [keep]{ver.fixed_width}[/keep] ({label})")
+        else:
+            raise ValueError(f"Unexpected Operation: {op!s}")
+
+
+def precompile_changes(
+    v: PyVer,
+    root: Optional[Path] = None,
+    jobs: int = 0,
+) -> None:
+    """Precompile an installed version and report the result."""
+    if isinstance(v, ImplVer):
+        console_print(f"Skipping precompile of {v!s}, only CPython is supported")
+        return
+
+    console_print(f"Precompiling {v!s}...")
+    stats = precompile_version(v, root=root, jobs=jobs)
+    console_print(
+        f"  {stats.compiled} bytecode files from {stats.sources} sources "
+        f"in {stats.seconds:.1f}s",
+    )
+
+
+@contextmanager
+def record_operation(
+    v: PyVer,
+    op: Op,
+    journal: Optional[Journal] = None,
+    root: Optional[Path] = None,
+) -> Iterator[None]:
+    """Emit events and journal records around a single operation."""
+    emit_event("start", version=str(v), op=op.name, root=root)
+    if journal is not None:
+        journal.begin(v, op)
+
+    yield
+
+    if journal is not None:
+        journal.done(v, op)
+    emit_event("finish", version=str(v), op=op.name, root=root)
+
+
+def execute_changes(
+    deltas: Iterable[Tuple[PyVer, Op]],
+    journal: Optional[Journal] = None,
+    root: Optional[Path] = None,
+    precompile: bool = False,
+) -> None:
+    """
+    Install and remove versions, then point the shims at the latest bugfixes.
+
+    If a journal is provided, each operation is recorded before and after it
+    is performed, and the journal is discarded once the run has finished. If
+    `precompile` is set, each new version's standard library is compiled to
+    bytecode at every optimization level after it is installed.
+    """
+    logger = logging.getLogger(__name__)
+    deltas = list(deltas)
+
+    to_install = sorted(
+        (ver for ver, op in deltas if op is Op.INSTALL),
+        reverse=True,
+    )
+    to_remove = sorted(
+        (ver for ver, op in deltas if op is Op.REMOVE),
+        reverse=True,
+    )
+
+    for v in to_install:
+        console_print(f"Installing {v!s}...")
+        with record_operation(v, Op.INSTALL, journal, root=root), time_build(v, root):
+            logger.debug(staged_install(v, root=root))
+        finish_staged_install(root=root)
+        if precompile:
+            precompile_changes(v, root=root)
+
+    for v in to_remove:
+        console_print(f"Removing {v!s}...")
+        with record_operation(v, Op.REMOVE, journal, root=root):
+            trash_version(v, root=root)
+
+    if to_remove:
+        pyenv_rehash(root=root)
+
+    installed_versions = set(pyenv_installed_versions(root=root))
+    main_versions = {v.main for v in installed_versions}
+
+    latest_versions: List[PyVer] = []
+    for main in main_versions:
+        installed = {v for v in installed_versions if v.main == main}
+        if installed:
+            latest_versions.append(
+                max(installed),
+            )
+    # CPython first, so `python` is never shimmed to an alternative
+    latest_versions.sort(key=lambda v: (not isinstance(v, ImplVer), v), reverse=True)
+
+    pyenv_set_shims(*latest_versions, root=root)
+
+    if journal is not None:
+        journal.complete()
+
+
+def print_venv_dependents(
+    deltas: Iterable[Tuple[PyVer, Op]],
+    dependents: Dict[PyVer, List[Path]],
+) -> None:
+    """Pretty-print the virtual environments which removals would break."""
+    for ver, op in sorted(deltas, reverse=True):
+        if op is not Op.REMOVE:
+            continue
+
+        for venv in dependents.get(ver, []):
+            emit_event("venv", version=str(ver), venv=venv)
+            console_print(f"  ! [ver_u]{venv!s}[/ver_u] is based on {ver!s}")
+
+
+def rebuild_dependents(
+    deltas: Iterable[Tuple[PyVer, Op]],
+    dependents: Dict[PyVer, List[Path]],
+    root: Optional[Path] = None,
+    jobs: Optional[int] = None,
+) -> None:
+    """
+    Rebuild the venvs of removed versions against their replacement bugfix.
+
+    Only venvs outside the removed version survive its removal, and only
+    those with a replacement of the same main version can be rebuilt.
+    """
+    installed_versions = set(pyenv_installed_versions(root=root))
+    rebuilds = []
+
+    for ver, op in deltas:
+        if op is not Op.REMOVE:
+            continue
+
+        replacement = max(
+            (v for v in installed_versions if v.main == ver.main),
+            default=None,
+        )
+        for venv in dependents.get(ver, []):
+            if replacement is None:
+                console_print(f"No replacement for {ver!s}, not rebuilding {venv!s}")
+            elif pyenv_version_dir(ver, root=root) not in venv.parents:
+                rebuilds.append((venv, replacement))
+
+    if not rebuilds:
+        return
+
+    console_print(f"Rebuilding {len(rebuilds)} virtual environments...")
+    for venv, ok in rebuild_venvs(rebuilds, root=root, jobs=jobs):
+        emit_event("rebuild", venv=venv, success=ok)
+        if ok:
+            console_print(f"  Rebuilt {venv!s}")
+        else:
+            console_print(f"  [remove]Failed[/remove] to rebuild {venv!s}")
+
+
+def _clean_up_interrupted(
+    journal: Journal,
+    dry_run: bool = False,
+    root: Optional[Path] = None,
+) -> None:
+    for v, op in journal.interrupted():
+        if op is not Op.INSTALL:
+            continue
+
+        # Staged builds only reach the live tree once they are complete
+        if staging_supported():
+            if staging_root(v, root=root).exists():
+                console_print(f"Discarding partial build of {v!s}...")
+                if not dry_run:
+                    discard_staging_root(v, root=root)
+            continue
+
+        path = pyenv_version_dir(v, root=root)
+        if path.exists():
+            console_print(f"Cleaning up partial install of {v!s}...")
+            if not dry_run:
+                shutil.rmtree(path)
+
+
+def abandon_changes(
+    journal: Journal,
+    dry_run: bool = False,
+    root: Optional[Path] = None,
+) -> bool:
+    """
+    Discard the run recorded in a journal without finishing it.
+
+    Installs that were started but never finished are removed, so the root is
+    left with only complete versions. Returns `True` if there was a run to
+    abandon.
+    """
+    if journal.plan() is None:
+        return False
+
+    _clean_up_interrupted(journal, dry_run=dry_run, root=root)
+
+    if not dry_run:
+        journal.complete()
+
+    return True
+
+
+def resume_changes(  # noqa: PLR0913
+    journal: Journal,
+    dry_run: bool = False,
+    root: Optional[Path] = None,
+    precompile: bool = False,
+    fingerprint: Optional[str] = None,
+    options: Optional[Dict[str, Any]] = None,
+) -> bool:
+    """
+    Finish the run recorded in a journal, if it was interrupted.
+
+    Installs that were started but never finished are removed before the
+    remaining operations are performed; finished operations are not repeated.
+    Returns `True` if an interrupted run was found and resumed. Anything left
+    in the trash by an earlier run is queued for deletion either way.
+
+    If a `fingerprint` or `options` are given and the interrupted run was
+    planned differently, it is abandoned instead, so the caller can carry out
+    its own plan.
+    """
+    if not dry_run:
+        empty_trash(root=root)
+
+    remaining = journal.remaining()
+    if remaining is None:
+        return False
+
+    if (fingerprint is not None or options is not None) and not journal.matches(
+        fingerprint,
+        options,
+    ):
+        console_print("Abandoning interrupted run of a different plan...")
+        abandon_changes(journal, dry_run=dry_run, root=root)
+        return False
+
+    console_print("Resuming interrupted run...")
+
+    _clean_up_interrupted(journal, dry_run=dry_run, root=root)
 
-            else:
-                if v == latest:
-                    console_print(f"    {v} (installed, [ver_l]latest[/ver_l])")
-                else:
-                    console_print(f"    {v} (installed, [ver_b]out-of-date[/ver_b])")
+    print_changes(remaining)
 
-                if latest not in installed:
-                    console_print(f"    {latest} ([ver_l]latest[/ver_l])")
+    if not dry_run:
+        execute_changes(remaining, journal, root=root, precompile=precompile)
 
-        print()
+    return True
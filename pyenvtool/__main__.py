@@ -2,36 +2,100 @@
 
 """Console Entry Point for pyenvtool Utility."""
 
+import asyncio
 import logging
+import os
 import sys
+from contextlib import ExitStack, suppress
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
 import click
+from rich.table import Table
 
-from pyenvtool import calculate_changes, print_version_report
-from pyenvtool.cli import CLICK_CONTEXT, console_print, setup_logging
+from pyenvtool import (
+    abandon_changes,
+    calculate_changes,
+    discover_versions,
+    execute_changes,
+    precompile_changes,
+    print_changes,
+    print_venv_dependents,
+    print_version_report,
+    rebuild_dependents,
+    resume_changes,
+)
+from pyenvtool.batch import execute_batch
+from pyenvtool.cli import (
+    CLICK_CONTEXT,
+    OUTPUT_FORMATS,
+    console_print,
+    emit_event,
+    format_bytes,
+    set_output_format,
+    setup_logging,
+)
+from pyenvtool.daemon import (
+    REFRESH_INTERVAL,
+    daemon_request,
+    daemon_socket_path,
+    serve,
+)
+from pyenvtool.dedupe import dedupe_root, install_dedupe_hook, remove_dedupe_hook
+from pyenvtool.fanout import (
+    BENCH_REPEAT,
+    BENCH_SUITE,
+    bench_command,
+    parse_bench,
+    run_in_versions,
+    select_versions,
+)
+from pyenvtool.journal import JOURNAL_NAME, Journal
+from pyenvtool.lock import RootLock
+from pyenvtool.metrics import metrics, record_root_size, record_versions
+from pyenvtool.pins import pinned_versions, scan_pins
+from pyenvtool.plan import Plan, plan_options
 from pyenvtool.pyenv import (
     PYENV_NAME,
-    Op,
-    pyenv_available_versions,
-    pyenv_install,
     pyenv_installed_versions,
     pyenv_is_installed,
-    pyenv_set_shims,
-    pyenv_uninstall,
+    pyenv_root,
+    pyenv_state_dir,
     pyenv_update,
 )
-from pyenvtool.python import PyVer, python_supported_versions
+from pyenvtool.python import PyVer, parse_version
+from pyenvtool.releases import (
+    python_release_cycle_versions,
+    release_cycle_path,
+    update_release_cycle,
+)
+from pyenvtool.venvs import (
+    VENV_POLICIES,
+    held_versions,
+    hold_removals,
+    scan_venvs,
+    venv_dependents,
+)
 
 
 @click.group(context_settings=CLICK_CONTEXT)
+@click.option(
+    "--output",
+    type=click.Choice(OUTPUT_FORMATS),
+    default="text",
+    show_default=True,
+    help="Print formatted text, or stream one JSON event per line as it happens.",
+)
 @click.option("-v", "--verbose", count=True)
-def cli_main(verbose: int = 0) -> int:
+def cli_main(output: str = "text", verbose: int = 0) -> int:
     """Convienience wrapper for common pyenv operations."""
     args = locals().items()
     setup_logging(verbose)
     logger = logging.getLogger(__name__)
     logger.debug("Running with options: %s", ", ".join(f"{k!s}={v!r}" for k, v in args))
 
+    set_output_format(output)
+
     if not pyenv_is_installed():
         raise click.UsageError(
             f"Could not find pyenv executable `{PYENV_NAME}` "
@@ -41,8 +105,7 @@ def cli_main(verbose: int = 0) -> int:
     return 0
 
 
-@click.command(context_settings=CLICK_CONTEXT)
-@click.option(
+option_keep_bugfix = click.option(
     "--keep-bugfix",
     "-k",
     is_flag=True,
@@ -51,7 +114,8 @@ def cli_main(verbose: int = 0) -> int:
     type=bool,
     help="Keep all existing python versions even if a newer bugfix is available.",
 )
-@click.option(
+
+option_remove_minor = click.option(
     "--remove-minor",
     "-r",
     is_flag=True,
@@ -60,7 +124,8 @@ def cli_main(verbose: int = 0) -> int:
     type=bool,
     help="Remove all unsupported python versions, including the latest bugfix.",
 )
-@click.option(
+
+option_no_update = click.option(
     "--no-update",
     is_flag=True,
     flag_value=True,
@@ -68,7 +133,8 @@ def cli_main(verbose: int = 0) -> int:
     type=bool,
     help="Do not update the pyenv tool or the list of available versions",
 )
-@click.option(
+
+option_dry_run = click.option(
     "--dry-run",
     "-n",
     is_flag=True,
@@ -77,32 +143,175 @@ def cli_main(verbose: int = 0) -> int:
     type=bool,
     help="Determine the necessary changes, but do not execute them.",
 )
-@click.option("-v", "--verbose", count=True)
-def cli_upgrade(
+
+
+option_protect_pinned = click.option(
+    "--protect-pinned",
+    "pinned_paths",
+    multiple=True,
+    type=click.Path(exists=True, file_okay=False, path_type=Path),
+    help="Keep versions pinned by .python-version files under PATH; may be repeated.",
+)
+
+
+option_venv_dirs = click.option(
+    "--venv-dir",
+    "venv_dirs",
+    multiple=True,
+    envvar="PYENVTOOL_VENV_DIRS",
+    type=click.Path(exists=True, file_okay=False, path_type=Path),
+    help="Also check the venvs in this directory before removals; may be repeated.",
+)
+
+option_venv_policy = click.option(
+    "--venvs",
+    "venv_policy",
+    type=click.Choice(VENV_POLICIES),
+    default="flag",
+    show_default=True,
+    help="Keep, warn about, or rebuild venvs based on versions being removed.",
+)
+
+
+def protected_versions(
+    pinned_paths: Iterable[Path],
+    installed_versions: Iterable[PyVer],
+    root: Optional[Path] = None,
+    dry_run: bool = False,
+) -> Set[PyVer]:
+    """Installed versions pinned by `.python-version` files under some trees."""
+    pinned_paths = list(pinned_paths)
+    if not pinned_paths:
+        return set()
+
+    console_print("Scanning for pinned versions...")
+    pins = scan_pins(pinned_paths, root=root, dry_run=dry_run)
+    return pinned_versions(pins, installed_versions)
+
+
+def local_plan(  # noqa: PLR0913
     keep_bugfix: bool = False,
     remove_minor: bool = False,
+    update: bool = True,
+    scrape: bool = False,
+    pinned_paths: Iterable[Path] = (),
+    venv_held: Iterable[PyVer] = (),
+) -> Plan:
+    """Discover versions and calculate the changes required for this root."""
+    with RootLock():
+        supported_status, available_versions, installed_versions = discover_versions(
+            update=update,
+            scrape=scrape,
+        )
+        protected = protected_versions(pinned_paths, installed_versions)
+    protected |= set(venv_held)
+
+    return Plan(
+        calculate_changes(
+            supported_status.keys(),
+            available_versions,
+            installed_versions,
+            keep_bugfix=keep_bugfix,
+            remove_minor=remove_minor,
+            protected_versions=protected,
+        ),
+        supported_status,
+        available_versions,
+        installed_versions,
+        keep_bugfix=keep_bugfix,
+        remove_minor=remove_minor,
+        protected_versions=protected,
+    )
+
+
+def query_daemon(request: Dict[str, Any]) -> Optional[Plan]:
+    """Ask a running daemon for a plan, or `None` to discover versions locally."""
+    try:
+        data = daemon_request(request)
+        return None if data is None else Plan.from_dict(data)
+    except ValueError as e:
+        raise click.ClickException(str(e)) from e
+
+
+def apply_plan(
+    plan: Plan,
     dry_run: bool = False,
-    no_update: bool = False,
-    verbose: int = 0,
+    precompile: bool = False,
+    venv_dirs: Iterable[Path] = (),
+    venv_policy: str = "flag",
 ) -> int:
-    """Upgrade installed Python versions."""
-    args = locals().items()
-    setup_logging(verbose)
-    logger = logging.getLogger(__name__)
-    logger.debug("Running with options: %s", ", ".join(f"{k!s}={v!r}" for k, v in args))
+    """Carry out a plan in the current pyenv root."""
+    journal = Journal(pyenv_state_dir() / JOURNAL_NAME)
+    with RootLock(exclusive=not dry_run):
+        if resume_changes(
+            journal,
+            dry_run=dry_run,
+            precompile=precompile,
+            fingerprint=plan.fingerprint,
+        ):
+            return 0
 
-    if not no_update:
-        console_print("Updating pyenv...")
-        pyenv_update()
+        console_print(f"Applying plan {plan.fingerprint[:12]}...")
+        installed_versions = list(pyenv_installed_versions())
+        venvs = scan_venvs(venv_dirs, dry_run=dry_run)
+        dependents = venv_dependents(venvs, installed_versions)
+        held = held_versions(dependents, venv_policy)
+        deltas = hold_removals(plan.deltas_for(installed_versions), held)
 
-    console_print("Scraping supported Python versions...")
-    supported_status = dict(python_supported_versions())
-    supported_versions = set(supported_status.keys())
+        if len(deltas) <= 0:
+            console_print("No changes required.")
+            return 0
+
+        print_changes(deltas, venv_held=held)
+        print_venv_dependents(deltas, dependents)
+
+        if not dry_run:
+            journal.start(deltas, fingerprint=plan.fingerprint, options=plan.options)
+            execute_changes(deltas, journal, precompile=precompile)
+            if venv_policy == "rebuild":
+                rebuild_dependents(deltas, dependents)
+
+    return 0
 
-    available_versions = {
-        v for v in pyenv_available_versions() if v.prerelease == "" and v.build == ""
-    }
-    installed_versions = set(pyenv_installed_versions())
+
+def upgrade_root(  # noqa: PLR0913
+    keep_bugfix: bool = False,
+    remove_minor: bool = False,
+    dry_run: bool = False,
+    no_update: bool = False,
+    precompile: bool = False,
+    scrape: bool = False,
+    pinned_paths: Iterable[Path] = (),
+    venv_dirs: Iterable[Path] = (),
+    venv_policy: str = "flag",
+) -> int:
+    """Upgrade the current pyenv root."""
+    journal = Journal(pyenv_state_dir() / JOURNAL_NAME)
+    with RootLock(exclusive=not dry_run):
+        if resume_changes(
+            journal,
+            dry_run=dry_run,
+            precompile=precompile,
+            options=plan_options(keep_bugfix, remove_minor),
+        ):
+            return 0
+
+    with RootLock():
+        supported_status, available_versions, installed_versions = discover_versions(
+            update=not no_update,
+            scrape=scrape,
+            dry_run=dry_run,
+        )
+        protected = protected_versions(
+            pinned_paths,
+            installed_versions,
+            dry_run=dry_run,
+        )
+        venvs = scan_venvs(venv_dirs, dry_run=dry_run)
+        dependents = venv_dependents(venvs, installed_versions)
+    held = held_versions(dependents, venv_policy)
+    protected |= held
+    supported_versions = set(supported_status.keys())
 
     deltas = list(
         calculate_changes(
@@ -111,65 +320,846 @@ def cli_upgrade(
             installed_versions,
             keep_bugfix=keep_bugfix,
             remove_minor=remove_minor,
+            protected_versions=protected,
         ),
     )
 
-    print()
+    console_print()
     print_version_report(
         supported_status,
         available_versions,
         installed_versions,
     )
+    record_versions(
+        pyenv_root(),
+        supported_status,
+        available_versions,
+        installed_versions,
+        deltas,
+    )
 
     if len(deltas) <= 0:
         console_print("No changes required.")
         return 0
 
-    for ver, op in sorted(deltas, reverse=True):
-        if op is Op.INSTALL:
-            console_print(f"  + Install [install]{ver.fixed_width}[/install]")
-        elif op is Op.REMOVE:
-            console_print(f"  - Remove  [remove]{ver.fixed_width}[/remove]")
-        else:
-            raise ValueError(f"Unexpected Operation: {op!s}")
+    print_changes(deltas, venv_held=held)
+    print_venv_dependents(deltas, dependents)
 
     if not dry_run:
-        to_install = sorted(
-            (ver for ver, op in deltas if op is Op.INSTALL),
-            reverse=True,
+        plan = Plan(
+            deltas,
+            supported_status,
+            available_versions,
+            installed_versions,
+            keep_bugfix=keep_bugfix,
+            remove_minor=remove_minor,
+            protected_versions=protected,
+        )
+
+        with RootLock(exclusive=True):
+            # Another invocation may have made changes since discovery
+            deltas = plan.deltas_for(pyenv_installed_versions())
+            if len(deltas) <= 0:
+                console_print("No changes required.")
+                return 0
+
+            journal.start(deltas, fingerprint=plan.fingerprint, options=plan.options)
+            execute_changes(deltas, journal, precompile=precompile)
+            if venv_policy == "rebuild":
+                rebuild_dependents(deltas, dependents)
+
+    return 0
+
+
+def resume_root(
+    root: Path,
+    dry_run: bool = False,
+    precompile: bool = False,
+    options: Optional[Dict[str, Any]] = None,
+) -> bool:
+    """Resume an interrupted run in a pyenv root, if there is one."""
+    journal = Journal(pyenv_state_dir(root) / JOURNAL_NAME)
+    with RootLock(root, exclusive=not dry_run):
+        return resume_changes(
+            journal,
+            dry_run=dry_run,
+            root=root,
+            precompile=precompile,
+            options=options,
         )
-        to_remove = sorted(
-            (ver for ver, op in deltas if op is Op.REMOVE),
-            reverse=True,
+
+
+def update_roots(roots: Iterable[Path]) -> None:
+    """Update the pyenv checkout of each root, which may differ between roots."""
+    for root in roots:
+        console_print(f"Updating pyenv in {root!s}...")
+        with RootLock(root):
+            pyenv_update(root=root)
+
+
+def upgrade_roots(  # noqa: PLR0913
+    roots: List[Path],
+    jobs: int,
+    keep_bugfix: bool = False,
+    remove_minor: bool = False,
+    dry_run: bool = False,
+    no_update: bool = False,
+    precompile: bool = False,
+    scrape: bool = False,
+    pinned_paths: Iterable[Path] = (),
+    venv_dirs: Iterable[Path] = (),
+    venv_policy: str = "flag",
+) -> int:
+    """Upgrade several pyenv roots with a single discovery pass."""
+    pending = [
+        root
+        for root in roots
+        if not resume_root(
+            root,
+            dry_run=dry_run,
+            precompile=precompile,
+            options=plan_options(keep_bugfix, remove_minor),
+        )
+    ]
+    if not pending:
+        return 0
+
+    with RootLock(pending[0]):
+        supported_status, available_versions, installed_versions = discover_versions(
+            update=not no_update,
+            root=pending[0],
+            scrape=scrape,
+            dry_run=dry_run,
+        )
+        pins = (
+            scan_pins(pinned_paths, root=pending[0], dry_run=dry_run)
+            if pinned_paths
+            else set()
+        )
+
+    if not no_update:
+        update_roots(pending[1:])
+
+    plans = {}
+    dependents = {}
+    for root in pending:
+        with RootLock(root):
+            if root != pending[0]:
+                installed_versions = set(pyenv_installed_versions(root=root))
+            dependents[root] = venv_dependents(
+                scan_venvs(venv_dirs, root=root, dry_run=dry_run),
+                installed_versions,
+                root=root,
+            )
+        held = held_versions(dependents[root], venv_policy, root=root)
+        protected = pinned_versions(pins, installed_versions) | held
+
+        console_print(f"[bold]Root {root!s}[/bold]")
+        print_version_report(
+            supported_status,
+            available_versions,
+            installed_versions,
+        )
+
+        deltas = list(
+            calculate_changes(
+                supported_status.keys(),
+                available_versions,
+                installed_versions,
+                keep_bugfix=keep_bugfix,
+                remove_minor=remove_minor,
+                protected_versions=protected,
+            ),
+        )
+        record_versions(
+            root,
+            supported_status,
+            available_versions,
+            installed_versions,
+            deltas,
+        )
+
+        if len(deltas) <= 0:
+            console_print("No changes required.")
+            continue
+
+        print_changes(deltas, venv_held=held)
+        print_venv_dependents(deltas, dependents[root])
+        plans[root] = Plan(
+            deltas,
+            supported_status,
+            available_versions,
+            installed_versions,
+            keep_bugfix=keep_bugfix,
+            remove_minor=remove_minor,
+            protected_versions=protected,
+        )
+
+    if not plans or dry_run:
+        return 0
+
+    with ExitStack() as stack:
+        for root in sorted(plans):
+            stack.enter_context(RootLock(root, exclusive=True))
+
+        # Another invocation may have changed a root since it was planned
+        root_deltas = {
+            root: deltas
+            for root, plan in plans.items()
+            if (deltas := plan.deltas_for(pyenv_installed_versions(root=root)))
+        }
+
+        execute_batch(
+            root_deltas,
+            jobs=jobs,
+            precompile=precompile,
+            fingerprints={root: plan.fingerprint for root, plan in plans.items()},
+            options=plan_options(keep_bugfix, remove_minor),
+        )
+        if venv_policy == "rebuild":
+            for root, deltas in root_deltas.items():
+                rebuild_dependents(deltas, dependents[root], root=root)
+
+    return 0
+
+
+option_scrape = click.option(
+    "--scrape",
+    is_flag=True,
+    flag_value=True,
+    default=False,
+    type=bool,
+    help="Scrape python.org for support status instead of using release dates.",
+)
+
+option_precompile = click.option(
+    "--precompile",
+    is_flag=True,
+    flag_value=True,
+    default=False,
+    type=bool,
+    help="Compile the standard library of new versions to bytecode.",
+)
+
+
+@click.command(context_settings=CLICK_CONTEXT)
+@option_keep_bugfix
+@option_remove_minor
+@option_no_update
+@option_scrape
+@option_dry_run
+@option_precompile
+@option_protect_pinned
+@option_venv_dirs
+@option_venv_policy
+@click.option(
+    "--root",
+    "roots",
+    multiple=True,
+    type=click.Path(file_okay=False, path_type=Path),
+    help="Upgrade this pyenv root instead of the current one; may be repeated.",
+)
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Maximum number of simultaneous builds when upgrading several roots.",
+)
+@click.option(
+    "--metrics-file",
+    type=click.Path(dir_okay=False, writable=True, path_type=Path),
+    help="Write Prometheus metrics for node_exporter's textfile collector.",
+)
+@click.option("-v", "--verbose", count=True)
+def cli_upgrade(  # noqa: PLR0913
+    keep_bugfix: bool = False,
+    remove_minor: bool = False,
+    dry_run: bool = False,
+    no_update: bool = False,
+    scrape: bool = False,
+    precompile: bool = False,
+    pinned_paths: Tuple[Path, ...] = (),
+    venv_dirs: Tuple[Path, ...] = (),
+    venv_policy: str = "flag",
+    roots: Tuple[Path, ...] = (),
+    jobs: int = 1,
+    metrics_file: Optional[Path] = None,
+    verbose: int = 0,
+) -> int:
+    """Upgrade installed Python versions."""
+    args = locals().items()
+    setup_logging(verbose)
+    logger = logging.getLogger(__name__)
+    logger.debug("Running with options: %s", ", ".join(f"{k!s}={v!r}" for k, v in args))
+
+    try:
+        if roots:
+            result = upgrade_roots(
+                list(dict.fromkeys(r.resolve() for r in roots)),
+                jobs,
+                keep_bugfix=keep_bugfix,
+                remove_minor=remove_minor,
+                dry_run=dry_run,
+                no_update=no_update,
+                precompile=precompile,
+                scrape=scrape,
+                pinned_paths=pinned_paths,
+                venv_dirs=venv_dirs,
+                venv_policy=venv_policy,
+            )
+        else:
+            result = upgrade_root(
+                keep_bugfix=keep_bugfix,
+                remove_minor=remove_minor,
+                dry_run=dry_run,
+                no_update=no_update,
+                precompile=precompile,
+                scrape=scrape,
+                pinned_paths=pinned_paths,
+                venv_dirs=venv_dirs,
+                venv_policy=venv_policy,
+            )
+    except Exception:
+        if metrics_file is not None:
+            metrics.write(metrics_file, success=False)
+        raise
+
+    if metrics_file is not None:
+        for root in [r.resolve() for r in roots] or [pyenv_root()]:
+            record_root_size(root)
+        metrics.write(metrics_file, success=True)
+
+    return result
+
+
+@click.command(context_settings=CLICK_CONTEXT)
+@option_keep_bugfix
+@option_remove_minor
+@option_no_update
+@option_scrape
+@option_protect_pinned
+@option_venv_dirs
+@option_venv_policy
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(dir_okay=False, writable=True, path_type=Path),
+    required=True,
+    help="File to write the JSON plan to.",
+)
+@click.option(
+    "--daemon",
+    "use_daemon",
+    is_flag=True,
+    flag_value=True,
+    default=False,
+    type=bool,
+    help="Plan from a running daemon's results instead of discovering versions.",
+)
+@click.option("-v", "--verbose", count=True)
+def cli_plan(  # noqa: PLR0913
+    output: Path,
+    keep_bugfix: bool = False,
+    remove_minor: bool = False,
+    no_update: bool = False,
+    scrape: bool = False,
+    pinned_paths: Tuple[Path, ...] = (),
+    venv_dirs: Tuple[Path, ...] = (),
+    venv_policy: str = "flag",
+    use_daemon: bool = False,
+    verbose: int = 0,
+) -> int:
+    """Calculate the changes required and save them for `apply`."""
+    args = locals().items()
+    setup_logging(verbose)
+    logger = logging.getLogger(__name__)
+    logger.debug("Running with options: %s", ", ".join(f"{k!s}={v!r}" for k, v in args))
+
+    with RootLock():
+        dependents = venv_dependents(scan_venvs(venv_dirs), pyenv_installed_versions())
+        # The daemon resolves pins against the installed versions it holds
+        pins = scan_pins(pinned_paths) if use_daemon and pinned_paths else set()
+    held = held_versions(dependents, venv_policy)
+
+    daemon_plan = None
+    if use_daemon:
+        daemon_plan = query_daemon(
+            {
+                "command": "plan",
+                "keep_bugfix": keep_bugfix,
+                "remove_minor": remove_minor,
+                "pins": sorted(pins | {str(v) for v in held}),
+            },
+        )
+        if daemon_plan is None:
+            console_print("No daemon running, discovering versions...")
+
+    if daemon_plan is not None:
+        plan = daemon_plan
+    else:
+        plan = local_plan(
+            keep_bugfix=keep_bugfix,
+            remove_minor=remove_minor,
+            update=not no_update,
+            scrape=scrape,
+            pinned_paths=pinned_paths,
+            venv_held=held,
         )
 
-        for v in to_install:
-            console_print(f"Installing {v!s}...")
-            out = pyenv_install(v)
-            logger.debug(out)
-            break
+    print_changes(plan.deltas, venv_held=held)
+    print_venv_dependents(plan.deltas, dependents)
+    plan.dump(output)
+    console_print(f"Plan written to {output!s} ({plan.fingerprint[:12]})")
+    emit_event("plan", path=output, fingerprint=plan.fingerprint)
+
+    return 0
+
+
+@click.command(context_settings=CLICK_CONTEXT)
+@option_scrape
+@click.option(
+    "--no-daemon",
+    is_flag=True,
+    flag_value=True,
+    default=False,
+    type=bool,
+    help="Discover versions directly even if a daemon is running.",
+)
+@click.option("-v", "--verbose", count=True)
+def cli_status(
+    scrape: bool = False,
+    no_daemon: bool = False,
+    verbose: int = 0,
+) -> int:
+    """Report installed and outdated versions, using the daemon if running."""
+    args = locals().items()
+    setup_logging(verbose)
+    logger = logging.getLogger(__name__)
+    logger.debug("Running with options: %s", ", ".join(f"{k!s}={v!r}" for k, v in args))
+
+    plan = None if no_daemon else query_daemon({"command": "status"})
+    if plan is None:
+        plan = local_plan(update=False, scrape=scrape)
+
+    print_version_report(
+        plan.supported_status,
+        plan.latest_versions,
+        plan.installed_versions,
+    )
+
+    if len(plan.deltas) <= 0:
+        console_print("No changes required.")
+    else:
+        print_changes(plan.deltas)
+
+    return 0
+
+
+@click.command(context_settings=CLICK_CONTEXT)
+@option_scrape
+@click.option(
+    "--interval",
+    type=click.IntRange(min=1),
+    default=REFRESH_INTERVAL,
+    show_default=True,
+    help="Seconds between full refreshes of the supported and available versions.",
+)
+@click.option("-v", "--verbose", count=True)
+def cli_daemon(
+    scrape: bool = False,
+    interval: int = REFRESH_INTERVAL,
+    verbose: int = 0,
+) -> int:
+    """Keep discovery results warm and answer `status` and `plan` queries."""
+    args = locals().items()
+    setup_logging(verbose)
+    logger = logging.getLogger(__name__)
+    logger.debug("Running with options: %s", ", ".join(f"{k!s}={v!r}" for k, v in args))
+
+    console_print(f"Serving on {daemon_socket_path()!s}...")
+    with suppress(KeyboardInterrupt):
+        asyncio.run(serve(scrape=scrape, interval=interval))
+
+    return 0
+
+
+@click.command(context_settings=CLICK_CONTEXT)
+@click.argument(
+    "plan_file",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+)
+@option_dry_run
+@option_precompile
+@option_venv_dirs
+@option_venv_policy
+@click.option("-v", "--verbose", count=True)
+def cli_apply(  # noqa: PLR0913
+    plan_file: Path,
+    dry_run: bool = False,
+    precompile: bool = False,
+    venv_dirs: Tuple[Path, ...] = (),
+    venv_policy: str = "flag",
+    verbose: int = 0,
+) -> int:
+    """Execute a plan created by `plan` without re-running discovery."""
+    args = locals().items()
+    setup_logging(verbose)
+    logger = logging.getLogger(__name__)
+    logger.debug("Running with options: %s", ", ".join(f"{k!s}={v!r}" for k, v in args))
+
+    try:
+        plan = Plan.load(plan_file)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="PLAN_FILE") from e
+
+    return apply_plan(
+        plan,
+        dry_run=dry_run,
+        precompile=precompile,
+        venv_dirs=venv_dirs,
+        venv_policy=venv_policy,
+    )
+
+
+@click.command(context_settings=CLICK_CONTEXT)
+@click.option(
+    "--root",
+    "roots",
+    multiple=True,
+    type=click.Path(file_okay=False, path_type=Path),
+    help="Abandon the run in this pyenv root instead; may be repeated.",
+)
+@option_dry_run
+@click.option("-v", "--verbose", count=True)
+def cli_abandon(
+    roots: Tuple[Path, ...] = (),
+    dry_run: bool = False,
+    verbose: int = 0,
+) -> int:
+    """Discard an interrupted run instead of resuming it."""
+    args = locals().items()
+    setup_logging(verbose)
+    logger = logging.getLogger(__name__)
+    logger.debug("Running with options: %s", ", ".join(f"{k!s}={v!r}" for k, v in args))
+
+    for root in roots or (None,):
+        journal = Journal(pyenv_state_dir(root) / JOURNAL_NAME)
+        with RootLock(root, exclusive=not dry_run):
+            if abandon_changes(journal, dry_run=dry_run, root=root):
+                console_print(f"Abandoned interrupted run in {pyenv_root(root)!s}")
+            else:
+                console_print(f"No interrupted run in {pyenv_root(root)!s}")
+
+    return 0
+
+
+@click.command(context_settings=CLICK_CONTEXT)
+@click.argument("versions", nargs=-1, required=True)
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=0),
+    default=0,
+    show_default=True,
+    help="Number of compiler processes per version; 0 uses one per CPU.",
+)
+@click.option("-v", "--verbose", count=True)
+def cli_precompile(
+    versions: Tuple[str, ...],
+    jobs: int = 0,
+    verbose: int = 0,
+) -> int:
+    """Compile the standard library of installed versions to bytecode."""
+    args = locals().items()
+    setup_logging(verbose)
+    logger = logging.getLogger(__name__)
+    logger.debug("Running with options: %s", ", ".join(f"{k!s}={v!r}" for k, v in args))
+
+    try:
+        parsed = [parse_version(v) for v in versions]
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="VERSIONS") from e
+
+    with RootLock(exclusive=True):
+        for v in parsed:
+            try:
+                precompile_changes(v, jobs=jobs)
+            except FileNotFoundError as e:
+                raise click.ClickException(str(e)) from e
+
+    return 0
+
+
+@click.command(context_settings=CLICK_CONTEXT)
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=1),
+    default=os.cpu_count() or 1,
+    show_default=True,
+    help="Number of versions to scan, and files to hash, simultaneously.",
+)
+@click.option(
+    "--reflink",
+    is_flag=True,
+    flag_value=True,
+    default=False,
+    type=bool,
+    help="Use copy-on-write clones instead of hardlinks (btrfs, XFS).",
+)
+@click.option(
+    "--install-hook",
+    is_flag=True,
+    flag_value=True,
+    default=False,
+    type=bool,
+    help="Also deduplicate automatically after every pyenv install.",
+)
+@click.option(
+    "--remove-hook",
+    is_flag=True,
+    flag_value=True,
+    default=False,
+    type=bool,
+    help="Stop deduplicating automatically after pyenv installs.",
+)
+@option_dry_run
+@click.option("-v", "--verbose", count=True)
+def cli_dedupe(  # noqa: PLR0913
+    jobs: int = 1,
+    reflink: bool = False,
+    install_hook: bool = False,
+    remove_hook: bool = False,
+    dry_run: bool = False,
+    verbose: int = 0,
+) -> int:
+    """Link identical files across installed Python versions."""
+    args = locals().items()
+    setup_logging(verbose)
+    logger = logging.getLogger(__name__)
+    logger.debug("Running with options: %s", ", ".join(f"{k!s}={v!r}" for k, v in args))
+
+    if install_hook and remove_hook:
+        raise click.UsageError("--install-hook and --remove-hook are exclusive.")
+
+    if install_hook:
+        path = install_dedupe_hook(use_reflink=reflink)
+        console_print(f"Installed hook {path!s}")
+    elif remove_hook:
+        remove_dedupe_hook()
+        console_print("Removed hook")
+        return 0
+
+    console_print("Deduplicating installed versions...")
+    with RootLock(exclusive=not dry_run):
+        stats = dedupe_root(jobs=jobs, use_reflink=reflink, dry_run=dry_run)
+
+    console_print(
+        f"Scanned {stats.files} files, hashed {stats.hashed} "
+        f"({stats.cache_hits} cached), linked {stats.duplicates} duplicates "
+        f"saving {format_bytes(stats.bytes_saved)}.",
+    )
+
+    return 0
+
+
+@click.command(context_settings=CLICK_CONTEXT)
+@click.option(
+    "--update",
+    is_flag=True,
+    flag_value=True,
+    default=False,
+    type=bool,
+    help="Download the latest release-cycle data from the Python devguide.",
+)
+@click.option("-v", "--verbose", count=True)
+def cli_release_cycle(
+    update: bool = False,
+    verbose: int = 0,
+) -> int:
+    """Show the support status of each Python version from release dates."""
+    args = locals().items()
+    setup_logging(verbose)
+    logger = logging.getLogger(__name__)
+    logger.debug("Running with options: %s", ", ".join(f"{k!s}={v!r}" for k, v in args))
+
+    if update:
+        console_print("Updating release-cycle data...")
+        count = update_release_cycle()
+        console_print(f"  {count} Python versions written to {release_cycle_path()!s}")
+
+    for main, s in python_release_cycle_versions():
+        console_print(
+            f"  Python {main.main_format()} ([{s.value}]{s.value}[/{s.value}])",
+        )
+
+    return 0
+
+
+option_python = click.option(
+    "--python",
+    "-p",
+    "patterns",
+    multiple=True,
+    help="Only use installed versions matching this prefix; may be repeated.",
+)
+
+
+def selected_versions(patterns: Tuple[str, ...]) -> List[PyVer]:
+    """Installed versions to fan out to, failing if there are none."""
+    versions = select_versions(pyenv_installed_versions(), patterns)
+    if not versions:
+        raise click.ClickException("No matching versions are installed.")
+    return versions
+
+
+@click.command(
+    context_settings={**CLICK_CONTEXT, "allow_interspersed_args": False},
+)
+@click.argument("command", nargs=-1, required=True, type=click.UNPROCESSED)
+@option_python
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=1),
+    default=os.cpu_count() or 1,
+    show_default=True,
+    help="Maximum number of interpreters to run the command with at once.",
+)
+@click.option(
+    "--timeout",
+    type=click.FloatRange(min=0, min_open=True),
+    help="Give up on the command after this many seconds.",
+)
+@click.option("-v", "--verbose", count=True)
+def cli_exec(
+    command: Tuple[str, ...],
+    patterns: Tuple[str, ...] = (),
+    jobs: int = 1,
+    timeout: Optional[float] = None,
+    verbose: int = 0,
+) -> int:
+    """Run a command with each installed interpreter, e.g. `exec -- python -V`."""
+    args = locals().items()
+    setup_logging(verbose)
+    logger = logging.getLogger(__name__)
+    logger.debug("Running with options: %s", ", ".join(f"{k!s}={v!r}" for k, v in args))
+
+    # Only long enough to list the versions; the command may itself be pyenvtool
+    with RootLock():
+        versions = selected_versions(patterns)
+
+    results = run_in_versions(versions, command, jobs=jobs, timeout=timeout)
+
+    for r in results:
+        emit_event(
+            "exec",
+            version=str(r.version),
+            returncode=r.returncode,
+            seconds=r.seconds,
+            stdout=r.stdout,
+            stderr=r.stderr,
+        )
+
+        status = "[install]ok[/install]" if r.ok else "[remove]failed[/remove]"
+        console_print(f"{r.version!s}: {status} ({r.seconds:.1f}s)")
+        for output in (r.stdout, r.stderr):
+            if output:
+                console_print(output.rstrip("\n"), markup=False, highlight=False)
+
+    failed = [str(r.version) for r in results if not r.ok]
+    console_print(f"{len(results) - len(failed)} succeeded, {len(failed)} failed.")
+    if failed:
+        raise click.ClickException(f"Command failed with {', '.join(failed)}")
+
+    return 0
+
+
+@click.command(context_settings=CLICK_CONTEXT)
+@option_python
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Interpreters to benchmark at once; above 1, results will interfere.",
+)
+@click.option(
+    "--repeat",
+    type=click.IntRange(min=1),
+    default=BENCH_REPEAT,
+    show_default=True,
+    help="Number of timing runs per benchmark; the best is reported.",
+)
+@click.option("-v", "--verbose", count=True)
+def cli_bench(
+    patterns: Tuple[str, ...] = (),
+    jobs: int = 1,
+    repeat: int = BENCH_REPEAT,
+    verbose: int = 0,
+) -> int:
+    """Time a built-in suite of microbenchmarks on each installed interpreter."""
+    args = locals().items()
+    setup_logging(verbose)
+    logger = logging.getLogger(__name__)
+    logger.debug("Running with options: %s", ", ".join(f"{k!s}={v!r}" for k, v in args))
+
+    with RootLock():
+        versions = selected_versions(patterns)
+
+    console_print(f"Benchmarking {len(versions)} interpreters...")
+    results = run_in_versions(versions, bench_command(repeat=repeat), jobs=jobs)
+
+    timings = {r.version: parse_bench(r) for r in results}
+    for v, result in timings.items():
+        emit_event("bench", version=str(v), results=result)
+
+    table = Table(
+        title="Best time per loop (µs)",
+        title_style="bold",
+        header_style="bold",
+    )
+    table.add_column("Benchmark")
+    for v in versions:
+        table.add_column(str(v), justify="right")
 
-        for v in to_remove:
-            console_print(f"Removing {v!s}...")
-            pyenv_uninstall(v)
+    for name in BENCH_SUITE:
+        row = [(timings[v] or {}).get(name) for v in versions]
+        best = min((cell for cell in row if cell is not None), default=None)
 
-        main_versions = {v.main for v in pyenv_installed_versions()}
+        cells = []
+        for cell in row:
+            if cell is None:
+                cells.append("-")
+            elif cell == best:
+                cells.append(f"[install]{cell * 1e6:.1f}[/install]")
+            else:
+                cells.append(f"{cell * 1e6:.1f}")
+        table.add_row(name, *cells)
 
-        latest_versions: list[PyVer] = []
-        for main in main_versions:
-            installed = {v for v in installed_versions if v.main == main}
-            if installed:
-                latest_versions.append(
-                    max(installed),
-                )
-        latest_versions.sort(reverse=True)
+    console_print(table)
 
-        pyenv_set_shims(*latest_versions)
+    failed = [str(v) for v, result in timings.items() if result is None]
+    if failed:
+        raise click.ClickException(f"Benchmarks failed with {', '.join(failed)}")
 
     return 0
 
 
 cli_main.add_command(cli_upgrade, name="upgrade")
+cli_main.add_command(cli_plan, name="plan")
+cli_main.add_command(cli_apply, name="apply")
+cli_main.add_command(cli_abandon, name="abandon")
+cli_main.add_command(cli_dedupe, name="dedupe")
+cli_main.add_command(cli_precompile, name="precompile")
+cli_main.add_command(cli_release_cycle, name="release-cycle")
+cli_main.add_command(cli_status, name="status")
+cli_main.add_command(cli_daemon, name="daemon")
+cli_main.add_command(cli_exec, name="exec")
+cli_main.add_command(cli_bench, name="bench")
 
 if __name__ == "__main__":
     sys.exit(cli_main())
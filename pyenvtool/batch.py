@@ -0,0 +1,117 @@
+"""Upgrade several pyenv roots with shared discovery and builds."""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from pyenvtool import execute_changes, precompile_changes, record_operation
+from pyenvtool.cli import console_print
+from pyenvtool.fs import is_shared_build, link_tree
+from pyenvtool.journal import JOURNAL_NAME, Journal
+from pyenvtool.metrics import time_build
+from pyenvtool.pyenv import (
+    Op,
+    pyenv_rehash,
+    pyenv_state_dir,
+    pyenv_version_dir,
+)
+from pyenvtool.python import PyVer
+from pyenvtool.staging import finish_staged_install, staged_install
+
+RootDeltas = Dict[Path, List[Tuple[PyVer, Op]]]
+
+
+def batch_builds(root_deltas: RootDeltas) -> Dict[PyVer, List[Path]]:
+    """Group the versions to install by the roots that need them."""
+    builds: Dict[PyVer, List[Path]] = {}
+
+    for root, deltas in root_deltas.items():
+        for v, op in deltas:
+            if op is Op.INSTALL:
+                builds.setdefault(v, []).append(root)
+
+    return builds
+
+
+def execute_batch(
+    root_deltas: RootDeltas,
+    jobs: int = 1,
+    precompile: bool = False,
+    fingerprints: Optional[Dict[Path, str]] = None,
+    options: Optional[Dict[str, Any]] = None,
+) -> None:
+    """
+    Apply the changes for several roots.
+
+    Each distinct version is built once, in the first root that needs it, by
+    a pool of at most `jobs` workers. The finished build is then hardlinked
+    (or copied, across filesystems) into every other root that needs it,
+    unless it links against a shared `libpython`, in which case it is built
+    in each of them instead.
+    Removals and shims are handled per-root once every build has finished.
+    Precompiled bytecode is produced before linking, so it is shared too.
+    Each root's journal records its plan's fingerprint and the options.
+    """
+    logger = logging.getLogger(__name__)
+
+    journals = {
+        root: Journal(pyenv_state_dir(root) / JOURNAL_NAME) for root in root_deltas
+    }
+    for root, deltas in root_deltas.items():
+        journals[root].start(
+            deltas,
+            fingerprint=(fingerprints or {}).get(root),
+            options=options,
+        )
+
+    def build(v: PyVer, roots: List[Path]) -> None:
+        primary, *others = roots
+
+        console_print(f"Installing {v!s} in {primary!s}...")
+        with record_operation(
+            v,
+            Op.INSTALL,
+            journals[primary],
+            root=primary,
+        ), time_build(v, primary):
+            logger.debug(staged_install(v, root=primary))
+        finish_staged_install(root=primary)
+        if precompile:
+            precompile_changes(v, root=primary)
+
+        shared = is_shared_build(pyenv_version_dir(v, root=primary))
+        for other in others:
+            if shared:
+                console_print(f"Installing shared build {v!s} in {other!s}...")
+                with record_operation(
+                    v,
+                    Op.INSTALL,
+                    journals[other],
+                    root=other,
+                ), time_build(v, other):
+                    logger.debug(staged_install(v, root=other))
+                finish_staged_install(root=other)
+            else:
+                console_print(f"Linking {v!s} into {other!s}...")
+                with record_operation(v, Op.INSTALL, journals[other], root=other):
+                    link_tree(
+                        pyenv_version_dir(v, root=primary),
+                        pyenv_version_dir(v, root=other),
+                    )
+                pyenv_rehash(root=other)
+
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as pool:
+        futures = [
+            pool.submit(build, v, roots)
+            for v, roots in sorted(batch_builds(root_deltas).items(), reverse=True)
+        ]
+        for f in futures:
+            f.result()
+
+    for root, deltas in root_deltas.items():
+        execute_changes(
+            [(v, op) for v, op in deltas if op is not Op.INSTALL],
+            journals[root],
+            root=root,
+        )
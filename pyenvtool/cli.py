@@ -1,8 +1,13 @@
 """CLI-Related Code."""
 
+import json
 import logging
+import sys
+import threading
+import time
+from typing import Optional
 
-from rich.console import Console
+from rich.console import Console, RenderableType
 from rich.logging import RichHandler
 from rich.theme import Theme
 
@@ -12,6 +17,7 @@ RICH_THEME = Theme(
     {
         "install": "bold green",
         "remove": "bold red",
+        "keep": "bold cyan",
         "bugfix": "bold green",
         "security": "bold yellow",
         "unsupported": "bold red",
@@ -22,13 +28,65 @@ RICH_THEME = Theme(
     inherit=False,
 )
 
-console_print = Console(theme=RICH_THEME).print
+OUTPUT_FORMATS = ("text", "ndjson")
+
+_console = Console(theme=RICH_THEME)
+_log_console = Console(theme=RICH_THEME, stderr=True)
+_output_format = "text"
+_emit_lock = threading.Lock()
+
+
+def set_output_format(output_format: str) -> None:
+    """
+    Choose between Rich-formatted text and a stream of NDJSON events.
+
+    In `ndjson` mode `console_print` does nothing and each `emit_event` writes
+    one JSON object per line to stdout; in `text` mode the reverse is true.
+    """
+    global _output_format  # noqa: PLW0603
+
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format: {output_format!r}")
+    _output_format = output_format
+
+
+def console_print(
+    *objects: RenderableType,
+    markup: Optional[bool] = None,
+    highlight: Optional[bool] = None,
+) -> None:
+    """Print Rich-formatted text, unless events are being streamed instead."""
+    if _output_format == "text":
+        _console.print(*objects, markup=markup, highlight=highlight)
+
+
+def emit_event(event: str, **fields: object) -> None:
+    """Write a single machine-readable event, if events are being streamed."""
+    if _output_format != "ndjson":
+        return
+
+    line = json.dumps({"event": event, "time": time.time(), **fields}, default=str)
+    with _emit_lock:
+        sys.stdout.write(line + "\n")
+        sys.stdout.flush()
+
+
+def format_bytes(n: float) -> str:
+    """Human-readable representation of a size in bytes."""
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if abs(n) < 1024:  # noqa: PLR2004
+            return f"{n:.1f} {unit}" if unit != "B" else f"{n:.0f} {unit}"
+        n /= 1024
+    return f"{n:.1f} TiB"
 
 
 def setup_logging(verbosity: int = 0, force: bool = False) -> None:
     """
     Set up a root logger with console output.
 
+    Log records go to stderr, so they never mix with the events streamed to
+    stdout in `ndjson` mode.
+
     Args:
         verbosity (int, optional): The logging level; 0=Error, 1=Warning,
             2=Info, 3+=Debug. Defaults to 0.
@@ -50,7 +108,7 @@ def setup_logging(verbosity: int = 0, force: bool = False) -> None:
             level=logging_level,
             format="%(message)s",
             datefmt="[%x]",
-            handlers=[RichHandler(rich_tracebacks=True)],
+            handlers=[RichHandler(console=_log_console, rich_tracebacks=True)],
         )
         logger = logging.getLogger(__name__)
         logger.info(f"Logging Setup at {logging.getLevelName(logging_level)} level")
@@ -0,0 +1,304 @@
+"""Resident daemon keeping discovery results warm for fast queries."""
+
+import asyncio
+import ctypes
+import ctypes.util
+import json
+import logging
+import os
+import socket
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Set
+
+from pyenvtool import calculate_changes
+from pyenvtool.pins import pinned_versions
+from pyenvtool.plan import Plan
+from pyenvtool.pyenv import (
+    pyenv_available_versions_async,
+    pyenv_installed_versions_async,
+    pyenv_root,
+    pyenv_state_dir,
+)
+from pyenvtool.python import PyVer, VersionStatus, python_supported_versions_async
+from pyenvtool.releases import python_release_cycle_versions
+
+SOCKET_NAME = "daemon.sock"
+
+# Seconds between full refreshes, and between checks of the versions
+# directory when inotify is unavailable
+REFRESH_INTERVAL = 3600
+POLL_INTERVAL = 5
+
+# Seconds a client waits for the daemon before falling back
+CLIENT_TIMEOUT = 2.0
+
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+
+
+def daemon_socket_path(root: Optional[Path] = None) -> Path:
+    """Location of the daemon's socket for a pyenv root."""
+    return pyenv_state_dir(root) / SOCKET_NAME
+
+
+class DaemonState:
+    """The discovery results held in memory by the daemon."""
+
+    def __init__(self, scrape: bool = False) -> None:
+        self.scrape = scrape
+        self.supported_status: Dict[PyVer, VersionStatus] = {}
+        self.available_versions: Set[PyVer] = set()
+        self.installed_versions: Set[PyVer] = set()
+        self.refreshed = 0.0
+
+    async def refresh(self) -> None:
+        """Rediscover the supported, available, and installed versions."""
+        logger = logging.getLogger(__name__)
+        logger.info("Refreshing supported and available versions")
+
+        if self.scrape:
+            self.supported_status = dict(await python_supported_versions_async())
+        else:
+            self.supported_status = dict(
+                await asyncio.to_thread(lambda: list(python_release_cycle_versions())),
+            )
+
+        self.available_versions = {
+            v
+            for v in await pyenv_available_versions_async()
+            if v.prerelease == "" and v.build == ""
+        }
+        await self.refresh_installed()
+
+    async def refresh_installed(self) -> None:
+        """Rediscover the installed versions."""
+        logger = logging.getLogger(__name__)
+        logger.info("Refreshing installed versions")
+
+        self.installed_versions = set(await pyenv_installed_versions_async())
+        self.refreshed = time.time()
+
+    def plan(
+        self,
+        keep_bugfix: bool = False,
+        remove_minor: bool = False,
+        pins: Iterable[str] = (),
+    ) -> Plan:
+        """Calculate the changes required from the current state."""
+        protected = pinned_versions(pins, self.installed_versions)
+
+        return Plan(
+            calculate_changes(
+                self.supported_status.keys(),
+                self.available_versions,
+                self.installed_versions,
+                keep_bugfix=keep_bugfix,
+                remove_minor=remove_minor,
+                protected_versions=protected,
+            ),
+            self.supported_status,
+            self.available_versions,
+            self.installed_versions,
+            keep_bugfix=keep_bugfix,
+            remove_minor=remove_minor,
+            protected_versions=protected,
+        )
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Answer a single client request."""
+        command = request.get("command")
+
+        if command == "status":
+            return {"refreshed": self.refreshed, **self.plan().to_dict()}
+
+        if command == "plan":
+            return self.plan(
+                keep_bugfix=bool(request.get("keep_bugfix", False)),
+                remove_minor=bool(request.get("remove_minor", False)),
+                pins=[str(p) for p in request.get("pins", [])],
+            ).to_dict()
+
+        return {"error": f"Unknown command: {command!r}"}
+
+
+def _inotify_fd(path: Path) -> Optional[int]:
+    """Watch a directory for entries being added or removed, if supported."""
+    libc_name = ctypes.util.find_library("c")
+    if libc_name is None:
+        return None
+
+    try:
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+    except AttributeError:
+        return None
+    if fd < 0:
+        return None
+
+    mask = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO
+    if libc.inotify_add_watch(fd, os.fsencode(path), mask) < 0:
+        os.close(fd)
+        return None
+
+    return fd
+
+
+async def _refresh_installed(state: DaemonState) -> None:
+    logger = logging.getLogger(__name__)
+
+    try:
+        await state.refresh_installed()
+    except Exception:
+        logger.exception("Refreshing installed versions failed")
+
+
+async def _watch_versions(state: DaemonState, versions_dir: Path) -> None:
+    """Refresh the installed versions whenever the versions directory changes."""
+    logger = logging.getLogger(__name__)
+    loop = asyncio.get_running_loop()
+    changed = asyncio.Event()
+
+    fd = _inotify_fd(versions_dir)
+    if fd is not None:
+        logger.info(f"Watching {versions_dir!s} with inotify")
+
+        def on_event() -> None:
+            try:
+                while os.read(fd, 4096):
+                    pass
+            except BlockingIOError:
+                pass
+            changed.set()
+
+        loop.add_reader(fd, on_event)
+
+        try:
+            while True:
+                await changed.wait()
+                # Let a burst of events (such as an install) settle
+                await asyncio.sleep(0.5)
+                changed.clear()
+                await _refresh_installed(state)
+        finally:
+            loop.remove_reader(fd)
+            os.close(fd)
+
+    logger.info(f"Polling {versions_dir!s} every {POLL_INTERVAL}s")
+    mtime = versions_dir.stat().st_mtime_ns if versions_dir.exists() else 0
+    while True:
+        await asyncio.sleep(POLL_INTERVAL)
+        current = versions_dir.stat().st_mtime_ns if versions_dir.exists() else 0
+        if current != mtime:
+            mtime = current
+            await _refresh_installed(state)
+
+
+async def _refresh_periodically(state: DaemonState, interval: float) -> None:
+    logger = logging.getLogger(__name__)
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await state.refresh()
+        except Exception:
+            logger.exception("Background refresh failed")
+
+
+async def serve(
+    scrape: bool = False,
+    interval: float = REFRESH_INTERVAL,
+    root: Optional[Path] = None,
+) -> None:
+    """Run the daemon until cancelled."""
+    logger = logging.getLogger(__name__)
+    path = daemon_socket_path(root)
+    versions_dir = pyenv_root(root) / "versions"
+
+    state = DaemonState(scrape=scrape)
+    await state.refresh()
+
+    async def handle_client(
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        try:
+            line = await reader.readline()
+            try:
+                response = state.handle(json.loads(line))
+            except (json.JSONDecodeError, AttributeError) as e:
+                response = {"error": f"Invalid request: {e!s}"}
+            writer.write(json.dumps(response).encode("utf-8") + b"\n")
+            await writer.drain()
+        finally:
+            writer.close()
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.unlink(missing_ok=True)
+    server = await asyncio.start_unix_server(handle_client, path=str(path))
+    logger.info(f"Listening on {path!s}")
+
+    tasks = [
+        asyncio.create_task(_watch_versions(state, versions_dir)),
+        asyncio.create_task(_refresh_periodically(state, interval)),
+    ]
+
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        for task in tasks:
+            task.cancel()
+        path.unlink(missing_ok=True)
+
+
+def daemon_request(
+    request: Dict[str, Any],
+    root: Optional[Path] = None,
+    timeout: float = CLIENT_TIMEOUT,
+) -> Optional[Dict[str, Any]]:
+    """
+    Send a request to a running daemon.
+
+    Returns `None` if no daemon is running for the root, or it doesn't send a
+    valid reply, so the caller can fall back to discovering versions itself.
+    Raises `ValueError` if the daemon rejects the request.
+    """
+    logger = logging.getLogger(__name__)
+    path = daemon_socket_path(root)
+    if not path.exists():
+        return None
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(str(path))
+            sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+
+            data = b""
+            while not data.endswith(b"\n"):
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                data += chunk
+    except OSError as e:
+        logger.info(f"Daemon not available at {path!s}: {e!s}")
+        return None
+
+    try:
+        response = json.loads(data)
+    except json.JSONDecodeError as e:
+        logger.warning(f"Ignoring invalid reply from daemon at {path!s}: {e!s}")
+        return None
+    if not isinstance(response, dict):
+        logger.warning(f"Ignoring invalid reply from daemon at {path!s}")
+        return None
+
+    if "error" in response:
+        raise ValueError(f"Daemon error: {response['error']}")
+
+    return response
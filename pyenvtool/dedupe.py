@@ -0,0 +1,298 @@
+"""Replace identical files across installed versions with links."""
+
+import hashlib
+import json
+import logging
+import os
+import shlex
+import shutil
+import stat
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from pyenvtool.pyenv import pyenv_root, pyenv_state_dir
+
+CACHE_NAME = "dedupe-cache.json"
+HOOK_NAME = "pyenvtool-dedupe.bash"
+HASH_CHUNK_SIZE = 1024 * 1024
+FICLONE = 0x40049409
+
+Bucket = Tuple[int, int, int, int, int]
+
+
+class FileInfo(NamedTuple):
+    """The parts of a file's metadata relevant to deduplication."""
+
+    path: str
+    dev: int
+    ino: int
+    size: int
+    mtime_ns: int
+    mode: int
+    uid: int
+    gid: int
+
+    @property
+    def bucket(self) -> Bucket:
+        """Files can only be linked if they share all of these attributes."""
+        return (self.dev, self.size, self.mode, self.uid, self.gid)
+
+    @property
+    def cache_key(self) -> str:
+        """Key identifying the underlying inode."""
+        return f"{self.dev}:{self.ino}"
+
+
+class DedupeStats:
+    """Counters describing a deduplication run."""
+
+    def __init__(self) -> None:
+        self.files = 0
+        self.hashed = 0
+        self.cache_hits = 0
+        self.duplicates = 0
+        self.bytes_saved = 0
+
+
+class HashCache:
+    """
+    Persistent cache of file digests.
+
+    Entries are keyed by inode and validated against the modification time and
+    size, so only new or changed files are hashed on a rerun.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.entries: Dict[str, Tuple[int, int, str]] = {}
+
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            self.entries = {k: (v[0], v[1], v[2]) for k, v in data.items()}
+        except (FileNotFoundError, json.JSONDecodeError, IndexError, TypeError):
+            pass
+
+    def get(self, info: FileInfo) -> Optional[str]:
+        """Return the cached digest of a file, if still valid."""
+        entry = self.entries.get(info.cache_key)
+        if entry is None or entry[:2] != (info.mtime_ns, info.size):
+            return None
+        return entry[2]
+
+    def put(self, info: FileInfo, digest: str) -> None:
+        """Record the digest of a file."""
+        self.entries[info.cache_key] = (info.mtime_ns, info.size, digest)
+
+    def retain(self, keys: Set[str]) -> None:
+        """Drop entries for inodes which no longer exist."""
+        self.entries = {k: v for k, v in self.entries.items() if k in keys}
+
+    def save(self) -> None:
+        """Write the cache to disk atomically."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.entries), encoding="utf-8")
+        tmp.replace(self.path)
+
+
+def scan_tree(top: Path) -> Iterator[FileInfo]:
+    """Find every regular file in a tree, without following symlinks."""
+    for dirpath, _, filenames in os.walk(top):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            st = os.lstat(path)
+            if not stat.S_ISREG(st.st_mode):
+                continue
+
+            yield FileInfo(
+                path,
+                st.st_dev,
+                st.st_ino,
+                st.st_size,
+                st.st_mtime_ns,
+                st.st_mode,
+                st.st_uid,
+                st.st_gid,
+            )
+
+
+def hash_file(path: str) -> str:
+    """Digest of a file's contents, read in chunks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def reflink(src: str, dst: str) -> None:
+    """Create `dst` as a copy-on-write clone of `src`, if supported."""
+    import fcntl
+
+    with open(src, "rb") as fs, open(dst, "wb") as fd:
+        fcntl.ioctl(fd.fileno(), FICLONE, fs.fileno())
+
+
+def replace_with_link(keep: FileInfo, dup: FileInfo, use_reflink: bool) -> None:
+    """Atomically replace a duplicate file with a link to the kept copy."""
+    tmp = dup.path + ".pyenvtool-tmp"
+
+    try:
+        if use_reflink:
+            reflink(keep.path, tmp)
+            shutil.copystat(dup.path, tmp)
+        else:
+            os.link(keep.path, tmp)
+        os.replace(tmp, dup.path)
+    except OSError:
+        if os.path.lexists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def dedupe_versions(  # noqa: C901
+    versions_dir: Path,
+    cache: HashCache,
+    jobs: int = 1,
+    use_reflink: bool = False,
+    dry_run: bool = False,
+) -> DedupeStats:
+    """
+    Link identical files across all installed versions.
+
+    Files are grouped by size and metadata, then only files sharing a group
+    are hashed. Each installed version is scanned, and files are hashed, in a
+    pool of `jobs` workers.
+    """
+    logger = logging.getLogger(__name__)
+    stats = DedupeStats()
+
+    tops = [p for p in versions_dir.iterdir() if p.is_dir() and not p.is_symlink()]
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as pool:
+        found = pool.map(lambda t: list(scan_tree(t)), tops)
+        infos = [i for f in found for i in f]
+    stats.files = len(infos)
+    cache.retain({i.cache_key for i in infos})
+
+    buckets: Dict[Bucket, Dict[int, List[FileInfo]]] = {}
+    for info in infos:
+        if info.size > 0:
+            buckets.setdefault(info.bucket, {}).setdefault(info.ino, []).append(info)
+
+    # Only one path per inode needs hashing, and only in buckets with more
+    # than one inode
+    candidates = [
+        inodes[ino][0]
+        for inodes in buckets.values()
+        if len(inodes) > 1
+        for ino in inodes
+    ]
+
+    def digest(info: FileInfo) -> Tuple[FileInfo, str, bool]:
+        cached = cache.get(info)
+        if cached is not None:
+            return info, cached, True
+        return info, hash_file(info.path), False
+
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as pool:
+        digests = list(pool.map(digest, candidates))
+
+    groups: Dict[Tuple[Bucket, str], List[FileInfo]] = {}
+    for info, d, hit in digests:
+        if hit:
+            stats.cache_hits += 1
+        else:
+            stats.hashed += 1
+            cache.put(info, d)
+        groups.setdefault((info.bucket, d), []).append(info)
+
+    for (bucket, _), members in groups.items():
+        if len(members) < 2:  # noqa: PLR2004
+            continue
+
+        # Keep the inode which already has the most names
+        members.sort(key=lambda i: -len(buckets[bucket][i.ino]))
+        keep = members[0]
+
+        for dup in members[1:]:
+            for path_info in buckets[bucket][dup.ino]:
+                logger.debug(f"Linking {path_info.path} -> {keep.path}")
+                stats.duplicates += 1
+                if not dry_run:
+                    replace_with_link(keep, path_info, use_reflink)
+            stats.bytes_saved += dup.size
+
+    return stats
+
+
+def dedupe_root(
+    root: Optional[Path] = None,
+    jobs: int = 1,
+    use_reflink: bool = False,
+    dry_run: bool = False,
+) -> DedupeStats:
+    """Deduplicate the installed versions of a pyenv root, using its cache."""
+    cache = HashCache(pyenv_state_dir(root) / CACHE_NAME)
+    stats = dedupe_versions(
+        pyenv_root(root) / "versions",
+        cache,
+        jobs=jobs,
+        use_reflink=use_reflink,
+        dry_run=dry_run,
+    )
+    if not dry_run:
+        cache.save()
+    return stats
+
+
+def dedupe_hook_path(root: Optional[Path] = None) -> Path:
+    """Location of the pyenv install hook which runs `dedupe`."""
+    return pyenv_root(root) / "pyenv.d" / "install" / HOOK_NAME
+
+
+def install_dedupe_hook(root: Optional[Path] = None, use_reflink: bool = False) -> Path:
+    """Register a pyenv hook which deduplicates after every successful install."""
+    cmd = [sys.executable, "-m", "pyenvtool", "dedupe"]
+    if use_reflink:
+        cmd.append("--reflink")
+
+    path = dedupe_hook_path(root)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        "# Installed by pyenvtool; remove with `pyenvtool dedupe --remove-hook`\n"
+        "pyenvtool_dedupe() {\n"
+        '  [ "$STATUS" = 0 ] && [ -z "$PYENVTOOL_STAGING" ] &&\n'
+        f"    {shlex.join(cmd)} >/dev/null 2>&1\n"
+        "  return 0\n"
+        "}\n"
+        "after_install pyenvtool_dedupe\n",
+        encoding="utf-8",
+    )
+    return path
+
+
+def run_dedupe_hook(root: Optional[Path] = None) -> None:
+    """
+    Run the hook registered by `install_dedupe_hook`, if there is one.
+
+    Staged installs skip the hook while building, as it would only see the
+    staging root, and call this once the new version is in the live root.
+    """
+    path = dedupe_hook_path(root)
+    if not path.is_file():
+        return
+
+    script = 'after_install() { :; }; . "$1" && STATUS=0 pyenvtool_dedupe'
+    subprocess.run(
+        ["bash", "-c", script, "bash", str(path)],
+        env={**os.environ, "PYENV_ROOT": str(pyenv_root(root))},
+        check=False,
+    )
+
+
+def remove_dedupe_hook(root: Optional[Path] = None) -> None:
+    """Remove the hook registered by `install_dedupe_hook`."""
+    dedupe_hook_path(root).unlink(missing_ok=True)
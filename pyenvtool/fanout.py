@@ -0,0 +1,182 @@
+"""Run commands and benchmarks against every installed interpreter."""
+
+import json
+import logging
+import os
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from pyenvtool.pyenv import pyenv_version_dir
+from pyenvtool.python import PyVer
+
+# Each benchmark is a `(setup, statement)` pair for `timeit`, written to run
+# unchanged on every supported interpreter and implementation
+BENCH_SUITE: Dict[str, Tuple[str, str]] = {
+    "int_arith": ("", "sum(i * i for i in range(1000))"),
+    "float_arith": ("x = 0.0", "for i in range(1000): x += i * 0.5"),
+    "str_join": ("", "'-'.join(str(i) for i in range(1000))"),
+    "list_sort": (
+        "import random\nr = random.Random(0)\ndata = [r.random() for _ in range(1000)]",
+        "sorted(data)",
+    ),
+    "dict_ops": (
+        "d = {}",
+        "for i in range(1000): d[i] = i\nfor i in range(1000): del d[i]",
+    ),
+    "call": ("def f(a, b): return a + b", "for i in range(1000): f(i, i)"),
+    "regex": (
+        "import re; p = re.compile(r'(\\w+)@(\\w+)'); s = 'me@example.com ' * 100",
+        "p.findall(s)",
+    ),
+    "json": (
+        "import json; doc = {'a': list(range(100)), 'b': {'c': 'd' * 100}}",
+        "json.loads(json.dumps(doc))",
+    ),
+}
+
+# Run by each interpreter with the suite and repeat count as arguments; prints
+# the best time per loop of each benchmark, in seconds, as JSON
+BENCH_SCRIPT = """\
+import json, sys, timeit
+results = {}
+for name, (setup, stmt) in json.loads(sys.argv[1]).items():
+    timer = timeit.Timer(stmt, setup)
+    number, _ = timer.autorange()
+    times = timer.repeat(repeat=int(sys.argv[2]), number=number)
+    results[name] = min(times) / number
+print(json.dumps(results))
+"""
+
+BENCH_REPEAT = 5
+
+
+class ExecResult(NamedTuple):
+    """Outcome of running a command against one interpreter."""
+
+    version: PyVer
+    returncode: int
+    stdout: str
+    stderr: str
+    seconds: float
+
+    @property
+    def ok(self) -> bool:
+        """Whether the command succeeded."""
+        return self.returncode == 0
+
+
+def select_versions(
+    installed: Iterable[PyVer],
+    patterns: Sequence[str] = (),
+) -> List[PyVer]:
+    """
+    Installed versions matching any of some version prefixes, newest first.
+
+    A pattern such as `3.11` matches `3.11` itself and every version it
+    prefixes, as with pins; no patterns selects every installed version.
+    """
+    return sorted(
+        (
+            v
+            for v in installed
+            if not patterns
+            or any(
+                str(v) == p or str(v).startswith((f"{p}.", f"{p}-")) for p in patterns
+            )
+        ),
+        reverse=True,
+    )
+
+
+def interpreter_env(v: PyVer, root: Optional[Path] = None) -> Dict[str, str]:
+    """
+    Environment in which `python` and its tools are those of one version.
+
+    The version's `bin` directory is put first on the `PATH`, and
+    `PYENV_VERSION` is set so pyenv shims resolve to it as well.
+    """
+    bin_dir = pyenv_version_dir(v, root=root) / "bin"
+    path = os.environ.get("PATH", "")
+    return {
+        **os.environ,
+        "PATH": os.pathsep.join(filter(None, [str(bin_dir), path])),
+        "PYENV_VERSION": str(v),
+    }
+
+
+def run_in_version(
+    v: PyVer,
+    cmd: Sequence[str],
+    root: Optional[Path] = None,
+    timeout: Optional[float] = None,
+) -> ExecResult:
+    """Run a command with one interpreter selected, capturing its output."""
+    logger = logging.getLogger(__name__)
+    logger.info(f"Executing with {v!s}: " + " ".join(cmd))
+
+    start = time.monotonic()
+    try:
+        ps = subprocess.run(
+            list(cmd),
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            env=interpreter_env(v, root=root),
+            timeout=timeout,
+            check=False,
+        )
+    except FileNotFoundError as e:
+        return ExecResult(v, 127, "", str(e), time.monotonic() - start)
+    except subprocess.TimeoutExpired:
+        stderr = f"Timed out after {timeout}s"
+        return ExecResult(v, -1, "", stderr, time.monotonic() - start)
+
+    return ExecResult(v, ps.returncode, ps.stdout, ps.stderr, time.monotonic() - start)
+
+
+def run_in_versions(
+    versions: Iterable[PyVer],
+    cmd: Sequence[str],
+    root: Optional[Path] = None,
+    jobs: Optional[int] = None,
+    timeout: Optional[float] = None,
+) -> List[ExecResult]:
+    """
+    Run a command against several interpreters, at most `jobs` at a time.
+
+    Results are returned in the same order as the versions.
+    """
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        return list(
+            pool.map(
+                lambda v: run_in_version(v, cmd, root=root, timeout=timeout),
+                versions,
+            ),
+        )
+
+
+def bench_command(
+    suite: Dict[str, Tuple[str, str]] = BENCH_SUITE,
+    repeat: int = BENCH_REPEAT,
+) -> List[str]:
+    """Command which runs a benchmark suite with the selected interpreter."""
+    return ["python", "-c", BENCH_SCRIPT, json.dumps(suite), str(repeat)]
+
+
+def parse_bench(result: ExecResult) -> Optional[Dict[str, float]]:
+    """Parse the timings from a benchmark run, or `None` if it failed."""
+    logger = logging.getLogger(__name__)
+
+    if not result.ok:
+        logger.warning(f"Benchmarks failed on {result.version!s}: {result.stderr}")
+        return None
+
+    try:
+        return json.loads(result.stdout.strip().splitlines()[-1])
+    except (IndexError, json.JSONDecodeError):
+        logger.warning(f"Unexpected benchmark output from {result.version!s}")
+        return None
@@ -0,0 +1,163 @@
+"""Filesystem helpers for manipulating installed version trees."""
+
+import ctypes
+import errno
+import logging
+import os
+import shutil
+import stat
+from pathlib import Path
+
+# Files larger than this are assumed to be binaries and never rewritten.
+PREFIX_MAX_SIZE = 1024 * 1024
+
+# Files python-build writes the installation prefix into: scripts, pkg-config
+# files, and the `sysconfig` data and Makefile used to build extensions
+PREFIX_FILES = (
+    "bin/*",
+    "lib/pkgconfig/*.pc",
+    "lib/python*/_sysconfigdata_*.py",
+    "lib/python*/_sysconfig_vars_*.json",
+    "lib/python*/build-details.json",
+    "lib/python*/config-*/Makefile",
+)
+
+# From <linux/fcntl.h> and <linux/fs.h>
+AT_FDCWD = -100
+RENAME_EXCHANGE = 1 << 1
+
+# Errors meaning the platform or filesystem can't exchange paths atomically
+EXCHANGE_UNSUPPORTED = (errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP)
+
+
+def link_or_copy(src: str, dst: str) -> None:
+    """Hardlink a file, falling back to a copy across filesystems."""
+    try:
+        os.link(src, dst)
+    except OSError as e:
+        if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+            raise
+        shutil.copy2(src, dst)
+
+
+def relocate_prefix(tree: Path, old: Path, new: Path) -> int:
+    """
+    Rewrite references to an old installation prefix in text files.
+
+    Only the files python-build writes the prefix into are checked (see
+    `PREFIX_FILES`), and binaries among them are left alone. Rewritten files
+    are replaced rather than modified, so hardlinks to the original are left
+    untouched, and get a new mtime, so bytecode compiled from them is
+    invalidated. Returns the number of files rewritten.
+    """
+    logger = logging.getLogger(__name__)
+    old_b = str(old).encode()
+    new_b = str(new).encode()
+    count = 0
+
+    for path in (p for pattern in PREFIX_FILES for p in tree.glob(pattern)):
+        st = path.lstat()
+        if not stat.S_ISREG(st.st_mode) or st.st_size > PREFIX_MAX_SIZE:
+            continue
+
+        data = path.read_bytes()
+        if b"\0" in data or old_b not in data:
+            continue
+
+        logger.debug(f"Relocating prefix in {path!s}")
+        tmp = path.with_name(path.name + ".pyenvtool-tmp")
+        tmp.write_bytes(data.replace(old_b, new_b))
+        shutil.copymode(path, tmp)
+        tmp.replace(path)
+        count += 1
+
+    return count
+
+
+def is_shared_build(tree: Path) -> bool:
+    """
+    Check whether an installed version links against a shared `libpython`.
+
+    Its interpreter finds the library through an rpath pointing at the prefix
+    it was built for, which can't be rewritten like a text file.
+    """
+    return any((tree / "lib").glob("libpython*.so*")) or any(
+        (tree / "lib").glob("libpython*.dylib"),
+    )
+
+
+def link_tree(src: Path, dst: Path) -> None:
+    """
+    Copy an installed version tree to a new prefix, hardlinking where possible.
+
+    The tree is assembled next to its destination and swapped into place, so
+    the destination never holds a partial copy. Shared builds would still
+    load `libpython` from the source prefix, so they are refused with a
+    `ValueError`.
+    """
+    if is_shared_build(src):
+        raise ValueError(f"{src!s} is a shared build and can't be relocated")
+
+    tmp = dst.with_name(f".{dst.name}.pyenvtool-tmp")
+    if tmp.exists():
+        shutil.rmtree(tmp)
+
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copytree(src, tmp, symlinks=True, copy_function=link_or_copy)
+    relocate_prefix(tmp, src, dst)
+
+    if swap_tree(tmp, dst):
+        shutil.rmtree(tmp)
+
+
+def exchange_paths(a: Path, b: Path) -> None:
+    """
+    Atomically swap two paths with `renameat2(RENAME_EXCHANGE)`.
+
+    Raises an `OSError` with `ENOSYS` if the C library doesn't provide it.
+    """
+    libc = ctypes.CDLL(None, use_errno=True)
+    renameat2 = getattr(libc, "renameat2", None)
+    if renameat2 is None:
+        raise OSError(errno.ENOSYS, "renameat2 is not available")
+
+    renameat2.argtypes = [
+        ctypes.c_int,
+        ctypes.c_char_p,
+        ctypes.c_int,
+        ctypes.c_char_p,
+        ctypes.c_uint,
+    ]
+    if renameat2(AT_FDCWD, os.fsencode(a), AT_FDCWD, os.fsencode(b), RENAME_EXCHANGE):
+        e = ctypes.get_errno()
+        raise OSError(e, os.strerror(e), str(a), None, str(b))
+
+
+def swap_tree(src: Path, dst: Path) -> bool:
+    """
+    Move a tree into place, swapping it with any tree already there.
+
+    If `dst` exists, the trees are exchanged with a single atomic rename where
+    the platform supports it; otherwise the old tree is renamed aside first,
+    so `dst` is briefly missing. Either way the old tree ends up at `src`.
+    Returns whether an old tree was replaced.
+    """
+    logger = logging.getLogger(__name__)
+
+    if not dst.exists():
+        src.rename(dst)
+        return False
+
+    try:
+        exchange_paths(src, dst)
+    except OSError as e:
+        if e.errno not in EXCHANGE_UNSUPPORTED:
+            raise
+
+        logger.info(f"Can't exchange {dst!s} atomically ({e!s}), renaming")
+        aside = src.with_name(f".{src.name}.pyenvtool-old")
+        dst.rename(aside)
+        src.rename(dst)
+        aside.rename(src)
+
+    return True
@@ -0,0 +1,135 @@
+"""Crash-safe journal of planned and completed operations."""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from pyenvtool.pyenv import Op
+from pyenvtool.python import PyVer, parse_version
+
+JOURNAL_NAME = "journal.ndjson"
+
+
+class Journal:
+    """
+    Write-ahead journal of the operations performed by a run.
+
+    Every record is flushed and synced before the operation it describes is
+    started, so after a crash the journal describes exactly which operations
+    were planned, which were started, and which finished. A completed run
+    removes its journal.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def _records(self) -> List[Dict[str, Any]]:
+        logger = logging.getLogger(__name__)
+
+        try:
+            lines = self.path.read_text(encoding="utf-8").splitlines()
+        except FileNotFoundError:
+            return []
+
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # Only the final record can be torn by a crash
+                logger.warning(f"Ignoring truncated journal record: {line!r}")
+                break
+
+        return records
+
+    def _append(self, record: Dict[str, Any], truncate: bool = False) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("w" if truncate else "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _ops(self, event: str) -> List[Tuple[PyVer, Op]]:
+        return [
+            (parse_version(r["version"]), Op[r["op"]])
+            for r in self._records()
+            if r["event"] == event
+        ]
+
+    def plan(self) -> Optional[Dict[str, Any]]:
+        """Get the record of the operations an interrupted run planned, if any."""
+        records = self._records()
+        if not records or records[0]["event"] != "plan":
+            return None
+        return records[0]
+
+    def matches(
+        self,
+        fingerprint: Optional[str] = None,
+        options: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """
+        Check whether the recorded run was planned from the same inputs.
+
+        Only the fingerprint and options which are provided are compared.
+        Journals written before these were recorded never match.
+        """
+        plan = self.plan()
+        if plan is None:
+            return False
+        if fingerprint is not None and plan.get("fingerprint") != fingerprint:
+            return False
+        return options is None or plan.get("options") == options
+
+    def remaining(self) -> Optional[List[Tuple[PyVer, Op]]]:
+        """Operations left over from an interrupted run, if there was one."""
+        plan = self.plan()
+        if plan is None:
+            return None
+
+        planned = [(parse_version(v), Op[op]) for v, op in plan["deltas"]]
+        done = set(self._ops("done"))
+
+        return [d for d in planned if d not in done]
+
+    def interrupted(self) -> List[Tuple[PyVer, Op]]:
+        """Operations that were started but never finished."""
+        done = set(self._ops("done"))
+        return [d for d in self._ops("begin") if d not in done]
+
+    def start(
+        self,
+        deltas: List[Tuple[PyVer, Op]],
+        fingerprint: Optional[str] = None,
+        options: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Record the operations a run is about to perform.
+
+        The fingerprint and options of the plan they came from are recorded
+        alongside, so a later run can tell whether it is resuming the same
+        plan.
+        """
+        self._append(
+            {
+                "event": "plan",
+                "deltas": [[str(v), op.name] for v, op in deltas],
+                "fingerprint": fingerprint,
+                "options": options,
+            },
+            truncate=True,
+        )
+
+    def begin(self, v: PyVer, op: Op) -> None:
+        """Record that an operation is starting."""
+        self._append({"event": "begin", "version": str(v), "op": op.name})
+
+    def done(self, v: PyVer, op: Op) -> None:
+        """Record that an operation has finished."""
+        self._append({"event": "done", "version": str(v), "op": op.name})
+
+    def complete(self) -> None:
+        """Discard the journal once a run has finished."""
+        self.path.unlink(missing_ok=True)
@@ -0,0 +1,133 @@
+"""Advisory locking and result sharing between concurrent invocations."""
+
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from types import TracebackType
+from typing import IO, Any, Callable, Optional, Tuple, Type
+
+from pyenvtool.pyenv import pyenv_state_dir
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore[assignment]
+
+LOCK_NAME = "lock"
+
+# Set while an exclusive lock is held, so child processes (such as pyenv
+# install hooks running `pyenvtool dedupe`) don't wait on their parent.
+LOCK_ENV = "PYENVTOOL_LOCK_HELD"
+
+
+class RootLock:
+    """
+    Advisory lock on a pyenv root.
+
+    Read-only operations take the lock in shared mode, so they may run
+    alongside each other; operations which change the root take it in
+    exclusive mode. On platforms without `fcntl` the lock does nothing, as
+    does a lock already held exclusively by a parent process. Nothing has
+    written to a root without a state directory, so a shared lock on one is
+    not taken rather than creating it.
+    """
+
+    def __init__(
+        self,
+        root: Optional[Path] = None,
+        exclusive: bool = False,
+        name: str = LOCK_NAME,
+    ) -> None:
+        self.path = pyenv_state_dir(root) / name
+        self.exclusive = exclusive
+        self._file: Optional[IO[str]] = None
+        self._held_env: Optional[str] = None
+
+    def __enter__(self) -> "RootLock":
+        logger = logging.getLogger(__name__)
+
+        held = os.environ.get(LOCK_ENV, "").split(os.pathsep)
+        if str(self.path) in held:
+            logger.debug(f"Lock {self.path!s} is held by a parent process")
+            return self
+
+        if not self.exclusive and not self.path.parent.is_dir():
+            logger.debug(f"No state directory for lock {self.path!s}")
+            return self
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self.path.open("a")
+        if fcntl is not None:
+            mode = "exclusive" if self.exclusive else "shared"
+            logger.debug(f"Acquiring {mode} lock {self.path!s}")
+            fcntl.flock(
+                self._file.fileno(),
+                fcntl.LOCK_EX if self.exclusive else fcntl.LOCK_SH,
+            )
+
+        if self.exclusive:
+            self._held_env = os.environ.get(LOCK_ENV)
+            os.environ[LOCK_ENV] = os.pathsep.join(
+                p for p in (self._held_env, str(self.path)) if p
+            )
+
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        if self._file is None:
+            return
+
+        if self.exclusive:
+            if self._held_env is None:
+                os.environ.pop(LOCK_ENV, None)
+            else:
+                os.environ[LOCK_ENV] = self._held_env
+
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
+
+
+def coalesce(
+    name: str,
+    compute: Callable[[], Any],
+    root: Optional[Path] = None,
+) -> Tuple[Any, bool]:
+    """
+    Compute a JSON-compatible result once for all concurrent invocations.
+
+    The first invocation computes the result while holding a lock; any other
+    invocation waits for it and reuses the result from a state file. Only a
+    result written while the caller was waiting is reused, never an older one,
+    so `name` must identify everything the result depends on. Returns the
+    result and whether it was reused.
+    """
+    logger = logging.getLogger(__name__)
+    path = pyenv_state_dir(root) / f"{name}.json"
+    started = time.time()
+
+    with RootLock(root, exclusive=True, name=f"{name}.lock"):
+        try:
+            state = json.loads(path.read_text(encoding="utf-8"))
+            if state["time"] >= started:
+                logger.info(f"Reusing {name} result from {path!s}")
+                return state["data"], True
+        except (FileNotFoundError, json.JSONDecodeError, KeyError, TypeError):
+            pass
+
+        data = compute()
+
+        tmp = path.with_suffix(".tmp")
+        state = {"time": time.time(), "data": data}
+        tmp.write_text(json.dumps(state), encoding="utf-8")
+        tmp.replace(path)
+
+        return data, False
@@ -0,0 +1,238 @@
+"""Prometheus textfile metrics."""
+
+import os
+import re
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import (
+    ContextManager,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from pyenvtool.pyenv import Op, pyenv_root
+from pyenvtool.python import PyVer, VersionStatus, main_status
+
+METRIC_PREFIX = "pyenvtool"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Metrics:
+    """
+    Registry of gauges, written in the node_exporter textfile format.
+
+    Values are recorded throughout a run and written once at the end, so
+    recording is cheap and happens whether or not a file is written.
+    """
+
+    def __init__(self) -> None:
+        self.help: Dict[str, str] = {}
+        self.values: Dict[str, Dict[Labels, float]] = {}
+
+    def set(self, name: str, value: float, help_text: str, **labels: str) -> None:
+        """Set a gauge."""
+        name = f"{METRIC_PREFIX}_{name}"
+        self.help.setdefault(name, help_text)
+        self.values.setdefault(name, {})[tuple(sorted(labels.items()))] = value
+
+    def inc(self, name: str, help_text: str, amount: float = 1, **labels: str) -> None:
+        """Increase a gauge, starting from zero."""
+        key = tuple(sorted(labels.items()))
+        current = self.values.get(f"{METRIC_PREFIX}_{name}", {}).get(key, 0)
+        self.set(name, current + amount, help_text, **labels)
+
+    @contextmanager
+    def time(self, name: str, help_text: str, **labels: str) -> Iterator[None]:
+        """Record how long a block takes, in seconds."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.set(name, time.monotonic() - start, help_text, **labels)
+
+    def render(self) -> str:
+        """Metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+
+        for name in sorted(self.values):
+            lines.append(f"# HELP {name} {self.help[name]}")
+            lines.append(f"# TYPE {name} gauge")
+
+            for labels, value in sorted(self.values[name].items()):
+                label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+                series = f"{name}{{{label_text}}}" if label_text else name
+                lines.append(f"{series} {value:g}")
+
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Path, success: bool) -> None:
+        """
+        Write the metrics file atomically, recording the outcome of the run.
+
+        The time of the last successful run is carried over from the previous
+        file when this run failed.
+        """
+        now = time.time()
+        last_success = now if success else previous_value(path, "last_success")
+
+        self.set("last_run_success", int(success), "Whether the last run succeeded.")
+        self.set(
+            "last_run_timestamp_seconds",
+            now,
+            "Time the last run finished.",
+        )
+        if last_success is not None:
+            self.set(
+                "last_success_timestamp_seconds",
+                last_success,
+                "Time the last successful run finished.",
+            )
+
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(self.render(), encoding="utf-8")
+        tmp.replace(path)
+
+
+metrics = Metrics()
+
+
+def previous_value(path: Path, name: str) -> Optional[float]:
+    """Read an unlabelled timestamp gauge back from an existing metrics file."""
+    pattern = re.compile(
+        rf"^{METRIC_PREFIX}_{name}_timestamp_seconds\s+(\S+)$",
+        re.MULTILINE,
+    )
+
+    try:
+        m = pattern.search(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+
+    return float(m.group(1)) if m else None
+
+
+def time_phase(name: str) -> ContextManager[None]:
+    """Time a phase of a run, such as updating pyenv."""
+    return metrics.time(
+        "phase_duration_seconds",
+        "Time taken by each phase of the last run.",
+        phase=name,
+    )
+
+
+def time_build(v: PyVer, root: Optional[Path] = None) -> ContextManager[None]:
+    """Time building a version in a root."""
+    return metrics.time(
+        "build_duration_seconds",
+        "Time taken to build each version installed by the last run.",
+        root=str(pyenv_root(root)),
+        version=str(v),
+    )
+
+
+def record_versions(
+    root: Path,
+    supported_status: Dict[PyVer, VersionStatus],
+    available_versions: Iterable[PyVer],
+    installed_versions: Iterable[PyVer],
+    deltas: Iterable[Tuple[PyVer, Op]],
+) -> None:
+    """Record version counts per main version, from the report's inputs."""
+    available_versions = list(available_versions)
+    installed_versions = list(installed_versions)
+    main_versions = set(supported_status) | {v.main for v in installed_versions}
+
+    for m in main_versions:
+        status = main_status(m, supported_status, available_versions)
+        installed = [v for v in installed_versions if v.main == m]
+        avail = [v for v in available_versions if v.main == m]
+        latest = max(avail) if avail else None
+        labels = {"root": str(root), "main": m.main_format()}
+
+        metrics.set(
+            "installed_versions",
+            len(installed),
+            "Number of installed versions.",
+            **labels,
+        )
+        metrics.set(
+            "outdated_versions",
+            sum(1 for v in installed if latest is not None and v != latest),
+            "Number of installed versions older than the latest bugfix.",
+            **labels,
+        )
+        metrics.set(
+            "unsupported_versions",
+            len(installed) if status is VersionStatus.UNSUPPORTED else 0,
+            "Number of installed versions which are no longer supported.",
+            **labels,
+        )
+
+    counts = {op: 0 for op in Op}
+    for _, op in deltas:
+        counts[op] += 1
+    for op, count in counts.items():
+        metrics.set(
+            "planned_changes",
+            count,
+            "Number of changes planned by the last run.",
+            root=str(root),
+            op=op.name.lower(),
+        )
+
+
+def tree_size(path: Path) -> int:
+    """Bytes used by the files in a tree, counting hardlinked files once."""
+    seen: Set[Tuple[int, int]] = set()
+    total = 0
+
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            st = os.lstat(os.path.join(dirpath, name))
+            if (st.st_dev, st.st_ino) in seen:
+                continue
+            seen.add((st.st_dev, st.st_ino))
+            total += st.st_size
+
+    return total
+
+
+def record_root_size(root: Path) -> None:
+    """Record the size of a root's installed versions."""
+    metrics.set(
+        "versions_bytes",
+        tree_size(root / "versions"),
+        "Bytes used by installed versions, counting hardlinks once.",
+        root=str(root),
+    )
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Record a cache lookup and update its hit ratio."""
+    metrics.inc(
+        "cache_lookups",
+        "Number of cache lookups.",
+        cache=cache,
+        result="hit" if hit else "miss",
+    )
+
+    lookups = metrics.values[f"{METRIC_PREFIX}_cache_lookups"]
+    hits = lookups.get((("cache", cache), ("result", "hit")), 0)
+    misses = lookups.get((("cache", cache), ("result", "miss")), 0)
+    metrics.set(
+        "cache_hit_ratio",
+        hits / (hits + misses),
+        "Fraction of cache lookups which were hits.",
+        cache=cache,
+    )
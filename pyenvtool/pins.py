@@ -0,0 +1,297 @@
+"""Find versions pinned by `.python-version` files in project trees."""
+
+import contextlib
+import fnmatch
+import json
+import logging
+import os
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from pyenvtool.pyenv import pyenv_state_dir
+from pyenvtool.python import PyVer
+
+PIN_FILE = ".python-version"
+IGNORE_FILE = ".gitignore"
+PIN_INDEX_NAME = "pins.json"
+
+# Directories never worth descending into, ignored or not
+ALWAYS_IGNORE = frozenset({".git", ".hg", ".svn"})
+
+# Split a scan into subtrees for the worker pool once this many are pending
+SCAN_TASKS = 256
+
+# Index entries are [directory mtime, {subdirectory: entry}, {file: [mtime, text]}]
+# nested under the path of each scanned tree, with `None` for skipped directories;
+# most directories have neither, and are stored as just their mtime
+IndexEntry = Union[int, List[Any]]
+INDEX_VERSION = 2
+
+
+class IgnoreRule(NamedTuple):
+    """A directory pattern from an ignore file."""
+
+    base: str
+    pattern: re.Pattern
+    anchored: bool
+
+
+# Directory to scan, its ignore rules and cached entry, and where its entry goes
+ScanTask = Tuple[str, Tuple[IgnoreRule, ...], Optional[IndexEntry], Dict[str, Any], str]
+
+
+class ScanResult(NamedTuple):
+    """Pins found by part of a scan, and the directories it left to scan."""
+
+    pins: Set[str]
+    scanned: int
+    pending: List[ScanTask]
+
+
+@lru_cache(maxsize=None)
+def parse_ignore(base: str, text: str) -> Tuple[IgnoreRule, ...]:
+    """
+    Parse the directory patterns in a `.gitignore` file.
+
+    Patterns without a slash match a directory name at any depth; patterns
+    with one are matched against the path relative to the ignore file.
+    Negated patterns are not supported, and are skipped.
+    """
+    rules = []
+
+    for line in text.splitlines():
+        pattern = line.strip()
+        if not pattern or pattern.startswith(("#", "!")):
+            continue
+
+        pattern = pattern.rstrip("/")
+        if pattern.startswith("**/"):
+            pattern = pattern[3:]
+        anchored = "/" in pattern
+        rules.append(
+            IgnoreRule(
+                base,
+                re.compile(fnmatch.translate(pattern.lstrip("/"))),
+                anchored,
+            ),
+        )
+
+    return tuple(rules)
+
+
+def is_ignored(path: str, name: str, rules: Iterable[IgnoreRule]) -> bool:
+    """Check whether a directory matches any of the ignore rules above it."""
+    for rule in rules:
+        # Rules only ever apply to directories below their ignore file
+        target = path[len(rule.base) :].lstrip(os.sep) if rule.anchored else name
+        if rule.pattern.match(target):
+            return True
+    return False
+
+
+def read_pins(text: str) -> List[str]:
+    """Version names listed in a `.python-version` file."""
+    return [
+        line.strip()
+        for line in text.splitlines()
+        if line.strip() and not line.strip().startswith("#")
+    ]
+
+
+class PinIndex:
+    """
+    Directory listings and pin files from previous scans.
+
+    A directory whose mtime hasn't changed has the same entries, so its
+    cached listing is reused without reading it again. Files edited in place
+    don't change their directory's mtime, so the tracked files in it are
+    still checked individually. The index is only rewritten if a scan found
+    something different.
+    """
+
+    TRACKED = (PIN_FILE, IGNORE_FILE)
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.trees: Dict[str, Optional[IndexEntry]] = {}
+
+        with contextlib.suppress(FileNotFoundError, json.JSONDecodeError):
+            data = json.loads(path.read_text(encoding="utf-8"))
+            if data.get("version") == INDEX_VERSION:
+                self.trees = data["trees"]
+
+        self._loaded = dict(self.trees)
+
+    def read_dir(self, path: str, cached: Optional[IndexEntry]) -> Optional[IndexEntry]:
+        """
+        Return the entry for a directory, or `None` if it can't be read.
+
+        The subdirectories of the entry have yet to be scanned, and are `None`.
+        """
+        try:
+            mtime = os.stat(path).st_mtime_ns
+
+            if cached == mtime:
+                return mtime
+
+            if isinstance(cached, list) and cached[0] == mtime:
+                files = {}
+                for name, (file_mtime, cached_text) in cached[2].items():
+                    file_path = os.path.join(path, name)
+                    current = os.stat(file_path).st_mtime_ns
+                    if current == file_mtime:
+                        files[name] = [current, cached_text]
+                    else:
+                        files[name] = [current, _read_text(file_path)]
+                return [mtime, dict.fromkeys(cached[1]), files]
+
+            subdirs: Dict[str, Optional[IndexEntry]] = {}
+            files = {}
+            with os.scandir(path) as it:
+                for e in it:
+                    if e.is_dir(follow_symlinks=False):
+                        subdirs[e.name] = None
+                    elif e.name in self.TRACKED and e.is_file():
+                        files[e.name] = [e.stat().st_mtime_ns, _read_text(e.path)]
+            return [mtime, subdirs, files] if subdirs or files else mtime
+
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            return None
+
+    def scan(self, tasks: List[ScanTask], limit: Optional[int] = None) -> ScanResult:
+        """
+        Scan directories breadth-first, filling in their entries.
+
+        Stops early once `limit` directories are waiting to be scanned, and
+        returns them along with the pins found so far.
+        """
+        logger = logging.getLogger(__name__)
+        queue = deque(tasks)
+        pins: Set[str] = set()
+        scanned = 0
+
+        while queue and (limit is None or len(queue) < limit):
+            path, rules, cached, parent, key = queue.popleft()
+            entry = self.read_dir(path, cached)
+            parent[key] = entry
+            if entry is None:
+                continue
+
+            scanned += 1
+            if not isinstance(entry, list):
+                continue
+
+            _, subdirs, files = entry
+            cached_subdirs = cached[1] if isinstance(cached, list) else {}
+
+            if PIN_FILE in files:
+                found = read_pins(files[PIN_FILE][1])
+                logger.debug(f"Found pins {found!r} in {path!s}")
+                pins.update(found)
+
+            child_rules = rules
+            if IGNORE_FILE in files:
+                child_rules = rules + parse_ignore(path, files[IGNORE_FILE][1])
+
+            prefix = path.rstrip(os.sep) + os.sep
+            for name in subdirs:
+                child = prefix + name
+                if name in ALWAYS_IGNORE or is_ignored(child, name, child_rules):
+                    continue
+                queue.append(
+                    (child, child_rules, cached_subdirs.get(name), subdirs, name),
+                )
+
+        return ScanResult(pins, scanned, list(queue))
+
+    def save(self) -> None:
+        """Write the index atomically, if it has changed since it was loaded."""
+        if self.trees == self._loaded:
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        data = {"version": INDEX_VERSION, "trees": self.trees}
+        tmp.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+        tmp.replace(self.path)
+        self._loaded = dict(self.trees)
+
+
+def _read_text(path: str) -> str:
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+
+def scan_pins(
+    paths: Iterable[Path],
+    root: Optional[Path] = None,
+    jobs: Optional[int] = None,
+    dry_run: bool = False,
+) -> Set[str]:
+    """
+    Collect the version names pinned anywhere under some project trees.
+
+    The top of each tree is walked until there are enough subtrees to share
+    out, then each subtree is walked by one of a pool of `jobs` threads,
+    skipping directories excluded by `.gitignore` files. Listings are cached
+    in the root's state directory so unchanged trees are rescanned with a
+    single `stat` per directory. A dry run leaves the cache as it was.
+    """
+    logger = logging.getLogger(__name__)
+    index = PinIndex(pyenv_state_dir(root) / PIN_INDEX_NAME)
+
+    tops = [str(p.resolve()) for p in paths]
+    first = index.scan(
+        [(t, (), index.trees.get(t), index.trees, t) for t in tops],
+        limit=SCAN_TASKS,
+    )
+    pins, scanned = set(first.pins), first.scanned
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        for result in pool.map(index.scan, [[task] for task in first.pending]):
+            pins.update(result.pins)
+            scanned += result.scanned
+
+    logger.info(f"Scanned {scanned} directories for pinned versions")
+    if not dry_run:
+        index.save()
+
+    return pins
+
+
+def pinned_versions(pins: Iterable[str], installed: Iterable[PyVer]) -> Set[PyVer]:
+    """
+    Installed versions which pins resolve to.
+
+    A pin naming an exact version protects that version; a prefix such as
+    `3.11` protects the latest installed version it matches, as pyenv would
+    select.
+    """
+    installed = list(installed)
+    by_name = {str(v): v for v in installed}
+    protected = set()
+
+    for pin in pins:
+        if pin in by_name:
+            protected.add(by_name[pin])
+            continue
+
+        matches = [v for v in installed if str(v).startswith((f"{pin}.", f"{pin}-"))]
+        if matches:
+            protected.add(max(matches))
+
+    return protected
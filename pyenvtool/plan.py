@@ -0,0 +1,179 @@
+"""Serializable upgrade plans."""
+
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from pyenvtool import calculate_changes
+from pyenvtool.pyenv import Op
+from pyenvtool.python import PyVer, VersionStatus, parse_version
+
+PLAN_FORMAT = 1
+
+
+def plan_fingerprint(  # noqa: PLR0913
+    supported_status: Dict[PyVer, VersionStatus],
+    latest_versions: Iterable[PyVer],
+    installed_versions: Iterable[PyVer],
+    keep_bugfix: bool = False,
+    remove_minor: bool = False,
+    protected_versions: Iterable[PyVer] = (),
+) -> str:
+    """Calculate a stable digest of the inputs to `calculate_changes`."""
+    inputs: Dict[str, Any] = {
+        "supported": sorted([str(v), s.value] for v, s in supported_status.items()),
+        "latest": sorted(str(v) for v in latest_versions),
+        "installed": sorted(str(v) for v in installed_versions),
+        "keep_bugfix": keep_bugfix,
+        "remove_minor": remove_minor,
+    }
+
+    # Only included when set, so plans written before pinning still verify
+    protected = sorted(str(v) for v in protected_versions)
+    if protected:
+        inputs["protected"] = protected
+
+    data = json.dumps(inputs, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def plan_options(
+    keep_bugfix: bool = False,
+    remove_minor: bool = False,
+) -> Dict[str, Any]:
+    """Options affecting a plan, as recorded in plan files and journals."""
+    return {"keep_bugfix": keep_bugfix, "remove_minor": remove_minor}
+
+
+class Plan:
+    """
+    A precomputed set of changes, along with the inputs used to compute it.
+
+    Only the latest available bugfix of each main version is retained, which
+    is all `calculate_changes` needs to re-plan against a different installed
+    set.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        deltas: Iterable[Tuple[PyVer, Op]],
+        supported_status: Dict[PyVer, VersionStatus],
+        available_versions: Iterable[PyVer],
+        installed_versions: Iterable[PyVer],
+        keep_bugfix: bool = False,
+        remove_minor: bool = False,
+        protected_versions: Iterable[PyVer] = (),
+    ) -> None:
+        self.deltas = sorted(deltas, reverse=True)
+        self.supported_status = dict(supported_status)
+        self.installed_versions = set(installed_versions)
+        self.keep_bugfix = keep_bugfix
+        self.remove_minor = remove_minor
+        self.protected_versions = set(protected_versions)
+
+        latest: Dict[PyVer, PyVer] = {}
+        for v in available_versions:
+            if v.main not in latest or v > latest[v.main]:
+                latest[v.main] = v
+        self.latest_versions = set(latest.values())
+
+    @property
+    def fingerprint(self) -> str:
+        """Digest of the inputs this plan was computed from."""
+        return plan_fingerprint(
+            self.supported_status,
+            self.latest_versions,
+            self.installed_versions,
+            self.keep_bugfix,
+            self.remove_minor,
+            self.protected_versions,
+        )
+
+    @property
+    def options(self) -> Dict[str, Any]:
+        """Options this plan was computed with."""
+        return plan_options(self.keep_bugfix, self.remove_minor)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plan represented as JSON-compatible data."""
+        return {
+            "format": PLAN_FORMAT,
+            "fingerprint": self.fingerprint,
+            "options": self.options,
+            "supported": {
+                str(v): s.value for v, s in sorted(self.supported_status.items())
+            },
+            "latest": [str(v) for v in sorted(self.latest_versions)],
+            "installed": [str(v) for v in sorted(self.installed_versions)],
+            "protected": [str(v) for v in sorted(self.protected_versions)],
+            "deltas": [[str(v), op.name] for v, op in self.deltas],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Plan":
+        """Load a plan from JSON-compatible data."""
+        if not isinstance(data, dict):
+            raise ValueError(f"Invalid plan, expected an object: {data!r}")
+        if data.get("format") != PLAN_FORMAT:
+            raise ValueError(f"Unsupported plan format: {data.get('format')!r}")
+
+        plan = cls(
+            deltas=[(parse_version(v), Op[op]) for v, op in data["deltas"]],
+            supported_status={
+                PyVer.parse(v): VersionStatus(s) for v, s in data["supported"].items()
+            },
+            available_versions=[parse_version(v) for v in data["latest"]],
+            installed_versions=[parse_version(v) for v in data["installed"]],
+            keep_bugfix=data["options"]["keep_bugfix"],
+            remove_minor=data["options"]["remove_minor"],
+            protected_versions=[parse_version(v) for v in data.get("protected", [])],
+        )
+
+        if plan.fingerprint != data["fingerprint"]:
+            raise ValueError("Plan fingerprint does not match its contents")
+
+        return plan
+
+    def dump(self, path: Path) -> None:
+        """Write the plan to a JSON file."""
+        path.write_text(json.dumps(self.to_dict(), indent=2) + "\n", encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: Path) -> "Plan":
+        """Read a plan from a JSON file, raising a `ValueError` if invalid."""
+        try:
+            return cls.from_dict(json.loads(path.read_text(encoding="utf-8")))
+        except (AttributeError, KeyError, TypeError, json.JSONDecodeError) as e:
+            raise ValueError(f"Invalid plan file {path!s}: {e!s}") from e
+
+    def deltas_for(
+        self,
+        installed_versions: Iterable[PyVer],
+    ) -> List[Tuple[PyVer, Op]]:
+        """
+        Determine the changes required for a particular installed set.
+
+        If the installed set matches the one the plan was computed from, the
+        stored changes are returned unchanged; otherwise they are recomputed
+        from the stored support status and latest versions.
+        """
+        logger = logging.getLogger(__name__)
+        installed: Set[PyVer] = set(installed_versions)
+
+        if installed == self.installed_versions:
+            return list(self.deltas)
+
+        logger.info("Installed versions differ from the plan, re-planning locally")
+        return sorted(
+            calculate_changes(
+                self.supported_status.keys(),
+                self.latest_versions,
+                installed,
+                keep_bugfix=self.keep_bugfix,
+                remove_minor=self.remove_minor,
+                protected_versions=self.protected_versions,
+            ),
+            reverse=True,
+        )
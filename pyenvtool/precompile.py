@@ -0,0 +1,109 @@
+"""Bytecode precompilation of installed versions."""
+
+import logging
+import os
+import subprocess
+import time
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+from pyenvtool.pyenv import pyenv_version_dir
+from pyenvtool.python import PyVer
+
+# Files in the standard library which intentionally fail to compile, as
+# excluded by CPython's own `make install`
+PRECOMPILE_EXCLUDE = r"bad_coding|badsyntax|site-packages|lib2to3/tests/data"
+
+OPTIMIZATION_LEVELS = (0, 1, 2)
+
+
+class PrecompileStats(NamedTuple):
+    """Summary of a precompilation run."""
+
+    sources: int
+    compiled: int
+    seconds: float
+
+
+def _count_files(lib: Path, suffix: str) -> int:
+    return sum(
+        1
+        for _, _, filenames in os.walk(lib)
+        for name in filenames
+        if name.endswith(suffix)
+    )
+
+
+def precompile_commands(
+    python: Path,
+    v: PyVer,
+    lib: Path,
+    jobs: int = 0,
+) -> List[List[str]]:
+    """
+    Commands which compile a standard library at every optimization level.
+
+    From 3.7, bytecode is validated against a hash of its source rather than
+    its mtime, so it stays valid when `dedupe` links sources with different
+    mtimes, and any timestamp-based bytecode from `make install` is replaced.
+    Interpreters from 3.9 accept several levels in a single invocation; older
+    interpreters need one run per level.
+    """
+    base = ["-m", "compileall", "-q", "-j", str(jobs), "-x", PRECOMPILE_EXCLUDE]
+    if (v.major, v.minor) >= (3, 7):
+        base += ["-f", "--invalidation-mode", "checked-hash"]
+
+    if (v.major, v.minor) >= (3, 9):
+        levels = [arg for o in OPTIMIZATION_LEVELS for arg in ("-o", str(o))]
+        return [[str(python), *base, *levels, str(lib)]]
+
+    flags = {0: [], 1: ["-O"], 2: ["-OO"]}
+    return [[str(python), *flags[o], *base, str(lib)] for o in OPTIMIZATION_LEVELS]
+
+
+def precompile_version(
+    v: PyVer,
+    root: Optional[Path] = None,
+    jobs: int = 0,
+) -> PrecompileStats:
+    """
+    Compile the standard library of an installed version to bytecode.
+
+    Compilation is run by the installed interpreter itself, using a process
+    pool of `jobs` workers (0 uses one per CPU).
+    """
+    logger = logging.getLogger(__name__)
+
+    prefix = pyenv_version_dir(v, root=root)
+    lib = prefix / "lib" / f"python{v.major}.{v.minor}"
+    if not lib.is_dir():
+        raise FileNotFoundError(f"No standard library found at {lib!s}")
+
+    before = _count_files(lib, ".pyc")
+    start = time.monotonic()
+
+    for cmd in precompile_commands(prefix / "bin" / "python", v, lib, jobs):
+        logger.info("Executing: " + " ".join(cmd))
+        ps = subprocess.run(
+            cmd,
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            check=False,
+        )
+        # Bytecode is only a cache, so failures are reported but not fatal;
+        # compileall exits with 1 when individual files fail to compile
+        if ps.returncode == 1:
+            logger.warning(f"Some files in {lib!s} failed to compile")
+            logger.debug(ps.stdout)
+        elif ps.returncode != 0:
+            logger.warning(
+                f"Precompiling {lib!s} exited with code {ps.returncode}: "
+                f"{ps.stderr.strip()}",
+            )
+
+    return PrecompileStats(
+        sources=_count_files(lib, ".py"),
+        compiled=_count_files(lib, ".pyc") - before,
+        seconds=time.monotonic() - start,
+    )
@@ -1,14 +1,19 @@
 """Methods and Objects for interacting with `pyenv`."""
 
+import asyncio
+import functools
 import logging
+import os
 import shutil
 import subprocess
 from enum import Enum, auto
-from typing import Iterator
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
 
-from pyenvtool.python import PyVer
+from pyenvtool.python import PyVer, parse_version, version_parser
 
 PYENV_NAME = "pyenv"
+STATE_DIR_NAME = ".pyenvtool"
 
 
 class Op(int, Enum):
@@ -31,8 +36,32 @@ def pyenv_is_installed() -> bool:
     return pyenv_path is not None
 
 
-def pyenv_execute(*args: str, dry_run: bool = False) -> str:
-    """Execute pyenv with the provided arguments and return the output."""
+def _pyenv_env(
+    root: Optional[Path],
+    env: Optional[Dict[str, str]] = None,
+) -> Optional[Dict[str, str]]:
+    """Environment for running pyenv against a specific root."""
+    if root is None and env is None:
+        return None
+
+    run_env = {**os.environ, **(env or {})}
+    if root is not None:
+        run_env["PYENV_ROOT"] = str(root)
+    return run_env
+
+
+def pyenv_execute(
+    *args: str,
+    dry_run: bool = False,
+    root: Optional[Path] = None,
+    env: Optional[Dict[str, str]] = None,
+) -> str:
+    """
+    Execute pyenv with the provided arguments and return the output.
+
+    If `root` is provided, pyenv is run with that `PYENV_ROOT` instead of the
+    inherited one. Any variables in `env` are added to its environment.
+    """
     logger = logging.getLogger(__name__)
     logger.info("Executing: " + " ".join([PYENV_NAME, *args]))
 
@@ -45,32 +74,101 @@ def pyenv_execute(*args: str, dry_run: bool = False) -> str:
         check=True,
         text=True,
         encoding="utf-8",
+        env=_pyenv_env(root, env),
     )
 
     return ps.stdout
 
 
-def pyenv_update() -> None:
+async def pyenv_execute_async(*args: str, dry_run: bool = False) -> str:
+    """
+    Execute pyenv with the provided arguments and return the output.
+
+    Asynchronous counterpart of `pyenv_execute`. If the calling task is
+    cancelled, the child process is killed and reaped before the cancellation
+    is propagated.
+    """
+    logger = logging.getLogger(__name__)
+    logger.info("Executing: " + " ".join([PYENV_NAME, *args]))
+
+    if dry_run:
+        return ""
+
+    proc = await asyncio.create_subprocess_exec(
+        PYENV_NAME,
+        *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+
+    try:
+        stdout, stderr = await proc.communicate()
+    except asyncio.CancelledError:
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+        raise
+
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(
+            proc.returncode or 0,
+            [PYENV_NAME, *args],
+            output=stdout.decode("utf-8"),
+            stderr=stderr.decode("utf-8"),
+        )
+
+    return stdout.decode("utf-8")
+
+
+def pyenv_root(root: Optional[Path] = None) -> Path:
+    """Determine the pyenv root directory, unless one is provided."""
+    if root is not None:
+        return root
+
+    if env_root := os.environ.get("PYENV_ROOT"):
+        return Path(env_root)
+
+    return _pyenv_default_root()
+
+
+@functools.lru_cache(maxsize=None)
+def _pyenv_default_root() -> Path:
+    """Ask pyenv for its root, once per process."""
+    return Path(pyenv_execute("root").strip())
+
+
+def pyenv_version_dir(v: PyVer, root: Optional[Path] = None) -> Path:
+    """Directory a python version is (or would be) installed in."""
+    return pyenv_root(root) / "versions" / str(v)
+
+
+def pyenv_state_dir(root: Optional[Path] = None) -> Path:
+    """Directory for pyenvtool's own state, created by whatever first writes to it."""
+    return pyenv_root(root) / STATE_DIR_NAME
+
+
+def pyenv_update(root: Optional[Path] = None) -> None:
     """
     Update pyenv.
 
     Assumed to be sucessfull, raise an error if not.
     """
-    pyenv_execute("update")
+    pyenv_execute("update", root=root)
 
 
-def pyenv_available_versions() -> Iterator[PyVer]:
-    """Determine which python versions can be installed by pyenv."""
+def _parse_available_versions(output: str) -> Iterator[PyVer]:
+    """Parse the output of `pyenv install --list`."""
     logger = logging.getLogger(__name__)
 
-    for line in pyenv_execute("install", "--list").splitlines():
+    for line in output.splitlines():
         ident = line.strip()
 
-        if ident[0] not in "0123456789":
+        parser = version_parser(ident)
+        if parser is None:
             continue
 
         try:
-            ver = PyVer.parse(ident)
+            ver = parser(ident)
         except ValueError as e:
             logger.warning(f"Unexpected invalid Python version: {ident} ({e!s})")
             continue
@@ -79,11 +177,11 @@ def pyenv_available_versions() -> Iterator[PyVer]:
         yield ver
 
 
-def pyenv_installed_versions() -> Iterator[PyVer]:
-    """Determine which python shims are currently installed."""
+def _parse_installed_versions(output: str) -> Iterator[PyVer]:
+    """Parse the output of `pyenv versions`."""
     logger = logging.getLogger(__name__)
 
-    for line in pyenv_execute("versions").splitlines():
+    for line in output.splitlines():
         parts = line.strip().split()
 
         ident = parts[0]
@@ -94,7 +192,7 @@ def pyenv_installed_versions() -> Iterator[PyVer]:
             continue
 
         try:
-            ver = PyVer.parse(ident)
+            ver = parse_version(ident)
         except ValueError as e:
             logger.warning(f"Unexpected invalid Python version: {ident} ({e!s})")
             continue
@@ -103,16 +201,65 @@ def pyenv_installed_versions() -> Iterator[PyVer]:
         yield ver
 
 
-def pyenv_install(v: PyVer) -> str:
+def pyenv_available_versions(root: Optional[Path] = None) -> Iterator[PyVer]:
+    """Determine which python versions can be installed by pyenv."""
+    yield from _parse_available_versions(
+        pyenv_execute("install", "--list", root=root),
+    )
+
+
+def pyenv_installed_versions(root: Optional[Path] = None) -> Iterator[PyVer]:
+    """Determine which python shims are currently installed."""
+    yield from _parse_installed_versions(pyenv_execute("versions", root=root))
+
+
+def pyenv_install(v: PyVer, root: Optional[Path] = None) -> str:
     """Install a python version."""
-    return pyenv_execute("install", "--force", str(v))
+    return pyenv_execute("install", "--force", str(v), root=root)
 
 
-def pyenv_uninstall(v: PyVer) -> str:
+def pyenv_uninstall(v: PyVer, root: Optional[Path] = None) -> str:
     """Install a python version."""
-    return pyenv_execute("uninstall", "--force", str(v))
+    return pyenv_execute("uninstall", "--force", str(v), root=root)
+
+
+def pyenv_rehash(root: Optional[Path] = None) -> str:
+    """Rebuild the shims."""
+    return pyenv_execute("rehash", root=root)
 
 
-def pyenv_set_shims(*versions: PyVer) -> str:
+def pyenv_set_shims(*versions: PyVer, root: Optional[Path] = None) -> str:
     """Set shim priority."""
-    return pyenv_execute("global", "system", *(str(v) for v in versions))
+    return pyenv_execute("global", "system", *(str(v) for v in versions), root=root)
+
+
+async def pyenv_update_async() -> None:
+    """Update pyenv without blocking the event loop."""
+    await pyenv_execute_async("update")
+
+
+async def pyenv_available_versions_async() -> List[PyVer]:
+    """Determine which python versions can be installed by pyenv."""
+    output = await pyenv_execute_async("install", "--list")
+    return list(_parse_available_versions(output))
+
+
+async def pyenv_installed_versions_async() -> List[PyVer]:
+    """Determine which python shims are currently installed."""
+    output = await pyenv_execute_async("versions")
+    return list(_parse_installed_versions(output))
+
+
+async def pyenv_install_async(v: PyVer) -> str:
+    """Install a python version without blocking the event loop."""
+    return await pyenv_execute_async("install", "--force", str(v))
+
+
+async def pyenv_uninstall_async(v: PyVer) -> str:
+    """Uninstall a python version without blocking the event loop."""
+    return await pyenv_execute_async("uninstall", "--force", str(v))
+
+
+async def pyenv_set_shims_async(*versions: PyVer) -> str:
+    """Set shim priority without blocking the event loop."""
+    return await pyenv_execute_async("global", "system", *(str(v) for v in versions))
@@ -1,8 +1,20 @@
 """Python-related Code."""
 
+import asyncio
+import codecs
 import re
 from enum import Enum
-from typing import ClassVar, Iterable, Tuple
+from html.parser import HTMLParser
+from typing import (
+    Any,
+    Callable,
+    ClassVar,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+)
 
 import requests
 from bs4 import BeautifulSoup, Tag
@@ -10,6 +22,10 @@ from bs4 import BeautifulSoup, Tag
 PYTHON_URL = "https://www.python.org"
 PYTHON_DOWNLOADS = f"{PYTHON_URL}/downloads"
 
+RELEASE_LIST_CLASS = "active-release-list-widget"
+RELEASE_FIELD_CLASSES = ("release-version", "release-status")
+STREAM_CHUNK_SIZE = 16 * 1024
+
 MainVersion = Tuple[int, int]
 
 
@@ -148,6 +164,180 @@ class PyVer:
         raise ValueError(f"Invalid SemVer representation: {representation}")
 
 
+# Alternative implementations pyenv can install, longest name first so that
+# `graalpython` is not mistaken for `graalpy`
+IMPLEMENTATIONS = (
+    "graalpy-community",
+    "micropython",
+    "graalpython",
+    "ironpython",
+    "stackless",
+    "graalpy",
+    "pyston",
+    "jython",
+    "pypy",
+)
+
+# pyenv keeps listing builds of every release line it has ever offered, so
+# only this many of the newest lines of an implementation count as supported
+IMPL_SUPPORTED_LINES = 2
+
+
+class ImplVer(PyVer):
+    """
+    Version of an alternative Python implementation, such as PyPy.
+
+    The implementation's own version is held in the usual fields, and the
+    Python language version it targets (if it is part of the name, as in
+    `pypy3.10-7.3.17`) is held in `lang`. Main versions are tracked per
+    implementation and language version, so `pypy3.9` and `pypy3.10` are
+    upgraded independently.
+
+    Comparisons with CPython versions are supported, and sort after them.
+    """
+
+    RE_IMPLVER: ClassVar[re.Pattern] = re.compile(
+        rf"""
+            ^
+            (?P<impl>{"|".join(re.escape(i) for i in IMPLEMENTATIONS)})
+            (?P<lang>[1-9]\d*(?:\.(?:0|[1-9]\d*))?)?
+            -
+            (?P<major>0|[1-9]\d*)
+            \.
+            (?P<minor>0|[1-9]\d*)
+            \.
+            (?P<patch>0|[1-9]\d*)
+            (?:-(?P<prerelease>[0-9a-z]+(?:[.-][0-9a-z]+)*))?
+            $
+        """,
+        re.VERBOSE + re.IGNORECASE,
+    )
+
+    def __init__(  # noqa: PLR0913
+        self,
+        impl: str,
+        major: int,
+        minor: int,
+        patch: int = 0,
+        prerelease: str = "",
+        build: str = "",
+        lang: str = "",
+    ) -> None:
+        super().__init__(major, minor, patch, prerelease, build)
+        self.impl = impl
+        self.lang = lang
+
+    @property
+    def main(self) -> "ImplVer":
+        """Main Version."""
+        return self.__class__(self.impl, self.major, self.minor, lang=self.lang)
+
+    @property
+    def line(self) -> Tuple[Any, ...]:
+        """
+        Release line, ordered oldest to newest.
+
+        Implementations naming the language version they target, such as
+        `pypy3.10`, have a line per language version; others have one per
+        main version.
+        """
+        return self.main.as_tuple()[:2] if self.lang else self.main.as_tuple()
+
+    def as_tuple(self) -> Tuple[Any, ...]:  # type: ignore[override]
+        """ImplVer represented as a Tuple."""
+        lang = tuple(int(p) for p in self.lang.split(".")) if self.lang else ()
+        return (self.impl, lang, *super().as_tuple())
+
+    def main_format(self) -> str:
+        """Format just the implementation and main version part."""
+        return f"{self.impl}{self.lang}-{self.major:d}.{self.minor:d}"
+
+    def __str__(self) -> str:
+        return f"{self.impl}{self.lang}-{super().__str__()}"
+
+    def __hash__(self) -> int:
+        return hash(self.as_tuple())
+
+    @property
+    def fixed_width(self) -> str:
+        """Zero-padded representation."""
+        return f"{self.impl}{self.lang}-{super().fixed_width}"
+
+    def _key(self, other: object) -> Tuple[Any, ...]:
+        if isinstance(other, ImplVer):
+            return other.as_tuple()
+        if isinstance(other, PyVer):
+            return ("", (), *other.as_tuple())
+        raise NotImplementedError()
+
+    def __eq__(self, other: object) -> bool:
+        return self.as_tuple() == self._key(other)
+
+    def __ne__(self, other: object) -> bool:
+        return self.as_tuple() != self._key(other)
+
+    def __gt__(self, other: object) -> bool:
+        return self.as_tuple() > self._key(other)
+
+    def __ge__(self, other: object) -> bool:
+        return self.as_tuple() >= self._key(other)
+
+    def __lt__(self, other: object) -> bool:
+        return self.as_tuple() < self._key(other)
+
+    def __le__(self, other: object) -> bool:
+        return self.as_tuple() <= self._key(other)
+
+    @classmethod
+    def parse(cls, representation: str) -> "ImplVer":
+        """Parse a pyenv version name for an alternative implementation."""
+        if m := cls.RE_IMPLVER.match(representation):
+            return cls(
+                m.group("impl").lower(),
+                int(m.group("major")),
+                int(m.group("minor")),
+                int(m.group("patch")),
+                m.group("prerelease") or "",
+                lang=m.group("lang") or "",
+            )
+
+        raise ValueError(f"Invalid implementation version: {representation}")
+
+
+def _build_parser_index() -> Dict[str, List[Tuple[str, Callable[[str], PyVer]]]]:
+    index: Dict[str, List[Tuple[str, Callable[[str], PyVer]]]] = {
+        d: [("", PyVer.parse)] for d in "0123456789"
+    }
+    for impl in IMPLEMENTATIONS:
+        index.setdefault(impl[0], []).append((impl, ImplVer.parse))
+    return index
+
+
+# Candidate parsers, indexed by the first character of a version name
+VERSION_PARSERS = _build_parser_index()
+
+
+def version_parser(ident: str) -> Optional[Callable[[str], PyVer]]:
+    """
+    Find the parser for a pyenv version name, without parsing it.
+
+    Returns `None` for names which are not modelled, such as Anaconda
+    distributions or virtualenvs.
+    """
+    for prefix, parser in VERSION_PARSERS.get(ident[:1].lower(), []):
+        if ident.lower().startswith(prefix):
+            return parser
+    return None
+
+
+def parse_version(ident: str) -> PyVer:
+    """Parse a pyenv version name as either a CPython or alternative version."""
+    parser = version_parser(ident)
+    if parser is None:
+        raise ValueError(f"Unknown Python implementation: {ident}")
+    return parser(ident)
+
+
 class VersionStatus(str, Enum):
     """Python version support status."""
 
@@ -166,27 +356,165 @@ VERSION_STATUS_MAPPING = {
 }
 
 
-def python_supported_versions() -> Iterable[Tuple[PyVer, VersionStatus]]:
-    """Scrape the Python website for currently supported versions."""
+def main_status(
+    main: PyVer,
+    supported_status: Dict[PyVer, VersionStatus],
+    available_versions: Iterable[PyVer],
+) -> VersionStatus:
+    """
+    Support status of a main version.
+
+    Alternative implementations have no published status, so they are
+    `UNKNOWN` while pyenv still offers a build of the main version, and
+    `UNSUPPORTED` once it no longer does.
+    """
+    if isinstance(main, ImplVer):
+        if any(v.main == main for v in available_versions):
+            return VersionStatus.UNKNOWN
+        return VersionStatus.UNSUPPORTED
+
+    return supported_status.get(main, VersionStatus.UNSUPPORTED)
+
+
+class ReleaseListParser(HTMLParser):
+    """
+    Incremental parser for the active release list on the downloads page.
+
+    Only the contents of the release list widget are collected, and `done` is
+    set as soon as the widget closes so the caller can stop reading.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.rows: List[Tuple[str, str]] = []
+        self.done = False
+        self._depth = 0
+        self._row: Dict[str, str] = {}
+        self._field: Optional[str] = None
+        self._text: List[str] = []
+
+    def handle_starttag(
+        self,
+        tag: str,
+        attrs: List[Tuple[str, Optional[str]]],
+    ) -> None:
+        """Track entry into the widget, its rows, and their fields."""
+        if self.done:
+            return
+
+        classes = (dict(attrs).get("class") or "").split()
+
+        if self._depth == 0:
+            if tag == "div" and RELEASE_LIST_CLASS in classes:
+                self._depth = 1
+            return
+
+        if tag == "div":
+            self._depth += 1
+        elif tag == "li":
+            self._row = {}
+        elif tag == "span" and self._field is None:
+            for field in RELEASE_FIELD_CLASSES:
+                if field in classes:
+                    self._field = field
+                    self._text = []
+
+    def handle_endtag(self, tag: str) -> None:
+        """Collect completed fields and rows, and detect the end of the widget."""
+        if self.done or self._depth == 0:
+            return
+
+        if tag == "span" and self._field is not None:
+            self._row[self._field] = "".join(self._text)
+            self._field = None
+        elif tag == "li":
+            if all(f in self._row for f in RELEASE_FIELD_CLASSES):
+                self.rows.append(
+                    (self._row["release-version"], self._row["release-status"]),
+                )
+            self._row = {}
+        elif tag == "div":
+            self._depth -= 1
+            self.done = self._depth == 0
+
+    def handle_data(self, data: str) -> None:
+        """Collect the text of the current field."""
+        if self._field is not None:
+            self._text.append(data)
+
+
+def _release_rows_soup() -> List[Tuple[str, str]]:
+    """Fetch the release list by building a tree of the whole downloads page."""
     rsp = requests.get(PYTHON_DOWNLOADS)
     rsp.raise_for_status()
 
     soup = BeautifulSoup(rsp.text, "html.parser")
-    div = soup.find("div", class_="active-release-list-widget")
+    div = soup.find("div", class_=RELEASE_LIST_CLASS)
     if not isinstance(div, Tag):
-        return
+        return []
+
+    return [
+        (
+            li.find("span", class_="release-version").text,
+            li.find("span", class_="release-status").text,
+        )
+        for li in div.find_all("li")
+    ]
+
+
+def _release_rows_stream() -> List[Tuple[str, str]]:
+    """Fetch the release list, reading the downloads page only until it ends."""
+    parser = ReleaseListParser()
 
-    lis = div.find_all("li")
+    with requests.get(PYTHON_DOWNLOADS, stream=True) as rsp:
+        rsp.raise_for_status()
+        decoder = codecs.getincrementaldecoder(rsp.encoding or "utf-8")("replace")
 
-    for li in lis:
-        ver = PyVer.parse(li.find("span", class_="release-version").text + ".0")
+        for chunk in rsp.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+            parser.feed(decoder.decode(chunk))
+            if parser.done:
+                break
 
-        status_text: str = li.find("span", class_="release-status").text
+    return parser.rows
+
+
+PARSER_BACKENDS: Dict[str, Callable[[], List[Tuple[str, str]]]] = {
+    "soup": _release_rows_soup,
+    "stream": _release_rows_stream,
+}
+
+
+def _supported_from_rows(
+    rows: Iterable[Tuple[str, str]],
+) -> Iterable[Tuple[PyVer, VersionStatus]]:
+    """Convert release list rows to supported versions."""
+    for version_text, status_text in rows:
+        ver = PyVer.parse(version_text.strip() + ".0")
 
         status = VERSION_STATUS_MAPPING.get(
-            status_text,
+            status_text.strip(),
             VersionStatus.UNKNOWN,
         )
 
         if status in [VersionStatus.BUGFIX, VersionStatus.SECURITY]:
             yield (ver, status)
+
+
+def python_supported_versions(
+    backend: str = "stream",
+) -> Iterable[Tuple[PyVer, VersionStatus]]:
+    """Scrape the Python website for currently supported versions."""
+    yield from _supported_from_rows(PARSER_BACKENDS[backend]())
+
+
+async def python_supported_versions_async(
+    backend: str = "stream",
+) -> List[Tuple[PyVer, VersionStatus]]:
+    """
+    Scrape the Python website for currently supported versions.
+
+    Both the fetch and the parse are run in a worker thread so the event loop
+    is never blocked.
+    """
+    rows = await asyncio.to_thread(PARSER_BACKENDS[backend])
+    return list(_supported_from_rows(rows))
@@ -0,0 +1,145 @@
+"""Offline Python support status from release-cycle dates."""
+
+import calendar
+import json
+import logging
+from datetime import date, datetime, timezone
+from importlib import resources
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+import requests
+
+from pyenvtool.pyenv import pyenv_state_dir
+from pyenvtool.python import PyVer, VersionStatus
+
+RELEASE_CYCLE_NAME = "release-cycle.json"
+RELEASE_CYCLE_URL = (
+    "https://raw.githubusercontent.com/python/devguide/main/include/release-cycle.json"
+)
+
+# Months of bugfix releases after the first release, per PEP 602. From 3.13
+# onwards the bugfix period was extended to two years.
+BUGFIX_MONTHS = 18
+BUGFIX_MONTHS_EXTENDED = 24
+
+ReleaseCycle = Dict[PyVer, Tuple[date, date]]
+
+
+def _add_months(d: date, months: int) -> date:
+    month = d.month - 1 + months
+    year = d.year + month // 12
+    month = month % 12 + 1
+    return date(year, month, min(d.day, calendar.monthrange(year, month)[1]))
+
+
+def _parse_date(text: str, end: bool = False) -> date:
+    """
+    Parse a release-cycle date, which may omit the day.
+
+    A missing day is taken as the first of the month for start dates and the
+    last of the month for end dates.
+    """
+    parts = [int(p) for p in text.split("-")]
+    if len(parts) == 2:  # noqa: PLR2004
+        year, month = parts
+        day = calendar.monthrange(year, month)[1] if end else 1
+        return date(year, month, day)
+
+    return date(*parts)
+
+
+def _release_cycle_from_json(data: Dict[str, Dict[str, str]]) -> ReleaseCycle:
+    return {
+        PyVer.parse(branch): (
+            _parse_date(info["first_release"]),
+            _parse_date(info["end_of_life"], end=True),
+        )
+        for branch, info in data.items()
+    }
+
+
+def release_cycle_path(root: Optional[Path] = None) -> Path:
+    """Location of a locally updated release-cycle dataset."""
+    return pyenv_state_dir(root) / RELEASE_CYCLE_NAME
+
+
+def load_release_cycle(root: Optional[Path] = None) -> ReleaseCycle:
+    """Load the locally updated release-cycle dataset, or the bundled one."""
+    logger = logging.getLogger(__name__)
+
+    path = release_cycle_path(root)
+    if path.exists():
+        logger.debug(f"Using release cycle from {path!s}")
+        return _release_cycle_from_json(json.loads(path.read_text(encoding="utf-8")))
+
+    bundled = resources.files("pyenvtool").joinpath(RELEASE_CYCLE_NAME)
+    return _release_cycle_from_json(json.loads(bundled.read_text(encoding="utf-8")))
+
+
+def update_release_cycle(root: Optional[Path] = None) -> int:
+    """
+    Refresh the local release-cycle dataset from the Python devguide.
+
+    Returns the number of main versions in the new dataset.
+    """
+    rsp = requests.get(RELEASE_CYCLE_URL)
+    rsp.raise_for_status()
+
+    data = {
+        branch: {
+            "first_release": info["first_release"],
+            "end_of_life": info["end_of_life"],
+        }
+        for branch, info in rsp.json().items()
+    }
+    # Fail before writing anything if the data can't be used
+    _release_cycle_from_json(data)
+
+    path = release_cycle_path(root)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+    tmp.replace(path)
+
+    return len(data)
+
+
+def release_status(
+    main: PyVer,
+    first_release: date,
+    end_of_life: date,
+    today: date,
+) -> VersionStatus:
+    """Determine the support status of a main version on a given date."""
+    if today < first_release:
+        return VersionStatus.PRERELEASE
+    if today > end_of_life:
+        return VersionStatus.UNSUPPORTED
+
+    months = BUGFIX_MONTHS_EXTENDED if main >= PyVer(3, 13) else BUGFIX_MONTHS
+    if today < _add_months(first_release, months):
+        return VersionStatus.BUGFIX
+
+    return VersionStatus.SECURITY
+
+
+def python_release_cycle_versions(
+    cycle: Optional[ReleaseCycle] = None,
+    today: Optional[date] = None,
+    root: Optional[Path] = None,
+) -> Iterable[Tuple[PyVer, VersionStatus]]:
+    """
+    Determine the currently supported versions without any network access.
+
+    Offline counterpart of `python_supported_versions`.
+    """
+    if cycle is None:
+        cycle = load_release_cycle(root)
+    if today is None:
+        today = datetime.now(timezone.utc).date()
+
+    for main, (first_release, end_of_life) in sorted(cycle.items()):
+        status = release_status(main, first_release, end_of_life, today)
+        if status in [VersionStatus.BUGFIX, VersionStatus.SECURITY]:
+            yield (main, status)
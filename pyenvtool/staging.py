@@ -0,0 +1,146 @@
+"""Build versions out of place and swap them into the live tree atomically."""
+
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Optional
+
+from pyenvtool.dedupe import run_dedupe_hook
+from pyenvtool.fs import relocate_prefix, swap_tree
+from pyenvtool.pyenv import (
+    pyenv_execute,
+    pyenv_install,
+    pyenv_rehash,
+    pyenv_root,
+    pyenv_state_dir,
+    pyenv_version_dir,
+)
+from pyenvtool.python import PyVer
+from pyenvtool.trash import delete_in_background, move_to_trash
+
+STAGING_NAME = "staging"
+STAGING_ENV = "PYENVTOOL_STAGING"
+
+
+def staging_supported() -> bool:
+    """
+    Whether builds can be moved after they have been installed.
+
+    Shared builds find `libpython` through an rpath, which can be pointed at
+    the live prefix ahead of time on ELF platforms. On macOS the library's
+    install name is fixed to the prefix it was built in.
+    """
+    return sys.platform.startswith("linux")
+
+
+def staging_root(v: PyVer, root: Optional[Path] = None) -> Path:
+    """Private pyenv root a version is built in before being swapped in."""
+    return pyenv_state_dir(root) / STAGING_NAME / str(v)
+
+
+def discard_staging_root(v: PyVer, root: Optional[Path] = None) -> bool:
+    """
+    Move a version's staging root to the trash, if there is one.
+
+    Returns `True` if a staging root was left over to be discarded.
+    """
+    stage = staging_root(v, root=root)
+    if not stage.exists():
+        return False
+
+    delete_in_background(move_to_trash(stage, root=root))
+    return True
+
+
+def staging_env(
+    live: Path,
+    staged: Path,
+    root: Optional[Path] = None,
+) -> Dict[str, str]:
+    """
+    Environment for building a version in a staging root.
+
+    The build uses the live root's install hooks, including those of its
+    plugins, which pyenv would otherwise look for in the staging root, and its
+    download cache. It links `libpython` with an rpath searching the live
+    prefix before the staged one, so the interpreter keeps working once it has
+    been moved. The rpath is added after any the user has set in `LDFLAGS`; either way
+    python-build doesn't add its own. Hooks can tell they are running for a
+    staged build from `PYENVTOOL_STAGING`.
+    """
+    env = {STAGING_ENV: "1"}
+
+    hook_path = [str(pyenv_root(root) / "pyenv.d")]
+    hook_path.extend(
+        str(p) for p in sorted(pyenv_root(root).glob("plugins/*/etc/pyenv.d"))
+    )
+    if os.environ.get("PYENV_HOOK_PATH"):
+        hook_path.append(os.environ["PYENV_HOOK_PATH"])
+    env["PYENV_HOOK_PATH"] = ":".join(hook_path)
+
+    cache = pyenv_root(root) / "cache"
+    if "PYTHON_BUILD_CACHE_PATH" not in os.environ and cache.is_dir():
+        env["PYTHON_BUILD_CACHE_PATH"] = str(cache)
+
+    rpath = f"-Wl,-rpath={live!s}/lib:{staged!s}/lib"
+    env["LDFLAGS"] = f"{os.environ.get('LDFLAGS', '')} {rpath}".strip()
+
+    return env
+
+
+def staged_install(v: PyVer, root: Optional[Path] = None) -> str:
+    """
+    Install a version without disturbing any existing installation of it.
+
+    The version is built by `pyenv install` in a private staging root, then
+    relocated and swapped into the live root with a single rename. A failed
+    build is discarded without the live tree ever being touched. Any tree it
+    replaced is moved to the trash. The version is complete as soon as this
+    returns; `finish_staged_install` must be called afterwards to rehash the
+    shims and run the `dedupe` hook, which is skipped during the build.
+
+    Where staging isn't supported, this is a plain `pyenv install --force`.
+    """
+    logger = logging.getLogger(__name__)
+
+    if not staging_supported():
+        return pyenv_install(v, root=root)
+
+    live = pyenv_version_dir(v, root=root)
+    stage = staging_root(v, root=root)
+    staged = stage / "versions" / str(v)
+
+    if discard_staging_root(v, root=root):
+        logger.info(f"Discarded stale staging root {stage!s}")
+    stage.mkdir(parents=True)
+
+    try:
+        out = pyenv_execute(
+            "install",
+            "--force",
+            str(v),
+            root=stage,
+            env=staging_env(live, staged, root=root),
+        )
+
+        relocate_prefix(staged, staged, live)
+        live.parent.mkdir(parents=True, exist_ok=True)
+        if swap_tree(staged, live):
+            logger.info(f"Replaced existing installation of {v!s}")
+
+    finally:
+        delete_in_background(move_to_trash(stage, root=root))
+
+    return out
+
+
+def finish_staged_install(root: Optional[Path] = None) -> None:
+    """
+    Rehash the shims and run the `dedupe` hook after a staged install.
+
+    `pyenv install` does both itself where staging isn't supported.
+    """
+    if staging_supported():
+        pyenv_rehash(root=root)
+        run_dedupe_hook(root=root)
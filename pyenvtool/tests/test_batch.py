@@ -0,0 +1,120 @@
+"""Test multi-root batch upgrades."""
+
+from pathlib import Path
+from typing import Optional
+
+import pytest
+from pytest_mock.plugin import MockerFixture
+
+from pyenvtool.batch import batch_builds, execute_batch
+from pyenvtool.fs import link_tree
+from pyenvtool.metrics import Metrics
+from pyenvtool.pyenv import Op
+from pyenvtool.python import PyVer
+
+SYSCONFIGDATA = "lib/python3.11/_sysconfigdata__linux_x86_64-linux-gnu.py"
+
+
+def fake_install(v: PyVer, root: Optional[Path] = None) -> str:
+    assert root is not None
+    prefix = root / "versions" / str(v)
+    (prefix / "bin").mkdir(parents=True)
+    (prefix / "bin" / "pip").write_text(f"#!{prefix}/bin/python\n")
+    (prefix / "lib").mkdir()
+    (prefix / "lib" / "os.py").write_text("import abc\n")
+    (prefix / "lib" / "python3.11").mkdir()
+    (prefix / SYSCONFIGDATA).write_text(f"build_time_vars = {{'prefix': '{prefix}'}}\n")
+    return ""
+
+
+def fake_shared_install(v: PyVer, root: Optional[Path] = None) -> str:
+    fake_install(v, root)
+    assert root is not None
+    (root / "versions" / str(v) / "lib" / "libpython3.11.so.1.0").write_bytes(b"\0")
+    return ""
+
+
+def test_batch_builds(tmp_path: Path) -> None:
+    a, b = tmp_path / "a", tmp_path / "b"
+
+    builds = batch_builds(
+        {
+            a: [(PyVer(3, 11, 2), Op.INSTALL), (PyVer(3, 11, 1), Op.REMOVE)],
+            b: [(PyVer(3, 11, 2), Op.INSTALL), (PyVer(3, 10, 5), Op.INSTALL)],
+        },
+    )
+
+    assert builds == {PyVer(3, 11, 2): [a, b], PyVer(3, 10, 5): [b]}
+
+
+def test_link_tree(tmp_path: Path) -> None:
+    fake_install(PyVer(3, 11, 2), tmp_path / "a")
+    src = tmp_path / "a" / "versions" / "3.11.2"
+    dst = tmp_path / "b" / "versions" / "3.11.2"
+
+    link_tree(src, dst)
+
+    assert (dst / "lib" / "os.py").samefile(src / "lib" / "os.py")
+    assert (dst / "bin" / "pip").read_text() == f"#!{dst}/bin/python\n"
+    assert (src / "bin" / "pip").read_text() == f"#!{src}/bin/python\n"
+    assert str(dst) in (dst / SYSCONFIGDATA).read_text()
+    assert str(src) in (src / SYSCONFIGDATA).read_text()
+
+
+def test_link_tree_shared(tmp_path: Path) -> None:
+    fake_shared_install(PyVer(3, 11, 2), tmp_path / "a")
+
+    with pytest.raises(ValueError, match="shared build"):
+        link_tree(
+            tmp_path / "a" / "versions" / "3.11.2",
+            tmp_path / "b" / "versions" / "3.11.2",
+        )
+
+
+def test_execute_batch(tmp_path: Path, mocker: MockerFixture) -> None:
+    a, b = tmp_path / "a", tmp_path / "b"
+    install = mocker.patch("pyenvtool.batch.staged_install", side_effect=fake_install)
+    mocker.patch("pyenvtool.batch.pyenv_rehash")
+    mocker.patch("pyenvtool.batch.finish_staged_install")
+    execute = mocker.patch("pyenvtool.batch.execute_changes")
+
+    execute_batch(
+        {
+            a: [(PyVer(3, 11, 2), Op.INSTALL), (PyVer(3, 11, 1), Op.REMOVE)],
+            b: [(PyVer(3, 11, 2), Op.INSTALL)],
+        },
+        jobs=2,
+    )
+
+    install.assert_called_once_with(PyVer(3, 11, 2), root=a)
+    assert (b / "versions" / "3.11.2" / "bin" / "pip").exists()
+    assert [c.args[0] for c in execute.call_args_list] == [
+        [(PyVer(3, 11, 1), Op.REMOVE)],
+        [],
+    ]
+
+
+def test_execute_batch_shared(tmp_path: Path, mocker: MockerFixture) -> None:
+    a, b = tmp_path / "a", tmp_path / "b"
+    install = mocker.patch(
+        "pyenvtool.batch.staged_install",
+        side_effect=fake_shared_install,
+    )
+    finish = mocker.patch("pyenvtool.batch.finish_staged_install")
+    mocker.patch("pyenvtool.batch.execute_changes")
+    registry = Metrics()
+    mocker.patch("pyenvtool.metrics.metrics", registry)
+
+    execute_batch(
+        {a: [(PyVer(3, 11, 2), Op.INSTALL)], b: [(PyVer(3, 11, 2), Op.INSTALL)]},
+    )
+
+    assert install.call_args_list == [
+        mocker.call(PyVer(3, 11, 2), root=a),
+        mocker.call(PyVer(3, 11, 2), root=b),
+    ]
+    assert finish.call_args_list == [mocker.call(root=a), mocker.call(root=b)]
+    assert sorted(registry.values["pyenvtool_build_duration_seconds"]) == [
+        (("root", str(a)), ("version", "3.11.2")),
+        (("root", str(b)), ("version", "3.11.2")),
+    ]
@@ -1,7 +1,20 @@
 """Test `pyenvtool` package CLI tests."""
+import fcntl
+import json
+import logging
+from pathlib import Path
+
+import pytest
 from click.testing import CliRunner
+from pytest_mock.plugin import MockerFixture
 
+from pyenvtool import print_changes, print_version_report
 from pyenvtool.__main__ import cli_main
+from pyenvtool.cli import console_print, emit_event, set_output_format, setup_logging
+from pyenvtool.lock import LOCK_NAME
+from pyenvtool.plan import Plan
+from pyenvtool.pyenv import STATE_DIR_NAME, Op
+from pyenvtool.python import PyVer, VersionStatus
 
 
 def test_cli_click() -> None:
@@ -16,3 +29,158 @@ def test_cli_click() -> None:
     assert help_result.exit_code == 0
     assert "--help" in help_result.output
     assert "Show this message and exit." in help_result.output
+
+
+def test_cli_ndjson(capsys: pytest.CaptureFixture) -> None:
+    set_output_format("ndjson")
+    try:
+        console_print("Version Report:")
+        print_changes([(PyVer(3, 11, 2), Op.INSTALL), (PyVer(3, 11, 1), Op.REMOVE)])
+    finally:
+        set_output_format("text")
+
+    events = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+    assert [(e["event"], e["version"], e["op"]) for e in events] == [
+        ("delta", "3.11.2", "INSTALL"),
+        ("delta", "3.11.1", "REMOVE"),
+    ]
+
+
+def test_print_changes_kept(capsys: pytest.CaptureFixture) -> None:
+    deltas = [(PyVer(3, 11, 1), Op.KEEP), (PyVer(3, 10, 4), Op.KEEP)]
+
+    print_changes(deltas, venv_held=[PyVer(3, 10, 4)])
+    assert capsys.readouterr().out.splitlines() == [
+        f"  = Keep    {PyVer(3, 11, 1).fixed_width} (pinned)",
+        f"  = Keep    {PyVer(3, 10, 4).fixed_width} (has venvs)",
+    ]
+
+    set_output_format("ndjson")
+    try:
+        print_changes(deltas, venv_held=[PyVer(3, 10, 4)])
+    finally:
+        set_output_format("text")
+
+    events = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [(e["version"], e["reason"]) for e in events] == [
+        ("3.11.1", "pinned"),
+        ("3.10.4", "venv"),
+    ]
+
+
+def test_cli_ndjson_logging(
+    capsys: pytest.CaptureFixture,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(logging.root, "handlers", [])
+    monkeypatch.setattr(logging.root, "level", logging.root.level)
+    set_output_format("ndjson")
+    try:
+        setup_logging(1)
+        logging.getLogger(__name__).warning("Something went wrong")
+        emit_event("delta", version="3.11.2", op="INSTALL")
+    finally:
+        set_output_format("text")
+
+    out, err = capsys.readouterr()
+    assert [json.loads(line)["event"] for line in out.splitlines()] == ["delta"]
+    assert "Something went wrong" in err
+
+
+def test_cli_text(capsys: pytest.CaptureFixture) -> None:
+    emit_event("delta", version="3.11.2", op="INSTALL")
+
+    assert capsys.readouterr().out == ""
+
+
+def test_version_report_not_installed(capsys: pytest.CaptureFixture) -> None:
+    set_output_format("ndjson")
+    try:
+        print_version_report(
+            {
+                PyVer(3, 12, 0): VersionStatus.BUGFIX,
+                PyVer(3, 11, 0): VersionStatus.SECURITY,
+            },
+            [PyVer(3, 12, 7), PyVer(3, 11, 9)],
+            [PyVer(3, 11, 9)],
+        )
+    finally:
+        set_output_format("text")
+
+    events = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+    assert [(e["version"], e["installed"], e["latest"]) for e in events] == [
+        ("3.11.9", True, True),
+        ("3.12.7", False, True),
+    ]
+
+
+def test_cli_exec_releases_lock(
+    tmp_path: Path,
+    mocker: MockerFixture,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("PYENV_ROOT", str(tmp_path))
+    (tmp_path / STATE_DIR_NAME).mkdir()
+    mocker.patch(
+        "pyenvtool.__main__.selected_versions",
+        return_value=[PyVer(3, 11, 2)],
+    )
+
+    def run_in_versions(*_: object, **__: object) -> list:
+        # A fanned-out `pyenvtool upgrade` must be able to lock the root
+        with (tmp_path / ".pyenvtool" / LOCK_NAME).open("a") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return []
+
+    mocker.patch("pyenvtool.__main__.run_in_versions", side_effect=run_in_versions)
+
+    result = CliRunner().invoke(cli_main, ["exec", "--", "true"])
+
+    assert result.exit_code == 0, result.output
+
+
+@pytest.mark.parametrize("command", ["apply", "upgrade"])
+def test_cli_dry_run_no_state_dir(
+    tmp_path: Path,
+    mocker: MockerFixture,
+    monkeypatch: pytest.MonkeyPatch,
+    command: str,
+) -> None:
+    root = tmp_path / "root"
+    (root / "versions").mkdir(parents=True)
+    (tmp_path / "venvs").mkdir()
+    monkeypatch.setenv("PYENV_ROOT", str(root))
+
+    installed = [PyVer(3, 11, 1)]
+    supported = {PyVer(3, 11): VersionStatus.BUGFIX}
+    available = [PyVer(3, 11, 1), PyVer(3, 11, 2)]
+    mocker.patch("pyenvtool.pyenv_update")
+    mocker.patch(
+        "pyenvtool.python_release_cycle_versions",
+        return_value=supported.items(),
+    )
+    mocker.patch("pyenvtool.pyenv_available_versions", return_value=available)
+    mocker.patch("pyenvtool.pyenv_installed_versions", return_value=installed)
+    mocker.patch("pyenvtool.__main__.pyenv_installed_versions", return_value=installed)
+    execute = mocker.patch("pyenvtool.__main__.execute_changes")
+
+    plan_file = tmp_path / "plan.json"
+    Plan([(PyVer(3, 11, 2), Op.INSTALL)], supported, available, installed).dump(
+        plan_file,
+    )
+    args = {
+        "apply": ["apply", "--dry-run", str(plan_file)],
+        "upgrade": ["upgrade", "--dry-run", "--protect-pinned", str(tmp_path)],
+    }[command]
+
+    result = CliRunner().invoke(
+        cli_main,
+        [*args, "--venv-dir", str(tmp_path / "venvs")],
+    )
+
+    assert result.exit_code == 0, result.output
+    assert "Install" in result.output
+    execute.assert_not_called()
+    assert not (root / STATE_DIR_NAME).exists()
@@ -0,0 +1,103 @@
+"""Test the resident daemon."""
+
+import asyncio
+import socket
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import pytest
+from pytest_mock.plugin import MockerFixture
+
+from pyenvtool.daemon import DaemonState, daemon_request, daemon_socket_path, serve
+from pyenvtool.plan import Plan
+from pyenvtool.pyenv import Op
+from pyenvtool.python import PyVer, VersionStatus
+
+
+def mock_discovery(mocker: MockerFixture) -> None:
+    mocker.patch(
+        "pyenvtool.daemon.python_release_cycle_versions",
+        return_value=[(PyVer(3, 11), VersionStatus.BUGFIX)],
+    )
+    mocker.patch(
+        "pyenvtool.daemon.pyenv_available_versions_async",
+        return_value=[PyVer(3, 11, 1), PyVer(3, 11, 2), PyVer(3, 12, 0, "dev")],
+    )
+    mocker.patch(
+        "pyenvtool.daemon.pyenv_installed_versions_async",
+        return_value=[PyVer(3, 11, 1)],
+    )
+
+
+def test_daemon_state(mocker: MockerFixture) -> None:
+    mock_discovery(mocker)
+    state = DaemonState()
+    asyncio.run(state.refresh())
+
+    plan = Plan.from_dict(state.handle({"command": "plan", "keep_bugfix": True}))
+
+    assert plan.deltas == [(PyVer(3, 11, 2), Op.INSTALL)]
+    assert "error" in state.handle({"command": "bogus"})
+
+
+def test_daemon_no_daemon(tmp_path: Path) -> None:
+    assert daemon_request({"command": "status"}, root=tmp_path) is None
+
+
+def fake_daemon(root: Path, reply: bytes) -> threading.Thread:
+    path = daemon_socket_path(root)
+    path.parent.mkdir()
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(str(path))
+    server.listen(1)
+
+    def run() -> None:
+        with server, server.accept()[0] as conn:
+            conn.recv(65536)
+            conn.sendall(reply)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+@pytest.mark.parametrize("reply", [b"", b"not json\n", b"[]\n"])
+def test_daemon_invalid_reply(tmp_path: Path, reply: bytes) -> None:
+    thread = fake_daemon(tmp_path, reply)
+
+    assert daemon_request({"command": "status"}, root=tmp_path) is None
+    thread.join()
+
+
+def test_daemon_error_reply(tmp_path: Path) -> None:
+    thread = fake_daemon(tmp_path, b'{"error": "Unknown command"}\n')
+
+    with pytest.raises(ValueError, match="Unknown command"):
+        daemon_request({"command": "status"}, root=tmp_path)
+    thread.join()
+
+
+def test_daemon_serve(tmp_path: Path, mocker: MockerFixture) -> None:
+    mock_discovery(mocker)
+    (tmp_path / "versions").mkdir()
+
+    async def run() -> Optional[Dict[str, Any]]:
+        task = asyncio.create_task(serve(root=tmp_path))
+        while not daemon_socket_path(tmp_path).exists():
+            await asyncio.sleep(0.01)
+
+        try:
+            return await asyncio.to_thread(
+                daemon_request,
+                {"command": "status"},
+                root=tmp_path,
+            )
+        finally:
+            task.cancel()
+
+    response = asyncio.run(run())
+
+    assert response is not None
+    assert response["installed"] == ["3.11.1"]
+    assert response["deltas"] == [["3.11.2", "INSTALL"], ["3.11.1", "REMOVE"]]
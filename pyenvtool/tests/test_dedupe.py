@@ -0,0 +1,121 @@
+"""Test deduplication of installed versions."""
+
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+from pytest_mock.plugin import MockerFixture
+
+from pyenvtool.dedupe import (
+    HashCache,
+    dedupe_hook_path,
+    dedupe_versions,
+    install_dedupe_hook,
+    run_dedupe_hook,
+)
+
+VERSIONS = ("3.11.1", "3.11.2", "3.12.0")
+SOURCES = {"os.py": "import abc\n", "empty.py": ""}
+MTIME_NS = 1_700_000_000_000_000_000
+
+
+@pytest.fixture
+def versions(tmp_path: Path) -> Path:
+    for v in VERSIONS:
+        lib = tmp_path / "versions" / v / "lib"
+        lib.mkdir(parents=True)
+        for name, text in {**SOURCES, "version.py": f"VERSION = {v!r}\n"}.items():
+            (lib / name).write_text(text)
+            os.utime(lib / name, ns=(MTIME_NS, MTIME_NS))
+    return tmp_path / "versions"
+
+
+def test_dedupe(versions: Path, tmp_path: Path) -> None:
+    cache = HashCache(tmp_path / "cache.json")
+
+    stats = dedupe_versions(versions, cache, jobs=2)
+
+    assert stats.files == len(VERSIONS) * (len(SOURCES) + 1)
+    assert stats.duplicates == len(VERSIONS) - 1
+    assert stats.bytes_saved == (len(VERSIONS) - 1) * len("import abc\n")
+    assert (versions / "3.11.1/lib/os.py").samefile(versions / "3.12.0/lib/os.py")
+    assert not (versions / "3.11.1/lib/version.py").samefile(
+        versions / "3.11.2/lib/version.py",
+    )
+    assert not (versions / "3.11.1/lib/empty.py").samefile(
+        versions / "3.11.2/lib/empty.py",
+    )
+
+
+def test_dedupe_mtime(versions: Path, tmp_path: Path) -> None:
+    # Each `make install` stamps its sources with its own time
+    os.utime(versions / "3.12.0/lib/os.py", ns=(MTIME_NS, MTIME_NS + 1))
+
+    stats = dedupe_versions(versions, HashCache(tmp_path / "cache.json"))
+
+    assert stats.duplicates == len(VERSIONS) - 1
+    assert (versions / "3.11.1/lib/os.py").samefile(versions / "3.12.0/lib/os.py")
+
+
+def test_dedupe_reflink(
+    versions: Path,
+    tmp_path: Path,
+    mocker: MockerFixture,
+) -> None:
+    mocker.patch("pyenvtool.dedupe.reflink", side_effect=shutil.copyfile)
+    before = {v: (versions / v / "lib/os.py").stat() for v in VERSIONS}
+
+    stats = dedupe_versions(
+        versions,
+        HashCache(tmp_path / "cache.json"),
+        use_reflink=True,
+    )
+
+    after = {v: (versions / v / "lib/os.py").stat() for v in VERSIONS}
+    assert stats.duplicates == len(VERSIONS) - 1
+    assert sum(after[v].st_ino != before[v].st_ino for v in VERSIONS) == (
+        stats.duplicates
+    )
+    assert all(st.st_mtime_ns == MTIME_NS for st in after.values())
+
+
+def test_dedupe_cache(versions: Path, tmp_path: Path) -> None:
+    cache = HashCache(tmp_path / "cache.json")
+    dedupe_versions(versions, cache, dry_run=True)
+    cache.save()
+
+    stats = dedupe_versions(versions, HashCache(tmp_path / "cache.json"))
+
+    assert stats.hashed == 0
+    assert stats.cache_hits == len(VERSIONS) * len(SOURCES)
+    assert stats.duplicates == len(VERSIONS) - 1
+
+
+def test_dedupe_hook(tmp_path: Path) -> None:
+    path = install_dedupe_hook(root=tmp_path)
+
+    assert path == dedupe_hook_path(root=tmp_path)
+    assert "after_install pyenvtool_dedupe" in path.read_text()
+
+
+def test_run_dedupe_hook(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    for v in ("3.11.1", "3.11.2"):
+        lib = tmp_path / "versions" / v / "lib"
+        lib.mkdir(parents=True)
+        (lib / "data.txt").write_text("data\n")
+    a = tmp_path / "versions" / "3.11.1" / "lib" / "data.txt"
+    b = tmp_path / "versions" / "3.11.2" / "lib" / "data.txt"
+
+    run_dedupe_hook(root=tmp_path)
+    assert not a.samefile(b)
+
+    install_dedupe_hook(root=tmp_path)
+
+    monkeypatch.setenv("PYENVTOOL_STAGING", "1")
+    run_dedupe_hook(root=tmp_path)
+    assert not a.samefile(b)
+
+    monkeypatch.delenv("PYENVTOOL_STAGING")
+    run_dedupe_hook(root=tmp_path)
+    assert a.samefile(b)
@@ -6,7 +6,13 @@ import pytest
 
 from pyenvtool import calculate_changes
 from pyenvtool.pyenv import Op
-from pyenvtool.python import PyVer
+from pyenvtool.python import ImplVer, PyVer
+
+PYPY_39_16 = ImplVer("pypy", 7, 3, 16, lang="3.9")
+PYPY_39_17 = ImplVer("pypy", 7, 3, 17, lang="3.9")
+PYPY_310_16 = ImplVer("pypy", 7, 3, 16, lang="3.10")
+PYPY_310_17 = ImplVer("pypy", 7, 3, 17, lang="3.10")
+PYPY_311_17 = ImplVer("pypy", 7, 3, 17, lang="3.11")
 
 
 @pytest.mark.parametrize(
@@ -109,6 +115,67 @@ from pyenvtool.python import PyVer
             ],
             id="unsupported_bugfix_remove_all",
         ),
+        pytest.param(
+            [PyVer(3, 10)],
+            [PyVer(3, 10, 5), PYPY_310_17, PYPY_39_17],
+            [PyVer(3, 10, 5), PYPY_310_16],
+            False,
+            False,
+            [
+                (PYPY_310_17, Op.INSTALL),
+                (PYPY_310_16, Op.REMOVE),
+            ],
+            id="implementation_upgrade_replace",
+        ),
+        pytest.param(
+            [PyVer(3, 10)],
+            [PyVer(3, 10, 5), PYPY_310_17],
+            [PyVer(3, 10, 5), PYPY_310_16],
+            True,
+            False,
+            [
+                (PYPY_310_17, Op.INSTALL),
+            ],
+            id="implementation_upgrade_keep",
+        ),
+        pytest.param(
+            [PyVer(3, 10)],
+            [PyVer(3, 10, 5), PYPY_310_17],
+            [PyVer(3, 10, 5), PYPY_39_16, PYPY_39_17],
+            False,
+            False,
+            [
+                (PYPY_310_17, Op.INSTALL),
+                (PYPY_39_16, Op.REMOVE),
+            ],
+            id="implementation_unavailable_bugfix_remove",
+        ),
+        pytest.param(
+            [PyVer(3, 10)],
+            [PyVer(3, 10, 5), PYPY_310_17],
+            [PyVer(3, 10, 5), PYPY_39_17],
+            False,
+            True,
+            [
+                (PYPY_310_17, Op.INSTALL),
+                (PYPY_39_17, Op.REMOVE),
+            ],
+            id="implementation_unavailable_minor_remove",
+        ),
+        pytest.param(
+            [PyVer(3, 10)],
+            [PyVer(3, 10, 5), PYPY_311_17, PYPY_310_17, PYPY_39_17],
+            [PyVer(3, 10, 5), PYPY_310_16, PYPY_39_17],
+            False,
+            True,
+            [
+                (PYPY_311_17, Op.INSTALL),
+                (PYPY_310_17, Op.INSTALL),
+                (PYPY_310_16, Op.REMOVE),
+                (PYPY_39_17, Op.REMOVE),
+            ],
+            id="implementation_old_line_remove",
+        ),
     ],
 )
 def test_delta(  # noqa: PLR0913
@@ -0,0 +1,66 @@
+"""Test running commands and benchmarks across interpreters."""
+
+import sys
+from pathlib import Path
+
+from pyenvtool.fanout import (
+    bench_command,
+    interpreter_env,
+    parse_bench,
+    run_in_versions,
+    select_versions,
+)
+from pyenvtool.python import ImplVer, PyVer
+
+
+def test_select_versions() -> None:
+    installed = [
+        PyVer(3, 10, 1),
+        PyVer(3, 11, 1),
+        PyVer(3, 11, 2),
+        ImplVer("pypy", 7, 3, 17, lang="3.10"),
+    ]
+
+    assert select_versions(installed) == sorted(installed, reverse=True)
+    assert select_versions(installed, ["3.11"]) == [PyVer(3, 11, 2), PyVer(3, 11, 1)]
+    assert select_versions(installed, ["3.1"]) == []
+    assert set(select_versions(installed, ["3.10.1", "pypy3.10"])) == {
+        PyVer(3, 10, 1),
+        ImplVer("pypy", 7, 3, 17, lang="3.10"),
+    }
+
+
+def test_interpreter_env(tmp_path: Path) -> None:
+    env = interpreter_env(PyVer(3, 11, 2), root=tmp_path)
+
+    assert env["PATH"].startswith(str(tmp_path / "versions" / "3.11.2" / "bin"))
+    assert env["PYENV_VERSION"] == "3.11.2"
+
+
+def test_run_in_versions(tmp_path: Path) -> None:
+    versions = [PyVer(3, 11, 2), PyVer(3, 10, 1)]
+    cmd = [sys.executable, "-c", "import os; print(os.environ['PYENV_VERSION'])"]
+
+    results = run_in_versions(versions, cmd, root=tmp_path, jobs=2)
+
+    assert [r.version for r in results] == versions
+    assert [r.stdout for r in results] == ["3.11.2\n", "3.10.1\n"]
+    assert all(r.ok for r in results)
+
+    missing = run_in_versions(versions[:1], ["no-such-command"], root=tmp_path)
+    assert not missing[0].ok
+
+
+def test_bench(tmp_path: Path) -> None:
+    cmd = bench_command({"noop": ("x = 1", "x + 1")}, repeat=1)
+    cmd[0] = sys.executable
+
+    (result,) = run_in_versions([PyVer(3, 11, 2)], cmd, root=tmp_path)
+    timings = parse_bench(result)
+
+    assert timings is not None
+    assert list(timings) == ["noop"]
+    assert timings["noop"] > 0
+
+    assert parse_bench(result._replace(returncode=1)) is None
+    assert parse_bench(result._replace(stdout="")) is None
@@ -0,0 +1,132 @@
+"""Test the operation journal."""
+
+from pathlib import Path
+
+import pytest
+from pytest_mock.plugin import MockerFixture
+
+from pyenvtool import abandon_changes, resume_changes
+from pyenvtool.journal import Journal
+from pyenvtool.pyenv import Op
+from pyenvtool.python import PyVer
+from pyenvtool.staging import staging_root
+from pyenvtool.trash import wait_for_deletions
+
+DELTAS = [
+    (PyVer(3, 11, 2), Op.INSTALL),
+    (PyVer(3, 10, 5), Op.INSTALL),
+    (PyVer(3, 10, 4), Op.REMOVE),
+]
+
+
+def test_journal_no_run(tmp_path: Path) -> None:
+    journal = Journal(tmp_path / "journal")
+
+    assert journal.remaining() is None
+    assert journal.interrupted() == []
+
+
+def test_journal_interrupted(tmp_path: Path) -> None:
+    journal = Journal(tmp_path / "journal")
+    journal.start(DELTAS)
+    journal.begin(PyVer(3, 11, 2), Op.INSTALL)
+    journal.done(PyVer(3, 11, 2), Op.INSTALL)
+    journal.begin(PyVer(3, 10, 5), Op.INSTALL)
+
+    with journal.path.open("a") as f:
+        f.write('{"event": "do')
+
+    assert journal.remaining() == DELTAS[1:]
+    assert journal.interrupted() == [(PyVer(3, 10, 5), Op.INSTALL)]
+
+    journal.complete()
+    assert journal.remaining() is None
+
+
+def test_resume_changes(
+    tmp_path: Path,
+    mocker: MockerFixture,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("PYENV_ROOT", str(tmp_path))
+    mocker.patch("pyenvtool.staging_supported", return_value=False)
+    partial = tmp_path / "versions" / "3.10.5"
+    (partial / "bin").mkdir(parents=True)
+    execute = mocker.patch("pyenvtool.execute_changes")
+
+    journal = Journal(tmp_path / "journal")
+    journal.start(DELTAS)
+    journal.begin(PyVer(3, 11, 2), Op.INSTALL)
+    journal.done(PyVer(3, 11, 2), Op.INSTALL)
+    journal.begin(PyVer(3, 10, 5), Op.INSTALL)
+
+    assert resume_changes(journal)
+    assert not partial.exists()
+    execute.assert_called_once_with(
+        DELTAS[1:],
+        journal,
+        root=None,
+        precompile=False,
+    )
+
+
+def test_resume_changes_staged(
+    tmp_path: Path,
+    mocker: MockerFixture,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("PYENV_ROOT", str(tmp_path))
+    mocker.patch("pyenvtool.staging_supported", return_value=True)
+    live = tmp_path / "versions" / "3.10.5"
+    (live / "bin").mkdir(parents=True)
+    stage = staging_root(PyVer(3, 10, 5))
+    (stage / "versions" / "3.10.5").mkdir(parents=True)
+    mocker.patch("pyenvtool.execute_changes")
+
+    journal = Journal(tmp_path / "journal")
+    journal.start(DELTAS)
+    journal.begin(PyVer(3, 10, 5), Op.INSTALL)
+
+    assert resume_changes(journal)
+    wait_for_deletions()
+    assert live.exists()
+    assert not stage.exists()
+
+
+def test_resume_changes_different_plan(
+    tmp_path: Path,
+    mocker: MockerFixture,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("PYENV_ROOT", str(tmp_path))
+    mocker.patch("pyenvtool.staging_supported", return_value=False)
+    partial = tmp_path / "versions" / "3.10.5"
+    (partial / "bin").mkdir(parents=True)
+    execute = mocker.patch("pyenvtool.execute_changes")
+
+    journal = Journal(tmp_path / "journal")
+    journal.start(DELTAS, fingerprint="old", options={"keep_bugfix": False})
+    journal.begin(PyVer(3, 10, 5), Op.INSTALL)
+
+    assert journal.matches("old", {"keep_bugfix": False})
+    assert not journal.matches("new")
+    assert not journal.matches(options={"keep_bugfix": True})
+
+    assert not resume_changes(journal, fingerprint="new")
+    assert not partial.exists()
+    assert journal.remaining() is None
+    execute.assert_not_called()
+
+
+def test_abandon_changes(tmp_path: Path) -> None:
+    journal = Journal(tmp_path / "journal")
+    assert not abandon_changes(journal, root=tmp_path)
+
+    journal.start(DELTAS)
+    journal.begin(PyVer(3, 11, 2), Op.INSTALL)
+
+    assert abandon_changes(journal, dry_run=True, root=tmp_path)
+    assert journal.remaining() == DELTAS
+
+    assert abandon_changes(journal, root=tmp_path)
+    assert journal.remaining() is None
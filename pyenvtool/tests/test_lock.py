@@ -0,0 +1,67 @@
+"""Test locking and result sharing between invocations."""
+
+import fcntl
+import json
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from pyenvtool.lock import LOCK_ENV, RootLock, coalesce
+from pyenvtool.pyenv import STATE_DIR_NAME
+
+
+def try_lock(path: Path, mode: int) -> bool:
+    with path.open("a") as f:
+        try:
+            fcntl.flock(f.fileno(), mode | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        return True
+
+
+def test_lock_modes(tmp_path: Path) -> None:
+    with RootLock(tmp_path, exclusive=True) as lock:
+        assert not try_lock(lock.path, fcntl.LOCK_SH)
+        assert str(lock.path) in os.environ[LOCK_ENV]
+
+    assert try_lock(lock.path, fcntl.LOCK_EX)
+    assert LOCK_ENV not in os.environ
+
+    with RootLock(tmp_path) as lock:
+        assert try_lock(lock.path, fcntl.LOCK_SH)
+        assert not try_lock(lock.path, fcntl.LOCK_EX)
+
+
+def test_lock_shared_no_state_dir(tmp_path: Path) -> None:
+    with RootLock(tmp_path):
+        pass
+
+    assert not (tmp_path / STATE_DIR_NAME).exists()
+
+
+def test_lock_held_by_parent(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    with RootLock(tmp_path, exclusive=True) as lock:
+        monkeypatch.setenv(LOCK_ENV, str(lock.path))
+
+        # Would block forever if the lock were taken again
+        with RootLock(tmp_path, exclusive=True):
+            pass
+
+
+def test_coalesce(tmp_path: Path) -> None:
+    calls = []
+
+    def compute() -> dict:
+        calls.append(1)
+        return {"value": len(calls)}
+
+    assert coalesce("test", compute, root=tmp_path) == ({"value": 1}, False)
+    assert coalesce("test", compute, root=tmp_path) == ({"value": 2}, False)
+
+    # Written by another invocation while this one was waiting for the lock
+    state = tmp_path / ".pyenvtool" / "test.json"
+    state.write_text(json.dumps({"time": time.time() + 60, "data": {"value": 0}}))
+    assert coalesce("test", compute, root=tmp_path) == ({"value": 0}, True)
@@ -0,0 +1,96 @@
+"""Test the Prometheus textfile metrics."""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from pyenvtool import metrics as metrics_module
+from pyenvtool.metrics import Metrics, record_cache, record_versions, tree_size
+from pyenvtool.pyenv import Op
+from pyenvtool.python import PyVer, VersionStatus
+
+
+@pytest.fixture
+def metrics(monkeypatch: pytest.MonkeyPatch) -> Metrics:
+    registry = Metrics()
+    monkeypatch.setattr(metrics_module, "metrics", registry)
+    return registry
+
+
+def test_metrics_render() -> None:
+    registry = Metrics()
+    registry.set("versions_bytes", 1024, "Bytes.", root='/a "b"')
+    registry.set("last_run_success", 1, "Success.")
+
+    assert registry.render() == (
+        "# HELP pyenvtool_last_run_success Success.\n"
+        "# TYPE pyenvtool_last_run_success gauge\n"
+        "pyenvtool_last_run_success 1\n"
+        "# HELP pyenvtool_versions_bytes Bytes.\n"
+        "# TYPE pyenvtool_versions_bytes gauge\n"
+        'pyenvtool_versions_bytes{root="/a \\"b\\""} 1024\n'
+    )
+
+
+def test_metrics_write(tmp_path: Path) -> None:
+    path = tmp_path / "pyenvtool.prom"
+
+    Metrics().write(path, success=True)
+    first = path.read_text()
+    assert "pyenvtool_last_run_success 1" in first
+
+    Metrics().write(path, success=False)
+    second = path.read_text()
+    assert "pyenvtool_last_run_success 0" in second
+
+    last_success = [
+        line for line in first.splitlines() if line.startswith("pyenvtool_last_success")
+    ]
+    assert last_success
+    assert last_success[0] in second
+    assert os.listdir(tmp_path) == ["pyenvtool.prom"]
+
+
+def test_record_versions(metrics: Metrics) -> None:
+    installed = [PyVer(3, 11, 1), PyVer(3, 11, 2), PyVer(3, 7, 9)]
+
+    record_versions(
+        Path("/root"),
+        {PyVer(3, 11): VersionStatus.BUGFIX},
+        [PyVer(3, 11, 2), PyVer(3, 7, 9)],
+        installed,
+        [(PyVer(3, 11, 1), Op.REMOVE)],
+    )
+
+    values = metrics.values
+    py311 = (("main", "3.11"), ("root", "/root"))
+    py37 = (("main", "3.7"), ("root", "/root"))
+    assert values["pyenvtool_installed_versions"][py311] == len(
+        [v for v in installed if v.main == PyVer(3, 11)],
+    )
+    assert values["pyenvtool_outdated_versions"][py311] == 1
+    assert values["pyenvtool_unsupported_versions"][py311] == 0
+    assert values["pyenvtool_unsupported_versions"][py37] == 1
+    remove = (("op", "remove"), ("root", "/root"))
+    assert values["pyenvtool_planned_changes"][remove] == 1
+
+
+def test_record_cache(metrics: Metrics) -> None:
+    record_cache("discovery", hit=False)
+    record_cache("discovery", hit=True)
+    record_cache("discovery", hit=True)
+
+    ratio = metrics.values["pyenvtool_cache_hit_ratio"][(("cache", "discovery"),)]
+    assert ratio == pytest.approx(2 / 3)
+
+
+def test_tree_size(tmp_path: Path) -> None:
+    a, b = b"x" * 100, b"y" * 10
+    (tmp_path / "a").write_bytes(a)
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "b").write_bytes(b)
+    os.link(tmp_path / "a", tmp_path / "sub" / "c")
+
+    # The hardlink to `a` is only counted once
+    assert tree_size(tmp_path) == len(a) + len(b)
@@ -0,0 +1,94 @@
+"""Test scanning project trees for pinned versions."""
+
+import os
+from pathlib import Path
+
+from pytest_mock.plugin import MockerFixture
+
+import pyenvtool.pins
+from pyenvtool import calculate_changes
+from pyenvtool.pins import PIN_INDEX_NAME, PinIndex, pinned_versions, scan_pins
+from pyenvtool.pyenv import Op
+from pyenvtool.python import PyVer
+
+
+def make_tree(tmp_path: Path) -> Path:
+    projects = tmp_path / "projects"
+    (projects / "a").mkdir(parents=True)
+    (projects / "a" / ".python-version").write_text("3.10.1\n")
+    (projects / "b" / "deep" / "c").mkdir(parents=True)
+    (projects / "b" / "deep" / "c" / ".python-version").write_text("3.9\n3.11.2\n")
+    (projects / "b" / ".gitignore").write_text("build/\n/vendored\n")
+    (projects / "b" / "build").mkdir()
+    (projects / "b" / "build" / ".python-version").write_text("3.8.0\n")
+    (projects / "b" / "vendored").mkdir()
+    (projects / "b" / "vendored" / ".python-version").write_text("3.7.0\n")
+    return projects
+
+
+def test_scan_pins(tmp_path: Path) -> None:
+    root = tmp_path / "root"
+    projects = make_tree(tmp_path)
+
+    assert scan_pins([projects], root=root) == {"3.10.1", "3.9", "3.11.2"}
+
+    tree = PinIndex(root / ".pyenvtool" / PIN_INDEX_NAME).trees[str(projects)]
+    assert isinstance(tree, list)
+    assert tree[1]["b"][1]["deep"] is not None
+    assert tree[1]["b"][1]["build"] is None
+
+
+def test_scan_pins_rescan(tmp_path: Path) -> None:
+    root = tmp_path / "root"
+    projects = make_tree(tmp_path)
+    scan_pins([projects], root=root)
+
+    # Edited in place, which leaves the directory's mtime unchanged
+    pin = projects / "a" / ".python-version"
+    mtime = (projects / "a").stat().st_mtime_ns
+    pin.write_text("3.10.2\n")
+    os.utime(pin, ns=(mtime + 10**9, mtime + 10**9))
+    assert (projects / "a").stat().st_mtime_ns == mtime
+
+    (projects / "b" / "deep" / "c" / ".python-version").unlink()
+
+    assert scan_pins([projects], root=root) == {"3.10.2"}
+
+
+def test_scan_pins_warm(tmp_path: Path, mocker: MockerFixture) -> None:
+    root = tmp_path / "root"
+    projects = make_tree(tmp_path)
+    scan_pins([projects], root=root)
+    index = (root / ".pyenvtool" / PIN_INDEX_NAME).stat()
+
+    scandir = mocker.spy(os, "scandir")
+    read_text = mocker.spy(pyenvtool.pins, "_read_text")
+
+    assert scan_pins([projects], root=root) == {"3.10.1", "3.9", "3.11.2"}
+    scandir.assert_not_called()
+    read_text.assert_not_called()
+    assert (root / ".pyenvtool" / PIN_INDEX_NAME).stat().st_ino == index.st_ino
+
+
+def test_pinned_versions() -> None:
+    installed = [PyVer(3, 9, 1), PyVer(3, 9, 2), PyVer(3, 10, 1), PyVer(3, 11, 1)]
+
+    assert pinned_versions(["3.9", "3.10.1", "3.12.0", "system"], installed) == {
+        PyVer(3, 9, 2),
+        PyVer(3, 10, 1),
+    }
+
+
+def test_pinned_versions_keep() -> None:
+    changes = calculate_changes(
+        [PyVer(3, 10)],
+        [PyVer(3, 10, 5)],
+        [PyVer(3, 10, 0), PyVer(3, 10, 1)],
+        protected_versions=[PyVer(3, 10, 1)],
+    )
+
+    assert sorted(changes) == [
+        (PyVer(3, 10, 0), Op.REMOVE),
+        (PyVer(3, 10, 1), Op.KEEP),
+        (PyVer(3, 10, 5), Op.INSTALL),
+    ]
@@ -0,0 +1,97 @@
+"""Test serialized upgrade plans."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from pyenvtool import calculate_changes
+from pyenvtool.plan import Plan
+from pyenvtool.pyenv import Op
+from pyenvtool.python import PyVer, VersionStatus
+
+SUPPORTED = {
+    PyVer(3, 11): VersionStatus.BUGFIX,
+    PyVer(3, 10): VersionStatus.SECURITY,
+}
+AVAILABLE = [PyVer(3, 10, 4), PyVer(3, 10, 5), PyVer(3, 11, 1), PyVer(3, 11, 2)]
+INSTALLED = [PyVer(3, 10, 4), PyVer(3, 11, 2)]
+
+
+def make_plan() -> Plan:
+    return Plan(
+        calculate_changes(SUPPORTED.keys(), AVAILABLE, INSTALLED),
+        SUPPORTED,
+        AVAILABLE,
+        INSTALLED,
+    )
+
+
+def test_plan_roundtrip(tmp_path: Path) -> None:
+    plan = make_plan()
+    plan.dump(tmp_path / "plan.json")
+
+    loaded = Plan.load(tmp_path / "plan.json")
+
+    assert loaded.fingerprint == plan.fingerprint
+    assert loaded.deltas == [
+        (PyVer(3, 10, 5), Op.INSTALL),
+        (PyVer(3, 10, 4), Op.REMOVE),
+    ]
+    assert loaded.latest_versions == {PyVer(3, 10, 5), PyVer(3, 11, 2)}
+
+
+def test_plan_tampered(tmp_path: Path) -> None:
+    data = make_plan().to_dict()
+    data["installed"] = ["3.10.5"]
+    (tmp_path / "plan.json").write_text(json.dumps(data))
+
+    with pytest.raises(ValueError, match="fingerprint"):
+        Plan.load(tmp_path / "plan.json")
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["[]", '"plan"', '{"format": 1, "supported": [], "deltas": []}'],
+)
+def test_plan_invalid(tmp_path: Path, text: str) -> None:
+    (tmp_path / "plan.json").write_text(text)
+
+    with pytest.raises(ValueError, match="plan"):
+        Plan.load(tmp_path / "plan.json")
+
+
+def test_plan_replan() -> None:
+    plan = make_plan()
+
+    assert plan.deltas_for(INSTALLED) == plan.deltas
+    assert plan.deltas_for([PyVer(3, 11, 1)]) == [
+        (PyVer(3, 11, 2), Op.INSTALL),
+        (PyVer(3, 11, 1), Op.REMOVE),
+        (PyVer(3, 10, 5), Op.INSTALL),
+    ]
+
+
+def test_plan_protected() -> None:
+    protected = [PyVer(3, 10, 4)]
+    plan = Plan(
+        calculate_changes(
+            SUPPORTED.keys(),
+            AVAILABLE,
+            INSTALLED,
+            protected_versions=protected,
+        ),
+        SUPPORTED,
+        AVAILABLE,
+        INSTALLED,
+        protected_versions=protected,
+    )
+
+    loaded = Plan.from_dict(plan.to_dict())
+
+    assert loaded.fingerprint != make_plan().fingerprint
+    assert loaded.deltas_for([PyVer(3, 10, 4)]) == [
+        (PyVer(3, 11, 2), Op.INSTALL),
+        (PyVer(3, 10, 5), Op.INSTALL),
+        (PyVer(3, 10, 4), Op.KEEP),
+    ]
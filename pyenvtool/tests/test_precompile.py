@@ -0,0 +1,76 @@
+"""Test bytecode precompilation."""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from pytest_mock.plugin import MockerFixture
+
+from pyenvtool.precompile import (
+    OPTIMIZATION_LEVELS,
+    precompile_commands,
+    precompile_version,
+)
+from pyenvtool.python import PyVer
+
+SOURCES = {"a.py": "A = 1\n", "b.py": '"""Docstring."""\nassert True\n'}
+
+
+def test_precompile_commands() -> None:
+    python, lib = Path("python"), Path("lib")
+
+    (modern,) = precompile_commands(python, PyVer(3, 12, 0), lib, jobs=4)
+    assert modern[:3] == ["python", "-m", "compileall"]
+    assert modern[-7:] == ["-o", "0", "-o", "1", "-o", "2", "lib"]
+    assert "checked-hash" in modern
+
+    legacy = precompile_commands(python, PyVer(3, 8, 16), lib)
+    assert [c[1] for c in legacy] == ["-m", "-O", "-OO"]
+
+    oldest = precompile_commands(python, PyVer(3, 6, 15), lib)[0]
+    assert "--invalidation-mode" not in oldest
+
+
+def test_precompile_version(tmp_path: Path) -> None:
+    v = PyVer(sys.version_info.major, sys.version_info.minor, sys.version_info.micro)
+    prefix = tmp_path / "versions" / str(v)
+    lib = prefix / "lib" / f"python{v.major}.{v.minor}"
+    lib.mkdir(parents=True)
+    for name, text in SOURCES.items():
+        (lib / name).write_text(text)
+    (prefix / "bin").mkdir()
+    (prefix / "bin" / "python").symlink_to(sys.executable)
+
+    stats = precompile_version(v, root=tmp_path, jobs=1)
+
+    assert stats.sources == len(SOURCES)
+    assert stats.compiled == len(SOURCES) * len(OPTIMIZATION_LEVELS)
+
+    # Checked hash-based bytecode, which doesn't depend on the source's mtime
+    for pyc in (lib / "__pycache__").iterdir():
+        assert pyc.read_bytes()[4:8] == (0b11).to_bytes(4, "little")
+
+
+@pytest.mark.parametrize(
+    ("returncode", "message"),
+    [(1, "failed to compile"), (-9, "exited with code -9")],
+)
+def test_precompile_version_failure(
+    tmp_path: Path,
+    mocker: MockerFixture,
+    caplog: pytest.LogCaptureFixture,
+    returncode: int,
+    message: str,
+) -> None:
+    v = PyVer(3, 12, 0)
+    (tmp_path / "versions" / str(v) / "lib" / "python3.12").mkdir(parents=True)
+    mocker.patch(
+        "pyenvtool.precompile.subprocess.run",
+        return_value=subprocess.CompletedProcess([], returncode, "", "killed"),
+    )
+
+    stats = precompile_version(v, root=tmp_path)
+
+    assert stats.compiled == 0
+    assert message in caplog.text
@@ -1,15 +1,27 @@
 """Test pyenv interaction."""
 
+import asyncio
+import shutil
+from pathlib import Path
+
+import pytest
 from pytest_mock.plugin import MockerFixture
 
-from pyenvtool.pyenv import pyenv_available_versions, pyenv_installed_versions
-from pyenvtool.python import PyVer
+from pyenvtool.pyenv import (
+    pyenv_available_versions,
+    pyenv_available_versions_async,
+    pyenv_execute_async,
+    pyenv_installed_versions,
+    pyenv_installed_versions_async,
+)
+from pyenvtool.python import ImplVer, PyVer
 
 PYENV_INSTALLED_OUTPUT = """system (set by /home/mattwyant/.pyenv/version)
 3.11.1 (set by /home/mattwyant/.pyenv/version)
 3.10.9 (set by /home/mattwyant/.pyenv/version)
 3.9.16 (set by /home/mattwyant/.pyenv/version)
-3.8.16 (set by /home/mattwyant/.pyenv/version)"""
+3.8.16 (set by /home/mattwyant/.pyenv/version)
+pypy3.10-7.3.17 (set by /home/mattwyant/.pyenv/version)"""
 
 PYENV_AVAILABLE_OUTPUT = """Available versions:
   3.9.0
@@ -72,7 +84,14 @@ PYENV_AVAILABLE_OUTPUT = """Available versions:
   anaconda-1.9.1
   anaconda-1.9.2
   anaconda-2.0.0
-  anaconda-2.0.1"""
+  anaconda-2.0.1
+  graalpy-24.1.0
+  graalpy-community-24.1.0
+  graalpython-22.3.0
+  pypy-c-jit-latest
+  pypy3.9-7.3.16
+  pypy3.10-7.3.17
+  pypy3.10-7.3.17-src"""
 
 
 def test_pyenv_installed(mocker: MockerFixture) -> None:
@@ -86,6 +105,7 @@ def test_pyenv_installed(mocker: MockerFixture) -> None:
         PyVer(3, 9, 16),
         PyVer(3, 10, 9),
         PyVer(3, 11, 1),
+        ImplVer("pypy", 7, 3, 17, lang="3.10"),
     ]
 
 
@@ -93,8 +113,9 @@ def test_pyenv_available(mocker: MockerFixture) -> None:
     mock_execute = mocker.patch("pyenvtool.pyenv.pyenv_execute")
     mock_execute.return_value = PYENV_AVAILABLE_OUTPUT
 
-    available = sorted(pyenv_available_versions())
+    available = sorted(pyenv_available_versions(root=Path("/opt/pyenv")))
 
+    mock_execute.assert_called_once_with("install", "--list", root=Path("/opt/pyenv"))
     assert available == [
         PyVer(3, 9, 0),
         PyVer(3, 9, 0, "dev"),
@@ -141,4 +162,47 @@ def test_pyenv_available(mocker: MockerFixture) -> None:
         PyVer(3, 12, 0),
         PyVer(3, 12, 0, "dev"),
         PyVer(3, 13, 0, "dev"),
+        ImplVer("graalpy", 24, 1, 0),
+        ImplVer("graalpy-community", 24, 1, 0),
+        ImplVer("graalpython", 22, 3, 0),
+        ImplVer("pypy", 7, 3, 16, lang="3.9"),
+        ImplVer("pypy", 7, 3, 17, lang="3.10"),
+        ImplVer("pypy", 7, 3, 17, "src", lang="3.10"),
     ]
+
+
+def test_pyenv_installed_async(mocker: MockerFixture) -> None:
+    mock_execute = mocker.patch("pyenvtool.pyenv.pyenv_execute_async")
+    mock_execute.return_value = PYENV_INSTALLED_OUTPUT
+
+    installed = asyncio.run(pyenv_installed_versions_async())
+
+    mocker.patch("pyenvtool.pyenv.pyenv_execute", return_value=PYENV_INSTALLED_OUTPUT)
+    assert sorted(installed) == sorted(pyenv_installed_versions())
+
+
+def test_pyenv_available_async(mocker: MockerFixture) -> None:
+    mock_execute = mocker.patch("pyenvtool.pyenv.pyenv_execute_async")
+    mock_execute.return_value = PYENV_AVAILABLE_OUTPUT
+
+    available = asyncio.run(pyenv_available_versions_async())
+
+    mocker.patch("pyenvtool.pyenv.pyenv_execute", return_value=PYENV_AVAILABLE_OUTPUT)
+    assert sorted(available) == sorted(pyenv_available_versions())
+
+
+@pytest.mark.skipif(shutil.which("sleep") is None, reason="requires `sleep`")
+def test_pyenv_execute_async_cancel(mocker: MockerFixture) -> None:
+    mocker.patch("pyenvtool.pyenv.PYENV_NAME", "sleep")
+    spawn = mocker.spy(asyncio, "create_subprocess_exec")
+
+    async def run() -> None:
+        task = asyncio.create_task(pyenv_execute_async("30"))
+        await asyncio.sleep(0.2)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert spawn.spy_return.returncode is not None
+
+    asyncio.run(run())
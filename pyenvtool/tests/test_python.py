@@ -1,8 +1,21 @@
 """Test Python-related code."""
 
+import asyncio
+import re
+from pathlib import Path
+
+import pytest
 import requests_mock
 
-from pyenvtool.python import PYTHON_DOWNLOADS, PyVer, python_supported_versions
+from pyenvtool.python import (
+    PYTHON_DOWNLOADS,
+    ImplVer,
+    PyVer,
+    ReleaseListParser,
+    parse_version,
+    python_supported_versions,
+    python_supported_versions_async,
+)
 
 PYTHON_HTML_OUTPUT = """
 <div class="row active-release-list-widget">
@@ -71,11 +84,12 @@ PYTHON_HTML_OUTPUT = """
 """  # noqa: E501
 
 
-def test_python_supported() -> None:
+@pytest.mark.parametrize("backend", ["soup", "stream"])
+def test_python_supported(backend: str) -> None:
     with requests_mock.Mocker() as mock_requests:
         mock_requests.get(PYTHON_DOWNLOADS, text=PYTHON_HTML_OUTPUT)
 
-        supported = sorted(v for v, _ in python_supported_versions())
+        supported = sorted(v for v, _ in python_supported_versions(backend))
 
     assert supported == [
         PyVer(3, 8),
@@ -84,3 +98,86 @@ def test_python_supported() -> None:
         PyVer(3, 11),
         PyVer(3, 12),
     ]
+
+
+def test_python_supported_synthetic_page() -> None:
+    page = (Path(__file__).parent / "data" / "synthetic_downloads.html").read_text()
+
+    with requests_mock.Mocker() as mock_requests:
+        mock_requests.get(PYTHON_DOWNLOADS, text=page)
+
+        soup = list(python_supported_versions("soup"))
+        stream = list(python_supported_versions("stream"))
+
+    assert soup == stream
+    assert sorted(v for v, _ in stream) == [
+        PyVer(3, 8),
+        PyVer(3, 9),
+        PyVer(3, 10),
+        PyVer(3, 11),
+        PyVer(3, 12),
+    ]
+
+
+def test_python_supported_async() -> None:
+    with requests_mock.Mocker() as mock_requests:
+        mock_requests.get(PYTHON_DOWNLOADS, text=PYTHON_HTML_OUTPUT)
+
+        supported = sorted(v for v, _ in asyncio.run(python_supported_versions_async()))
+
+    assert supported == [
+        PyVer(3, 8),
+        PyVer(3, 9),
+        PyVer(3, 10),
+        PyVer(3, 11),
+        PyVer(3, 12),
+    ]
+
+
+def test_python_supported_stream_stops() -> None:
+    parser = ReleaseListParser()
+    parser.feed("<html><body>" + PYTHON_HTML_OUTPUT)
+
+    rows = list(parser.rows)
+    assert parser.done
+    assert [v for v, _ in rows] == ["3.13", "3.12", "3.11", "3.10", "3.9", "3.8"]
+
+    parser.feed('<div class="active-release-list-widget"><ol><li>')
+    assert parser.rows == rows
+
+
+@pytest.mark.parametrize(
+    ("ident", "version"),
+    [
+        ("3.11.2", PyVer(3, 11, 2)),
+        ("pypy3.10-7.3.17", ImplVer("pypy", 7, 3, 17, lang="3.10")),
+        ("graalpy-community-24.1.0", ImplVer("graalpy-community", 24, 1, 0)),
+        ("graalpython-22.3.0", ImplVer("graalpython", 22, 3, 0)),
+    ],
+)
+def test_parse_version(ident: str, version: PyVer) -> None:
+    parsed = parse_version(ident)
+
+    assert type(parsed) is type(version)
+    assert parsed == version
+    assert str(parsed) == ident
+
+
+@pytest.mark.parametrize("ident", ["pypy3.9-c-jit-latest", "miniconda3-latest"])
+def test_parse_version_invalid(ident: str) -> None:
+    with pytest.raises(ValueError, match=re.escape(ident)):
+        parse_version(ident)
+
+
+def test_implver_ordering() -> None:
+    pypy39 = ImplVer("pypy", 7, 3, 17, lang="3.9")
+    pypy310 = ImplVer("pypy", 7, 3, 17, lang="3.10")
+
+    assert sorted([pypy310, PyVer(3, 12, 0), pypy39]) == [
+        PyVer(3, 12, 0),
+        pypy39,
+        pypy310,
+    ]
+    assert PyVer(3, 12, 0) != pypy39
+    assert pypy310.main == ImplVer("pypy", 7, 3, lang="3.10")
+    assert pypy310.main != pypy39.main
@@ -0,0 +1,84 @@
+"""Test offline support status calculation."""
+
+from datetime import date
+from pathlib import Path
+from typing import List, Tuple
+
+import pytest
+import requests_mock
+
+from pyenvtool.python import PyVer, VersionStatus
+from pyenvtool.releases import (
+    RELEASE_CYCLE_URL,
+    load_release_cycle,
+    python_release_cycle_versions,
+    update_release_cycle,
+)
+
+DEVGUIDE_JSON = {
+    "3.14": {
+        "branch": "main",
+        "pep": 745,
+        "status": "feature",
+        "first_release": "2025-10-01",
+        "end_of_life": "2030-10",
+    },
+    "3.12": {
+        "branch": "3.12",
+        "pep": 693,
+        "status": "bugfix",
+        "first_release": "2023-10-02",
+        "end_of_life": "2028-10",
+    },
+}
+
+
+@pytest.mark.parametrize(
+    ("today", "results"),
+    [
+        pytest.param(
+            date(2024, 6, 1),
+            [
+                (PyVer(3, 8), VersionStatus.SECURITY),
+                (PyVer(3, 9), VersionStatus.SECURITY),
+                (PyVer(3, 10), VersionStatus.SECURITY),
+                (PyVer(3, 11), VersionStatus.SECURITY),
+                (PyVer(3, 12), VersionStatus.BUGFIX),
+            ],
+            id="2024",
+        ),
+        pytest.param(
+            date(2026, 10, 18),
+            [
+                (PyVer(3, 10), VersionStatus.SECURITY),
+                (PyVer(3, 11), VersionStatus.SECURITY),
+                (PyVer(3, 12), VersionStatus.SECURITY),
+                (PyVer(3, 13), VersionStatus.SECURITY),
+                (PyVer(3, 14), VersionStatus.BUGFIX),
+                (PyVer(3, 15), VersionStatus.BUGFIX),
+            ],
+            id="2026",
+        ),
+    ],
+)
+def test_release_cycle_status(
+    today: date,
+    results: List[Tuple[PyVer, VersionStatus]],
+    tmp_path: Path,
+) -> None:
+    cycle = load_release_cycle(root=tmp_path)
+
+    assert list(python_release_cycle_versions(cycle, today)) == results
+
+
+def test_release_cycle_update(tmp_path: Path) -> None:
+    with requests_mock.Mocker() as mock_requests:
+        mock_requests.get(RELEASE_CYCLE_URL, json=DEVGUIDE_JSON)
+
+        assert update_release_cycle(root=tmp_path) == len(DEVGUIDE_JSON)
+
+    cycle = load_release_cycle(root=tmp_path)
+    assert cycle == {
+        PyVer(3, 14): (date(2025, 10, 1), date(2030, 10, 31)),
+        PyVer(3, 12): (date(2023, 10, 2), date(2028, 10, 31)),
+    }
@@ -0,0 +1,157 @@
+"""Test staged installs and atomic tree swaps."""
+
+import errno
+import runpy
+import subprocess
+from pathlib import Path
+from typing import Dict, Optional
+
+import pytest
+from pytest_mock.plugin import MockerFixture
+
+from pyenvtool.fs import relocate_prefix, swap_tree
+from pyenvtool.python import PyVer
+from pyenvtool.staging import (
+    finish_staged_install,
+    staged_install,
+    staging_env,
+    staging_root,
+)
+from pyenvtool.trash import trash_dir, wait_for_deletions
+
+
+def make_tree(path: Path, text: str) -> Path:
+    (path / "bin").mkdir(parents=True)
+    (path / "bin" / "pip").write_text(f"#!{path}/bin/python\n{text}\n")
+    return path
+
+
+SYSCONFIGDATA = "lib/python3.11/_sysconfigdata__linux_x86_64-linux-gnu.py"
+
+
+def fake_pyenv_install(
+    *args: str,
+    root: Optional[Path] = None,
+    env: Optional[Dict[str, str]] = None,
+) -> str:
+    assert root is not None
+    assert env is not None
+    prefix = make_tree(root / "versions" / args[-1], "new")
+
+    sysconfigdata = prefix / SYSCONFIGDATA
+    sysconfigdata.parent.mkdir(parents=True)
+    sysconfigdata.write_text(
+        f"build_time_vars = {{'prefix': {str(prefix)!r}, "
+        f"'LIBDIR': {str(prefix / 'lib')!r}}}\n",
+    )
+    makefile = prefix / "lib/python3.11/config-3.11-x86_64-linux-gnu/Makefile"
+    makefile.parent.mkdir()
+    makefile.write_text(f"prefix=\t\t{prefix!s}\n")
+    return ""
+
+
+def test_swap_tree(tmp_path: Path) -> None:
+    old = make_tree(tmp_path / "live", "old")
+    new = make_tree(tmp_path / "new", "new")
+
+    assert swap_tree(new, old)
+    assert "new" in (old / "bin" / "pip").read_text()
+    assert "old" in (new / "bin" / "pip").read_text()
+
+    assert not swap_tree(new, tmp_path / "other")
+    assert not new.exists()
+
+
+def test_swap_tree_fallback(tmp_path: Path, mocker: MockerFixture) -> None:
+    mocker.patch(
+        "pyenvtool.fs.exchange_paths",
+        side_effect=OSError(errno.ENOSYS, "not available"),
+    )
+    old = make_tree(tmp_path / "live", "old")
+    new = make_tree(tmp_path / "new", "new")
+
+    assert swap_tree(new, old)
+    assert "new" in (old / "bin" / "pip").read_text()
+    assert "old" in (new / "bin" / "pip").read_text()
+
+
+def test_staged_install(tmp_path: Path, mocker: MockerFixture) -> None:
+    root = tmp_path / "root"
+    live = make_tree(root / "versions" / "3.11.2", "old")
+    mocker.patch("pyenvtool.staging.staging_supported", return_value=True)
+    mocker.patch("pyenvtool.staging.pyenv_execute", side_effect=fake_pyenv_install)
+    rehash = mocker.patch("pyenvtool.staging.pyenv_rehash")
+
+    staged_install(PyVer(3, 11, 2), root=root)
+    wait_for_deletions()
+
+    assert (live / "bin" / "pip").read_text() == f"#!{live}/bin/python\nnew\n"
+    sysconfig = runpy.run_path(str(live / SYSCONFIGDATA))["build_time_vars"]
+    assert sysconfig == {"prefix": str(live), "LIBDIR": str(live / "lib")}
+    assert str(live) in next(live.glob("lib/python3.11/config-*/Makefile")).read_text()
+    assert not staging_root(PyVer(3, 11, 2), root=root).exists()
+    assert list(trash_dir(root).iterdir()) == []
+    rehash.assert_not_called()
+
+    mocker.patch("pyenvtool.staging.run_dedupe_hook")
+    finish_staged_install(root=root)
+    rehash.assert_called_once_with(root=root)
+
+
+def test_staged_install_failure(tmp_path: Path, mocker: MockerFixture) -> None:
+    root = tmp_path / "root"
+    live = make_tree(root / "versions" / "3.11.2", "old")
+    mocker.patch("pyenvtool.staging.staging_supported", return_value=True)
+    mocker.patch(
+        "pyenvtool.staging.pyenv_execute",
+        side_effect=subprocess.CalledProcessError(1, ["pyenv", "install"]),
+    )
+    rehash = mocker.patch("pyenvtool.staging.pyenv_rehash")
+
+    with pytest.raises(subprocess.CalledProcessError):
+        staged_install(PyVer(3, 11, 2), root=root)
+    wait_for_deletions()
+
+    assert "old" in (live / "bin" / "pip").read_text()
+    assert not staging_root(PyVer(3, 11, 2), root=root).exists()
+    rehash.assert_not_called()
+
+
+def test_staging_env(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    live, staged = tmp_path / "live", tmp_path / "staged"
+    rpath = f"-Wl,-rpath={live!s}/lib:{staged!s}/lib"
+
+    monkeypatch.delenv("LDFLAGS", raising=False)
+    assert staging_env(live, staged, root=tmp_path)["LDFLAGS"] == rpath
+
+    monkeypatch.setenv("LDFLAGS", "-Wl,-rpath=/opt/lib")
+    env = staging_env(live, staged, root=tmp_path)
+    assert env["LDFLAGS"] == f"-Wl,-rpath=/opt/lib {rpath}"
+    assert env["PYENVTOOL_STAGING"] == "1"
+
+
+def test_staging_env_plugin_hooks(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.delenv("PYENV_HOOK_PATH", raising=False)
+    hooks = tmp_path / "plugins" / "pyenv-virtualenv" / "etc" / "pyenv.d"
+    hooks.mkdir(parents=True)
+
+    env = staging_env(tmp_path / "live", tmp_path / "staged", root=tmp_path)
+
+    assert env["PYENV_HOOK_PATH"].split(":") == [
+        str(tmp_path / "pyenv.d"),
+        str(hooks),
+    ]
+
+
+def test_relocate_prefix_files(tmp_path: Path) -> None:
+    prefix = tmp_path / "versions" / "3.11.2"
+    fake_pyenv_install("3.11.2", root=tmp_path, env={})
+    (prefix / "lib/python3.11/site.py").write_text(f"PREFIX = {str(prefix)!r}\n")
+
+    relocate_prefix(prefix, prefix, tmp_path / "live")
+
+    assert str(tmp_path / "live") in (prefix / SYSCONFIGDATA).read_text()
+    assert str(prefix) in (prefix / "lib/python3.11/site.py").read_text()
@@ -0,0 +1,65 @@
+"""Test background deletion of removed versions."""
+
+import errno
+from pathlib import Path
+
+from pytest_mock.plugin import MockerFixture
+
+from pyenvtool.python import PyVer
+from pyenvtool.trash import empty_trash, trash_dir, trash_version, wait_for_deletions
+
+
+def make_version(root: Path, name: str) -> Path:
+    path = root / "versions" / name
+    (path / "lib").mkdir(parents=True)
+    (path / "lib" / "os.py").write_text("")
+    return path
+
+
+def test_trash_version(tmp_path: Path) -> None:
+    root = tmp_path / "root"
+    path = make_version(root, "3.10.4")
+
+    trash_version(PyVer(3, 10, 4), root=root)
+    assert not path.exists()
+
+    wait_for_deletions()
+    assert list(trash_dir(root).iterdir()) == []
+
+    # Removing a version that is already gone is not an error
+    trash_version(PyVer(3, 10, 4), root=root)
+
+
+def test_trash_version_links(tmp_path: Path) -> None:
+    root = tmp_path / "root"
+    path = make_version(root, "3.10.4")
+    (path / "envs" / "project").mkdir(parents=True)
+    (root / "versions" / "project").symlink_to(path / "envs" / "project")
+    (root / "versions" / "system").symlink_to(tmp_path)
+
+    trash_version(PyVer(3, 10, 4), root=root)
+    wait_for_deletions()
+
+    assert not (root / "versions" / "project").is_symlink()
+    assert (root / "versions" / "system").is_symlink()
+
+
+def test_trash_version_fallback(tmp_path: Path, mocker: MockerFixture) -> None:
+    root = tmp_path / "root"
+    make_version(root, "3.10.4")
+
+    mocker.patch("os.rename", side_effect=OSError(errno.EXDEV, "cross-device"))
+    uninstall = mocker.patch("pyenvtool.trash.pyenv_uninstall")
+
+    trash_version(PyVer(3, 10, 4), root=root)
+    uninstall.assert_called_once_with(PyVer(3, 10, 4), root=root)
+
+
+def test_empty_trash(tmp_path: Path) -> None:
+    root = tmp_path / "root"
+    leftover = make_version(root, "3.9.1")
+    leftover.rename(trash_dir(root) / "3.9.1.1")
+
+    assert len(empty_trash(root=root)) == 1
+    wait_for_deletions()
+    assert list(trash_dir(root).iterdir()) == []
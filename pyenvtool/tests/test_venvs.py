@@ -0,0 +1,104 @@
+"""Test the virtual environment dependency index."""
+
+import subprocess
+from pathlib import Path
+
+from pytest_mock.plugin import MockerFixture
+
+from pyenvtool.pyenv import Op
+from pyenvtool.python import PyVer
+from pyenvtool.venvs import (
+    VENV_CONFIG,
+    held_versions,
+    hold_removals,
+    rebuild_venv,
+    scan_venvs,
+    venv_dependents,
+)
+
+
+def make_venv(path: Path, home: Path) -> Path:
+    path.mkdir(parents=True)
+    (path / VENV_CONFIG).write_text(
+        f"home = {home!s}\ninclude-system-site-packages = false\n",
+    )
+    return path
+
+
+def make_root(tmp_path: Path) -> Path:
+    root = tmp_path / "root"
+    for v in ("3.10.4", "3.11.1"):
+        (root / "versions" / v / "bin").mkdir(parents=True)
+    make_venv(
+        root / "versions" / "3.11.1" / "envs" / "tool",
+        root / "versions" / "3.11.1" / "bin",
+    )
+    return root
+
+
+def test_venv_dependents(tmp_path: Path) -> None:
+    root = make_root(tmp_path)
+    external = tmp_path / "virtualenvs"
+    make_venv(external / "app", root / "versions" / "3.10.4" / "bin")
+    make_venv(external / "other", Path("/usr/bin"))
+    (external / "not-a-venv").mkdir()
+
+    venvs = scan_venvs([external], root=root)
+    dependents = venv_dependents(
+        venvs,
+        [PyVer(3, 10, 4), PyVer(3, 11, 1)],
+        root=root,
+    )
+
+    assert set(venvs) == {
+        external / "app",
+        external / "other",
+        root / "versions" / "3.11.1" / "envs" / "tool",
+    }
+    assert dependents == {
+        PyVer(3, 10, 4): [external / "app"],
+        PyVer(3, 11, 1): [root / "versions" / "3.11.1" / "envs" / "tool"],
+    }
+    assert held_versions(dependents, "hold", root=root) == {
+        PyVer(3, 10, 4),
+        PyVer(3, 11, 1),
+    }
+    assert held_versions(dependents, "rebuild", root=root) == {PyVer(3, 11, 1)}
+    assert held_versions(dependents, "flag", root=root) == set()
+
+
+def test_hold_removals() -> None:
+    deltas = [
+        (PyVer(3, 11, 2), Op.INSTALL),
+        (PyVer(3, 11, 1), Op.REMOVE),
+        (PyVer(3, 10, 4), Op.REMOVE),
+    ]
+
+    assert hold_removals(deltas, {PyVer(3, 11, 1), PyVer(3, 9, 0)}) == [
+        (PyVer(3, 11, 2), Op.INSTALL),
+        (PyVer(3, 11, 1), Op.KEEP),
+        (PyVer(3, 10, 4), Op.REMOVE),
+    ]
+
+
+def test_venv_index_cached(tmp_path: Path, mocker: MockerFixture) -> None:
+    root = make_root(tmp_path)
+    scan_venvs(root=root)
+
+    read = mocker.patch("pyenvtool.venvs._read_home")
+    venvs = scan_venvs(root=root)
+
+    read.assert_not_called()
+    assert list(venvs.values()) == [root / "versions" / "3.11.1" / "bin"]
+
+
+def test_rebuild_venv(mocker: MockerFixture) -> None:
+    run = mocker.patch(
+        "pyenvtool.venvs.subprocess.run",
+        return_value=subprocess.CompletedProcess([], 1, "", "broken"),
+    )
+    venv = Path("/venvs/app")
+    python = Path("/root/versions/3.11.2/bin/python")
+
+    assert rebuild_venv(venv, python) == (venv, False)
+    assert run.call_args.args[0] == [str(python), "-m", "venv", "--upgrade", str(venv)]
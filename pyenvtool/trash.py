@@ -0,0 +1,180 @@
+"""Remove installed versions instantly, deleting their files in the background."""
+
+import contextlib
+import logging
+import os
+import shutil
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Union
+
+from pyenvtool.pyenv import (
+    pyenv_state_dir,
+    pyenv_uninstall,
+    pyenv_version_dir,
+)
+from pyenvtool.python import PyVer
+
+TRASH_NAME = "trash"
+
+Deletion = Union[subprocess.Popen[bytes], threading.Thread]
+
+# Deletions started by this process, so callers which need to can wait for them
+_pending: List[Deletion] = []
+_pending_lock = threading.Lock()
+
+
+def trash_dir(root: Optional[Path] = None) -> Path:
+    """Directory removed versions are moved into, created if necessary."""
+    path = pyenv_state_dir(root) / TRASH_NAME
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def delete_command(path: Path) -> Optional[List[str]]:
+    """Command deleting a tree at idle CPU and I/O priority, where available."""
+    if shutil.which("rm") is None:
+        return None
+
+    cmd = ["rm", "-rf", "--", str(path)]
+    if shutil.which("nice") is not None:
+        cmd = ["nice", "-n", "19", *cmd]
+    if shutil.which("ionice") is not None:
+        cmd = ["ionice", "-c", "3", *cmd]
+    return cmd
+
+
+def delete_in_background(path: Path) -> None:
+    """
+    Delete a tree without waiting for it.
+
+    The tree is deleted by a detached process, which carries on after this one
+    exits, so a run never waits on its deletions. Without `rm`, a daemon
+    thread deletes it instead, and anything it doesn't finish before exit is
+    left in the trash for the next run's `empty_trash`.
+    """
+    logger = logging.getLogger(__name__)
+
+    cmd = delete_command(path)
+    task: Deletion
+    if cmd is None:
+        task = threading.Thread(
+            target=shutil.rmtree,
+            args=(path,),
+            kwargs={"ignore_errors": True},
+            name="trash",
+            daemon=True,
+        )
+        task.start()
+    else:
+        logger.debug("Executing: " + " ".join(cmd))
+        task = subprocess.Popen(
+            cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    logger.info(f"Deleting {path!s} in the background")
+
+    with _pending_lock:
+        _pending[:] = [t for t in _pending if _running(t)]
+        _pending.append(task)
+
+
+def _running(task: Deletion) -> bool:
+    if isinstance(task, threading.Thread):
+        return task.is_alive()
+    return task.poll() is None
+
+
+def wait_for_deletions() -> None:
+    """Block until every deletion started by this process has finished."""
+    with _pending_lock:
+        pending = _pending[:]
+        _pending.clear()
+
+    for task in pending:
+        if isinstance(task, threading.Thread):
+            task.join()
+        else:
+            task.wait()
+
+
+def move_to_trash(path: Path, root: Optional[Path] = None) -> Path:
+    """
+    Atomically move a tree into the trash.
+
+    Raises an `OSError` if the tree doesn't exist, or if the trash is on
+    another filesystem.
+    """
+    dest = trash_dir(root) / f"{path.name}.{time.time_ns()}"
+    os.rename(path, dest)
+    return dest
+
+
+def empty_trash(root: Optional[Path] = None) -> List[Path]:
+    """Delete anything left in the trash by an earlier run, in the background."""
+    try:
+        leftovers = list((pyenv_state_dir(root) / TRASH_NAME).iterdir())
+    except FileNotFoundError:
+        return []
+    for path in leftovers:
+        delete_in_background(path)
+    return leftovers
+
+
+def version_links(v: PyVer, root: Optional[Path] = None) -> List[Path]:
+    """
+    Symlinks in the versions directory which point into a version.
+
+    pyenv-virtualenv gives each environment it creates inside a version such a
+    link, so it can be selected by its short name, and its uninstall hook
+    removes them along with the version.
+    """
+    path = os.path.realpath(pyenv_version_dir(v, root=root))
+
+    links = []
+    with contextlib.suppress(FileNotFoundError), os.scandir(
+        os.path.dirname(path),
+    ) as it:
+        for entry in it:
+            if not entry.is_symlink():
+                continue
+            target = os.path.realpath(entry.path)
+            if target == path or target.startswith(path + os.sep):
+                links.append(Path(entry.path))
+
+    return links
+
+
+def trash_version(v: PyVer, root: Optional[Path] = None) -> None:
+    """
+    Uninstall a version by moving it to the trash.
+
+    Symlinks to environments inside it are removed too, as pyenv-virtualenv's
+    uninstall hook would. Falls back to `pyenv uninstall`, which runs the
+    hooks itself, if the trash is on another filesystem. The caller is
+    responsible for rehashing the shims afterwards.
+    """
+    logger = logging.getLogger(__name__)
+    path = pyenv_version_dir(v, root=root)
+    links = version_links(v, root=root)
+
+    try:
+        trashed = move_to_trash(path, root=root)
+    except FileNotFoundError:
+        logger.info(f"{v!s} is already removed")
+        return
+    except OSError as e:
+        logger.info(f"Can't move {path!s} to the trash ({e!s}), uninstalling")
+        pyenv_uninstall(v, root=root)
+        return
+
+    for link in links:
+        logger.info(f"Removing link {link!s} to {v!s}")
+        link.unlink(missing_ok=True)
+
+    delete_in_background(trashed)
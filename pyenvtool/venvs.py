@@ -0,0 +1,211 @@
+"""Find virtual environments which depend on installed versions."""
+
+import contextlib
+import json
+import logging
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from pyenvtool.pyenv import Op, pyenv_root, pyenv_state_dir, pyenv_version_dir
+from pyenvtool.python import PyVer
+
+VENV_CONFIG = "pyvenv.cfg"
+VENV_INDEX_NAME = "venvs.json"
+
+# What to do when a version being removed has venvs based on it
+VENV_POLICIES = ("hold", "flag", "rebuild")
+
+
+def venv_candidates(
+    root: Optional[Path] = None,
+    venv_dirs: Iterable[Path] = (),
+) -> List[Path]:
+    """
+    Directories which may be virtual environments.
+
+    These are the pyenv-virtualenv environments in each installed version,
+    and each configured directory, or its children if it isn't a venv itself
+    (as with `~/.virtualenvs`).
+    """
+    candidates: List[Path] = []
+
+    for envs in (pyenv_root(root) / "versions").glob("*/envs"):
+        candidates.extend(p for p in envs.iterdir() if p.is_dir())
+
+    for d in venv_dirs:
+        if (d / VENV_CONFIG).is_file():
+            candidates.append(d)
+        elif d.is_dir():
+            candidates.extend(p for p in d.iterdir() if p.is_dir())
+
+    return candidates
+
+
+def _read_home(config: Path) -> Optional[str]:
+    with config.open(encoding="utf-8", errors="replace") as f:
+        for line in f:
+            key, sep, value = line.partition("=")
+            if sep and key.strip() == "home":
+                return value.strip()
+    return None
+
+
+class VenvIndex:
+    """
+    The base interpreter of each venv, from previous scans.
+
+    Entries are keyed on the venv and hold the mtime of its `pyvenv.cfg`,
+    which is only read again when that changes.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.entries: Dict[str, List] = {}
+
+        with contextlib.suppress(FileNotFoundError, json.JSONDecodeError):
+            self.entries = json.loads(path.read_text(encoding="utf-8"))
+
+    def lookup(self, venv: Path) -> Optional[List]:
+        """Return the `[mtime, home]` entry for a venv, or `None` if not a venv."""
+        config = venv / VENV_CONFIG
+        try:
+            mtime = config.stat().st_mtime_ns
+            cached = self.entries.get(str(venv))
+            if cached is not None and cached[0] == mtime:
+                return cached
+
+            home = _read_home(config)
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            return None
+
+        return None if home is None else [mtime, home]
+
+    def refresh(self, venvs: Iterable[Path], jobs: Optional[int] = None) -> None:
+        """Bring the index up to date with a set of candidate venvs."""
+        venvs = list(venvs)
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            entries = list(pool.map(self.lookup, venvs))
+
+        self.entries = {
+            str(venv): entry for venv, entry in zip(venvs, entries) if entry is not None
+        }
+
+    def save(self) -> None:
+        """Write the index atomically."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(self.entries), encoding="utf-8")
+        tmp.replace(self.path)
+
+
+def scan_venvs(
+    venv_dirs: Iterable[Path] = (),
+    root: Optional[Path] = None,
+    jobs: Optional[int] = None,
+    dry_run: bool = False,
+) -> Dict[Path, Path]:
+    """Map each virtual environment to the `home` of its base interpreter."""
+    logger = logging.getLogger(__name__)
+
+    index = VenvIndex(pyenv_state_dir(root) / VENV_INDEX_NAME)
+    index.refresh(venv_candidates(root, venv_dirs), jobs=jobs)
+    if not dry_run:
+        index.save()
+
+    logger.info(f"Found {len(index.entries)} virtual environments")
+    return {Path(venv): Path(home) for venv, (_, home) in index.entries.items()}
+
+
+def venv_dependents(
+    venvs: Dict[Path, Path],
+    versions: Iterable[PyVer],
+    root: Optional[Path] = None,
+) -> Dict[PyVer, List[Path]]:
+    """Group virtual environments by the installed version they are based on."""
+    prefixes = {
+        os.path.realpath(pyenv_version_dir(v, root=root)) + os.sep: v for v in versions
+    }
+
+    dependents: Dict[PyVer, List[Path]] = {}
+    for venv, home in sorted(venvs.items()):
+        real_home = os.path.realpath(home) + os.sep
+        for prefix, v in prefixes.items():
+            if real_home.startswith(prefix):
+                dependents.setdefault(v, []).append(venv)
+                break
+
+    return dependents
+
+
+def held_versions(
+    dependents: Dict[PyVer, List[Path]],
+    policy: str,
+    root: Optional[Path] = None,
+) -> Set[PyVer]:
+    """
+    Versions which must not be removed under a venv policy.
+
+    Under `hold` that is every version with a venv based on it. Under
+    `rebuild` it is those with pyenv-virtualenv environments inside them,
+    which would be deleted along with the version.
+    """
+    if policy == "hold":
+        return {v for v, venvs in dependents.items() if venvs}
+
+    if policy == "rebuild":
+        return {
+            v
+            for v, venvs in dependents.items()
+            if any(pyenv_version_dir(v, root=root) in venv.parents for venv in venvs)
+        }
+
+    return set()
+
+
+def hold_removals(
+    deltas: Iterable[Tuple[PyVer, Op]],
+    held: Iterable[PyVer],
+) -> List[Tuple[PyVer, Op]]:
+    """Keep held versions which a precomputed set of changes would remove."""
+    held = set(held)
+    return [(v, Op.KEEP if op is Op.REMOVE and v in held else op) for v, op in deltas]
+
+
+def rebuild_venv(venv: Path, python: Path) -> Tuple[Path, bool]:
+    """Point a venv at a new base interpreter with `venv --upgrade`."""
+    logger = logging.getLogger(__name__)
+
+    cmd = [str(python), "-m", "venv", "--upgrade", str(venv)]
+    logger.info("Executing: " + " ".join(cmd))
+    ps = subprocess.run(
+        cmd,
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        check=False,
+    )
+    if ps.returncode != 0:
+        logger.warning(f"Failed to rebuild {venv!s}: {ps.stderr.strip()}")
+
+    return venv, ps.returncode == 0
+
+
+def rebuild_venvs(
+    rebuilds: Iterable[Tuple[Path, PyVer]],
+    root: Optional[Path] = None,
+    jobs: Optional[int] = None,
+) -> List[Tuple[Path, bool]]:
+    """Rebuild venvs against new base versions in parallel."""
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        return list(
+            pool.map(
+                lambda r: rebuild_venv(
+                    r[0],
+                    pyenv_version_dir(r[1], root=root) / "bin" / "python",
+                ),
+                rebuilds,
+            ),
+        )